@@ -25,6 +25,9 @@ from app.models import extra_time
 from app.models.user import user, student, instructor, user_auth
 from app.models import submission
 from app.models.grade_report import *
+from app.models.grading_job import *
+from app.models.grade_result import *
+from app.models.assignment_autograder import *
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
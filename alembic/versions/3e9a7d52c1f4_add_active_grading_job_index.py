@@ -0,0 +1,41 @@
+"""Add active grading job index
+
+Revision ID: 3e9a7d52c1f4
+Revises: 8c1f4e6a2b37
+Create Date: 2026-10-18 09:41:27.118342+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a7d52c1f4'
+down_revision = '8c1f4e6a2b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent requests may have left several active jobs for an assignment, which the index can't be built over.
+    # Keep the earliest of each (other replicas may still be running it) and fail the duplicates.
+    op.execute("""
+        UPDATE grading_job
+        SET status = 'FAILED', error_message = 'another grading job was already active for the assignment', finished_date = CURRENT_TIMESTAMP
+        WHERE status IN ('QUEUED', 'RUNNING') AND id NOT IN (
+            SELECT min(id) FROM grading_job
+            WHERE status IN ('QUEUED', 'RUNNING')
+            GROUP BY assignment_id
+        )
+    """)
+    op.create_index(
+        'ix_grading_job_active_assignment',
+        'grading_job',
+        ['assignment_id'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_grading_job_active_assignment', table_name='grading_job')
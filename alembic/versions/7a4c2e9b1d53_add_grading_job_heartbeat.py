@@ -0,0 +1,25 @@
+"""Add grading job heartbeat
+
+Revision ID: 7a4c2e9b1d53
+Revises: 3e9a7d52c1f4
+Create Date: 2026-10-19 10:02:13.540881+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4c2e9b1d53'
+down_revision = '3e9a7d52c1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Active jobs start out with a fresh heartbeat. Ones that nobody is running anymore go stale and are failed by the server.
+    op.add_column('grading_job', sa.Column('heartbeat_date', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('grading_job', 'heartbeat_date')
@@ -0,0 +1,40 @@
+"""Add submission and extra_time indexes
+
+Revision ID: 8c1f4e6a2b37
+Revises: 5b2e7c41d9a0
+Create Date: 2026-10-17 21:14:52.604113+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1f4e6a2b37'
+down_revision = '5b2e7c41d9a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_submission_assignment_student_time',
+        'submission',
+        ['assignment_id', 'student_id', sa.text('submission_time DESC')],
+        unique=False,
+        postgresql_include=['id', 'commit_id', 'graded']
+    )
+    op.create_index('ix_submission_student_assignment', 'submission', ['student_id', 'assignment_id'], unique=False)
+    op.create_index(
+        'ix_extra_time_assignment_student',
+        'extra_time',
+        ['assignment_id', 'student_id'],
+        unique=False,
+        postgresql_include=['deferred_time', 'extra_time']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_extra_time_assignment_student', table_name='extra_time')
+    op.drop_index('ix_submission_student_assignment', table_name='submission')
+    op.drop_index('ix_submission_assignment_student_time', table_name='submission')
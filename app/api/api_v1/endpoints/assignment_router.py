@@ -6,14 +6,17 @@ from sqlalchemy.orm import Session
 from app.models import AssignmentModel, StudentModel, InstructorModel
 from app.schemas import (
     InstructorAssignmentSchema, StudentAssignmentSchema, AssignmentSchema,
-    UpdateAssignmentSchema, GradeReportSchema, IdentifiableSubmissionGradeSchema
+    UpdateAssignmentSchema, GradeReportSchema, IdentifiableSubmissionGradeSchema,
+    GradingJobSchema, AssignmentAutograderSchema
 )
 from app.schemas._unset import UNSET
 from app.services import (
-    AssignmentService, InstructorAssignmentService, StudentAssignmentService,
-    UserService, LmsSyncService, GradingService, SubmissionService
+    AssignmentService,
+    UserService, LmsSyncService, GradingService, SubmissionService,
+    GradingJobService
 )
 from app.core.dependencies import get_db, PermissionDependency, RequireLoginPermission, AssignmentModifyPermission, UserIsInstructorPermission
+from app.core.exceptions import GradingJobNotFoundException
 from app.services.course_service import CourseService
 
 router = APIRouter()
@@ -30,6 +33,7 @@ class UpdateAssignmentBody(BaseModel):
     due_date: datetime | None
     is_published: bool = UNSET
     manual_grading: bool = UNSET
+    autograde_on_submit: bool = UNSET
 
 class OtterGradingBody(BaseModel):
     master_notebook_content: str
@@ -81,15 +85,9 @@ async def get_assignments(
     course = await CourseService(db).get_course()
 
     if isinstance(user, InstructorModel):
-        return [
-            await InstructorAssignmentService(db, user, assignment, course).get_instructor_assignment_schema()
-            for assignment in assignments
-        ]
+        return await AssignmentService(db).get_instructor_assignment_schemas(user, assignments, course)
     elif isinstance(user, StudentModel):
-        return [
-            await StudentAssignmentService(db, user, assignment, course).get_student_assignment_schema()
-            for assignment in assignments
-        ]
+        return await AssignmentService(db).get_student_assignment_schemas(user, assignments, course)
     else:
         return assignments
     
@@ -112,6 +110,95 @@ async def grade_assignment(
         grading_body.otter_config_content
     )
 
+@router.put(
+    "/assignments/{assignment_name}/autograder",
+    response_model=AssignmentAutograderSchema
+)
+async def set_assignment_autograder(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    assignment_name: str,
+    grading_body: OtterGradingBody,
+    perm: None = Depends(PermissionDependency(UserIsInstructorPermission))
+):
+    assignment = await AssignmentService(db).get_assignment_by_name(assignment_name)
+    return await GradingService(db).set_autograder(
+        assignment,
+        grading_body.master_notebook_content,
+        grading_body.otter_config_content
+    )
+
+@router.post(
+    "/assignments/{assignment_name}/grading_jobs",
+    response_model=GradingJobSchema
+)
+async def create_grading_job(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    assignment_name: str,
+    grading_body: OtterGradingBody,
+    perm: None = Depends(PermissionDependency(UserIsInstructorPermission))
+):
+    assignment = await AssignmentService(db).get_assignment_by_name(assignment_name)
+    return await GradingJobService(db).create_grading_job(
+        assignment,
+        grading_body.master_notebook_content,
+        grading_body.otter_config_content
+    )
+
+@router.get(
+    "/assignments/{assignment_name}/grading_jobs",
+    response_model=List[GradingJobSchema]
+)
+async def get_grading_jobs(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    assignment_name: str,
+    perm: None = Depends(PermissionDependency(UserIsInstructorPermission))
+):
+    assignment = await AssignmentService(db).get_assignment_by_name(assignment_name)
+    return await GradingJobService(db).get_grading_jobs(assignment)
+
+@router.get(
+    "/assignments/{assignment_name}/grading_jobs/{job_id}",
+    response_model=GradingJobSchema
+)
+async def get_grading_job(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    assignment_name: str,
+    job_id: int,
+    perm: None = Depends(PermissionDependency(UserIsInstructorPermission))
+):
+    assignment = await AssignmentService(db).get_assignment_by_name(assignment_name)
+    grading_job = await GradingJobService(db).get_grading_job_by_id(job_id)
+    if grading_job.assignment_id != assignment.id:
+        raise GradingJobNotFoundException()
+    return grading_job
+
+@router.get(
+    "/assignments/{assignment_name}/grading_jobs/{job_id}/grade_report",
+    response_model=GradeReportSchema
+)
+async def get_grading_job_grade_report(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    assignment_name: str,
+    job_id: int,
+    perm: None = Depends(PermissionDependency(UserIsInstructorPermission))
+):
+    grading_job_service = GradingJobService(db)
+    assignment = await AssignmentService(db).get_assignment_by_name(assignment_name)
+    grading_job = await grading_job_service.get_grading_job_by_id(job_id)
+    if grading_job.assignment_id != assignment.id:
+        raise GradingJobNotFoundException()
+    return await grading_job_service.get_grade_report(grading_job)
+
 @router.post(
     "/assignments/{assignment_name}/grade_manual",
     response_model=GradeReportSchema
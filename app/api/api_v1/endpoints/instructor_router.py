@@ -2,9 +2,10 @@ from typing import List
 from pydantic import BaseModel
 from fastapi import APIRouter, Request, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import InstructorSchema
 from app.services import InstructorService
-from app.core.dependencies import get_db, PermissionDependency, InstructorListPermission, InstructorCreatePermission
+from app.core.dependencies import get_db, get_async_db, PermissionDependency, AsyncPermissionDependency, InstructorListPermission, InstructorCreatePermission
 
 router = APIRouter()
 
@@ -17,8 +18,8 @@ class CreateInstructorBody(BaseModel):
 @router.get("/instructors/{onyen:str}", response_model=InstructorSchema)
 async def get_instructor(
     *,
-    db: Session = Depends(get_db),
-    perm: None = Depends(PermissionDependency(InstructorListPermission)),
+    db: AsyncSession = Depends(get_async_db),
+    perm: None = Depends(AsyncPermissionDependency(InstructorListPermission)),
     onyen: str
 ):
     instructor = await InstructorService(db).get_user_by_onyen(onyen)
@@ -27,8 +28,8 @@ async def get_instructor(
 @router.get("/instructors", response_model=List[InstructorSchema])
 async def list_instructor(
     *,
-    db: Session = Depends(get_db),
-    perm: None = Depends(PermissionDependency(InstructorListPermission))
+    db: AsyncSession = Depends(get_async_db),
+    perm: None = Depends(AsyncPermissionDependency(InstructorListPermission))
 ):
     instructors = await InstructorService(db).list_instructors()
     return instructors
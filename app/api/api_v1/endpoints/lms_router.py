@@ -2,7 +2,7 @@ from typing import List
 from pydantic import BaseModel
 from fastapi import APIRouter, Request, Depends, UploadFile, File
 from sqlalchemy.orm import Session
-from app.services import LmsSyncService, AssignmentService
+from app.services import LmsSyncService, AssignmentService, CanvasService
 from app.core.dependencies import (
     get_db, PermissionDependency,
     UserIsInstructorPermission
@@ -39,4 +39,12 @@ async def downsync_assignments(
     db: Session = Depends(get_db),
     perm: None = Depends(PermissionDependency(UserIsInstructorPermission))
 ):
-    return await LmsSyncService(db).sync_assignments()
\ No newline at end of file
+    return await LmsSyncService(db).sync_assignments()
+
+@router.get("/lms/metrics")
+async def get_lms_metrics(
+    *,
+    db: Session = Depends(get_db),
+    perm: None = Depends(PermissionDependency(UserIsInstructorPermission))
+):
+    return await CanvasService(db).get_request_metrics()
\ No newline at end of file
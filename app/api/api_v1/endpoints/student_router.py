@@ -2,9 +2,10 @@ from typing import List
 from pydantic import BaseModel
 from fastapi import APIRouter, Request, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import StudentSchema
 from app.services import StudentService
-from app.core.dependencies import get_db, PermissionDependency, StudentListPermission, StudentCreatePermission, UserIsStudentPermission
+from app.core.dependencies import get_db, get_async_db, PermissionDependency, AsyncPermissionDependency, StudentListPermission, StudentCreatePermission, UserIsStudentPermission
 
 router = APIRouter()
 
@@ -17,8 +18,8 @@ class CreateStudentBody(BaseModel):
 @router.get("/students/{onyen:str}", response_model=StudentSchema)
 async def get_student(
     *,
-    db: Session = Depends(get_db),
-    perm: None = Depends(PermissionDependency(StudentListPermission)),
+    db: AsyncSession = Depends(get_async_db),
+    perm: None = Depends(AsyncPermissionDependency(StudentListPermission)),
     onyen: str
 ):
     student = await StudentService(db).get_user_by_onyen(onyen)
@@ -27,8 +28,8 @@ async def get_student(
 @router.get("/students", response_model=List[StudentSchema])
 async def list_students(
     *,
-    db: Session = Depends(get_db),
-    perm: None = Depends(PermissionDependency(StudentListPermission))
+    db: AsyncSession = Depends(get_async_db),
+    perm: None = Depends(AsyncPermissionDependency(StudentListPermission))
 ):
     students = await StudentService(db).list_students()
     return students
@@ -1,12 +1,17 @@
+import asyncio
 from typing import Dict, List, Optional
 from pydantic import BaseModel
 from fastapi import APIRouter, Request, Query, Depends
 from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import SubmissionSchema
 from app.services import SubmissionService, StudentService, AssignmentService, GiteaService, CourseService, LmsSyncService
-from app.models import SubmissionModel
-from app.core.dependencies import get_db, PermissionDependency, UserIsStudentPermission, SubmissionCreatePermission, SubmissionListPermission, SubmissionDownloadPermission
+from app.models import SubmissionModel, AssignmentModel
+from app.core.config import settings
+from app.core.utils.zip_stream import stream_zip
+from app.core.utils.datetime import get_now_with_tzinfo
+from app.core.dependencies import get_db, get_async_db, PermissionDependency, AsyncPermissionDependency, UserIsStudentPermission, SubmissionCreatePermission, SubmissionListPermission, SubmissionDownloadPermission
 
 router = APIRouter()
 
@@ -48,30 +53,29 @@ async def get_submissions(
     db: Session = Depends(get_db),
     perm: None = Depends(PermissionDependency(SubmissionListPermission)),
     assignment_id: int,
-    student_onyen: Optional[str] = Query(default=None, description="Student's onyen. Lists all students if omitted.")
+    student_onyen: Optional[str] = Query(default=None, description="Student's onyen. Lists all students if omitted."),
+    after_onyen: Optional[str] = Query(default=None, description="When listing all students, only list students after this onyen (i.e. the last onyen of the previous page)."),
+    limit: Optional[int] = Query(default=None, gt=0, description="When listing all students, the maximum number of students to list.")
 ):
     onyen = request.user.onyen
     submission_service = SubmissionService(db)
     assignment = await AssignmentService(db).get_assignment_by_id(assignment_id)
     if student_onyen is None:
-        students = await StudentService(db).list_students()
-        return { student.onyen : [
-            await submission_service.get_submission_schema(s)
-            for s in await submission_service.get_submissions(student, assignment)
-        ] for student in students }
+        return await submission_service.get_submission_schemas_by_student(assignment, after_onyen=after_onyen, limit=limit)
     else:
         student = await StudentService(db).get_user_by_onyen(student_onyen)
-        return [
-            await submission_service.get_submission_schema(s)
-            for s in await submission_service.get_submissions(student, assignment)
-        ]
+        submissions = await submission_service.get_submissions(student, assignment)
+        # Submissions are newest first, so the active submission is the first one made by now.
+        now = get_now_with_tzinfo()
+        active_submission = next((s for s in submissions if s.submission_time <= now), None)
+        return [await submission_service.get_submission_schema(s, active=s is active_submission) for s in submissions]
     
 @router.get("/submissions/self", response_model=List[SubmissionSchema])
 async def get_own_submissions(
     *,
     request: Request,
-    db: Session = Depends(get_db),
-    perm: None = Depends(PermissionDependency(UserIsStudentPermission)),
+    db: AsyncSession = Depends(get_async_db),
+    perm: None = Depends(AsyncPermissionDependency(UserIsStudentPermission)),
     assignment_id: int
 ):
     onyen = request.user.onyen
@@ -80,13 +84,16 @@ async def get_own_submissions(
     assignment = await AssignmentService(db).get_assignment_by_id(assignment_id)
     submissions = await submission_service.get_submissions(student, assignment)
 
-    return [await submission_service.get_submission_schema(s) for s in submissions]
+    # Submissions are newest first, so the active submission is the first one made by now.
+    now = get_now_with_tzinfo()
+    active_submission = next((s for s in submissions if s.submission_time <= now), None)
+    return [await submission_service.get_submission_schema(s, active=s is active_submission) for s in submissions]
 
 @router.get("/submissions/active", response_model=SubmissionSchema)
 async def get_active_submission(
     *,
-    db: Session = Depends(get_db),
-    perm: None = Depends(PermissionDependency(SubmissionListPermission)),
+    db: AsyncSession = Depends(get_async_db),
+    perm: None = Depends(AsyncPermissionDependency(SubmissionListPermission)),
     onyen: str,
     assignment_id: int
 ):
@@ -96,7 +103,7 @@ async def get_active_submission(
     assignment = await AssignmentService(db).get_assignment_by_id(assignment_id)
     submission = await submission_service.get_active_submission(student, assignment)
 
-    return await submission_service.get_submission_schema(submission)
+    return await submission_service.get_submission_schema(submission, active=True)
     
 @router.get("/submissions/{submission_id}", response_model=SubmissionSchema)
 async def get_submission_by_id(
@@ -118,7 +125,7 @@ async def download_submission_stream(db, submission: SubmissionModel):
     student_repo_name = await course_service.get_student_repository_name(student.onyen)
 
     archive_name = f"assn{ submission.assignment_id }-{ student.onyen }-subm{ submission.id }.zip"
-    archive_stream = await gitea_service.download_repository(
+    _, archive_stream = await gitea_service.stream_repository(
         name=student_repo_name,
         owner=student.onyen,
         treeish_id=submission.commit_id,
@@ -130,6 +137,100 @@ async def download_submission_stream(db, submission: SubmissionModel):
         headers={"Content-Disposition": f'attachment; filename="{ archive_name }"'}
     )
 
+""" Streams a zip of every given submission's archive, piping each archive from Gitea straight into the zip.
+Archives are requested concurrently (with a bound) ahead of the zip, but only their response headers are
+read until the zip gets to them, so no archive is ever held in memory. They're written in the order they respond.
+Submissions that fail to download, or whose download is cut off partway, are listed in errors.txt. """
+async def download_submissions_stream(db, assignment: AssignmentModel, submissions: list[SubmissionModel]):
+    gitea_service = GiteaService(db)
+    course_service = CourseService(db)
+
+    # Resolve everything that needs the database up front, the archive is produced as the response streams.
+    downloads = [
+        (submission, await course_service.get_student_repository_name(submission.student.onyen))
+        for submission in submissions
+    ]
+    pending_downloads = iter(downloads)
+    # Each open archive stream holds a slot until it has been written to the zip (or closed).
+    download_slots = asyncio.Semaphore(settings.GITEA_DOWNLOAD_CONCURRENCY)
+    archives = asyncio.Queue()
+    failures = []
+
+    async def fetch():
+        for submission, student_repo_name in pending_downloads:
+            student = submission.student
+            await download_slots.acquire()
+            try:
+                _, archive_stream = await gitea_service.stream_repository(
+                    name=student_repo_name,
+                    owner=student.onyen,
+                    treeish_id=submission.commit_id,
+                    path=assignment.directory_path
+                )
+            except Exception as e:
+                download_slots.release()
+                failures.append(f"{ student.onyen } (submission { submission.id }): { str(e) }")
+                continue
+            await archives.put((submission, archive_stream))
+
+    async def fetch_all():
+        try:
+            await asyncio.gather(*[fetch() for _ in range(settings.GITEA_DOWNLOAD_CONCURRENCY)])
+        finally:
+            await archives.put(None)
+
+    async def close_archive_stream(archive_stream):
+        # A stream that was never started can't run its cleanup (closing its response) when closed, so start it first.
+        async for _ in archive_stream: break
+        await archive_stream.aclose()
+
+    async def iter_archive(submission: SubmissionModel, archive_stream):
+        # The entry has already been started, so a download that's cut off can only be reported.
+        try:
+            async for chunk in archive_stream: yield chunk
+        except Exception as e:
+            failures.append(f"{ submission.student.onyen } (submission { submission.id }): download was cut off: { str(e) }")
+
+    async def iter_errors():
+        yield "\n".join(failures).encode()
+
+    async def entries():
+        fetcher = asyncio.create_task(fetch_all())
+        try:
+            while (item := await archives.get()) is not None:
+                submission, archive_stream = item
+                archive_name = f"assn{ assignment.id }-{ submission.student.onyen }-subm{ submission.id }.zip"
+                try:
+                    yield archive_name, iter_archive(submission, archive_stream)
+                finally:
+                    await close_archive_stream(archive_stream)
+                    download_slots.release()
+            if len(failures) > 0:
+                yield "errors.txt", iter_errors()
+        finally:
+            fetcher.cancel()
+            # Close any streams that were opened but never written, e.g. if the client disconnected.
+            while not archives.empty():
+                item = archives.get_nowait()
+                if item is not None: await close_archive_stream(item[1])
+
+    return StreamingResponse(
+        stream_zip(entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="assn{ assignment.id }-active-submissions.zip"'}
+    )
+
+@router.get("/submissions/active/download_all", response_class=FileResponse)
+async def download_active_submissions(
+    *,
+    db: Session = Depends(get_db),
+    perm: None = Depends(PermissionDependency(SubmissionListPermission, SubmissionDownloadPermission)),
+    assignment_id: int
+):
+    assignment = await AssignmentService(db).get_assignment_by_id(assignment_id)
+    active_submissions = await SubmissionService(db).get_active_submissions(assignment)
+    return await download_submissions_stream(db, assignment, active_submissions)
+
 @router.get("/submissions/active/download", response_class=FileResponse)
 async def download_active_submission(
     *,
@@ -2,11 +2,12 @@
 
 from fastapi import APIRouter, Request, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Union
 from app.schemas import StudentSchema, InstructorSchema
 from app.services import UserService, LDAPService
 from app.services.ldap_service import LDAPUserInfoSchema
-from app.core.dependencies import get_db, PermissionDependency, UserIsSuperuserPermission, RequireLoginPermission
+from app.core.dependencies import get_db, get_async_db, PermissionDependency, AsyncPermissionDependency, UserIsSuperuserPermission, RequireLoginPermission
 
 
 router = APIRouter()
@@ -15,8 +16,8 @@ router = APIRouter()
 async def get_own_user(
     *,
     request: Request,
-    db: Session = Depends(get_db),
-    perm: None = Depends(PermissionDependency(RequireLoginPermission))
+    db: AsyncSession = Depends(get_async_db),
+    perm: None = Depends(AsyncPermissionDependency(RequireLoginPermission))
 ):
     onyen = request.user.onyen
     user = await UserService(db).get_user_by_onyen(onyen)
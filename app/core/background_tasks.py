@@ -0,0 +1,33 @@
+import asyncio
+import contextvars
+from typing import Coroutine
+
+"""
+Work that outlives the request that started it, e.g. grading jobs. Tasks are owned by the app rather than by any
+request, so they don't hold up the request's ASGI call (or its middleware) while they run.
+Outstanding tasks are cancelled when the app shuts down.
+"""
+class BackgroundTaskRegistry:
+    def __init__(self):
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self, coro: Coroutine, name: str | None = None) -> asyncio.Task:
+        # Run in a fresh context, so the task doesn't inherit request-scoped state such as the request's event store.
+        task = asyncio.get_running_loop().create_task(coro, name=name, context=contextvars.Context())
+        # The loop only keeps weak references to tasks.
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        # Nothing awaits these tasks, so their failures would otherwise go unnoticed.
+        if not task.cancelled() and task.exception() is not None:
+            print(f"background task { task.get_name() } failed: { str(task.exception()) }")
+
+    async def cancel_all(self):
+        tasks = list(self._tasks)
+        for task in tasks: task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+background_tasks = BackgroundTaskRegistry()
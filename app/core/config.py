@@ -33,10 +33,24 @@ class Settings(BaseSettings):
     # Setup wizard (JSON-serialized string)
     SETUP_WIZARD_DATA: Optional[SetupWizardData] = None
 
+    # Outbound HTTP (connection pools are per upstream)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    # Requires the `h2` package.
+    HTTP2_ENABLED: bool = False
+
     # Gitea
     GITEA_SSH_URL: str
     GITEA_ASSIST_API_URL: str
     GITEA_ASSIST_AUTH_TOKEN: str
+    # Archives of repositories at a commit are cached here, since they never change (defaults to a temp directory).
+    GITEA_ARCHIVE_CACHE_DIR: Optional[str] = None
+    GITEA_ARCHIVE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024 # 1 GiB
+    # Number of archives fetched at once when bulk downloading submissions.
+    GITEA_DOWNLOAD_CONCURRENCY: int = 4
+    # Bursts of assignment changes within this window are collapsed into one update of the master repo's git hooks.
+    GIT_HOOK_UPDATE_DEBOUNCE_SECONDS: float = 2
 
     # Appstore
     STUDENT_APPSTORE_HOST: str
@@ -52,6 +66,37 @@ class Settings(BaseSettings):
     CANVAS_COURSE_ID: str
     CANVAS_COURSE_START_DATE: str
     CANVAS_COURSE_END_DATE: str
+    # How long the roster used to resolve PIDs to Canvas users is reused before being refetched.
+    CANVAS_USER_INDEX_TTL_SECONDS: int = 60 * 10 # 10 minutes
+    # Maximum number of pages of a paginated Canvas listing fetched at once.
+    CANVAS_PAGINATION_CONCURRENCY: int = 4
+    # Upper bound on concurrent Canvas requests. The actual concurrency adapts to Canvas' rate limit below this.
+    CANVAS_MAX_CONCURRENCY: int = 16
+    # How long to wait on a Canvas background job (e.g. a batch of grade updates) before giving up on it.
+    CANVAS_PROGRESS_TIMEOUT_SECONDS: int = 60 * 10 # 10 minutes
+
+    # Grading
+    # Running grading jobs record a heartbeat this often. A queued or running job whose heartbeat is older than
+    # the timeout is treated as interrupted (e.g. its server was restarted) and failed.
+    GRADING_JOB_HEARTBEAT_INTERVAL_SECONDS: float = 30
+    GRADING_JOB_HEARTBEAT_TIMEOUT_SECONDS: float = 60 * 5 # 5 minutes
+    # Number of worker processes used to run otter concurrently (defaults to one per core).
+    GRADING_MAX_WORKERS: Optional[int] = None
+    # Number of submission archives downloaded concurrently ahead of the graders.
+    GRADING_PREFETCH_CONCURRENCY: int = 4
+    # Number of worker processes shared by grading that happens outside of grading jobs,
+    # i.e. precomputing new submissions' grades and generating autograders with otter assign.
+    GRADING_BACKGROUND_MAX_WORKERS: int = 2
+    # Generated autograders are cached here, keyed by a hash of their inputs (defaults to a temp directory).
+    OTTER_ASSIGN_CACHE_DIR: Optional[str] = None
+    OTTER_ASSIGN_CACHE_MAX_BYTES: int = 512 * 1024 * 1024 # 512 MiB
+
+    # User provisioning
+    # Maximum concurrent calls to each upstream when creating users in bulk (e.g. syncing the roster).
+    GITEA_PROVISIONING_CONCURRENCY: int = 8
+    KUBERNETES_PROVISIONING_CONCURRENCY: int = 8
+    # Maximum users provisioned at once. Each holds its own database connection, so this should fit in the connection pool.
+    USER_PROVISIONING_CONCURRENCY: int = 8
 
     # Authentication
     JWT_SECRET_KEY: str
@@ -65,6 +110,8 @@ class Settings(BaseSettings):
     LDAP_SERVICE_ACCOUNT_BIND_DN: str
     LDAP_SERVICE_ACCOUNT_PASSWORD: str
     LDAP_TIMEOUT_SECONDS: int = 5
+    # How many PIDs are resolved by a single search.
+    LDAP_SEARCH_BATCH_SIZE: int = 100
 
     # Database
     POSTGRES_HOST: str
@@ -73,6 +120,8 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
+    # Used by request handlers that query through an AsyncSession.
+    ASYNC_SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
 
 
     @validator("IMPERSONATE_USER", pre=True)
@@ -103,6 +152,18 @@ class Settings(BaseSettings):
             password=values.get("POSTGRES_PASSWORD")
         )
 
+    @validator("ASYNC_SQLALCHEMY_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
+        if isinstance(v, str): return v
+        return PostgresDsn.build(
+            scheme="postgresql+asyncpg",
+            host=values.get("POSTGRES_HOST"),
+            port=values.get("POSTGRES_PORT"),
+            path="/" + values.get("POSTGRES_DB"),
+            user=values.get("POSTGRES_USER"),
+            password=values.get("POSTGRES_PASSWORD")
+        )
+
     @root_validator
     def validate_mutually_exclusive(cls, values: Dict[str, Any]) -> Any:
         dev_phase = values.get("DEV_PHASE")
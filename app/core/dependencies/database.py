@@ -1,7 +1,7 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import SessionLocal, AsyncSessionLocal
 
 def get_db() -> Generator:
     db = SessionLocal()
@@ -10,6 +10,10 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # DANGEROUS: You must call Session.close() when using this function or you will overflow the pool. 
 def get_db_persistent() -> Session:
     return SessionLocal()
\ No newline at end of file
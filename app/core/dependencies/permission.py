@@ -1,12 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import List, Type
 
-from fastapi import Request
+from fastapi import Request, Depends
 from fastapi.openapi.models import APIKey, APIKeyIn
 from fastapi.security.base import SecurityBase
 
 from app.core.config import settings
-from app.database import SessionLocal
+from .database import get_db, get_async_db
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import StudentModel, InstructorModel
 from app.core.role_permissions import UserPermission
 from app.core.exceptions import (
@@ -121,7 +123,13 @@ class PermissionDependency(SecurityBase):
         self.model: APIKey = APIKey(**{"in": APIKeyIn.header}, name="Authorization")
         self.scheme_name = self.__class__.__name__
 
-    async def __call__(self, request: Request):
+    """ Shares the request's database session with the endpoint (dependencies are resolved once per request),
+    so the user loaded here is already cached for the endpoint. Endpoints on `get_async_db` must use
+    `AsyncPermissionDependency` for the same, otherwise the request holds a session of each kind. """
+    async def __call__(self, request: Request, db: Session = Depends(get_db)):
+        await self.verify_permissions(request, db)
+
+    async def verify_permissions(self, request: Request, db: Session | AsyncSession):
         from app.services import UserService
         
         if settings.DISABLE_AUTHENTICATION and settings.IMPERSONATE_USER is not None:
@@ -131,12 +139,17 @@ class PermissionDependency(SecurityBase):
             # If authentication is disabled, we treat the anonymous user as if they have every permission.
             return
 
-        with SessionLocal() as session:
-            try:
-                user = await UserService(session).get_user_by_onyen(request.user.onyen)
-            except UserNotFoundException:
-                user = None
-            
-            for permission in self.permissions:
-                cls = permission(session, user)
-                await cls.verify_permission(request=request)
\ No newline at end of file
+        try:
+            user = await UserService(db).get_user_by_onyen(request.user.onyen)
+        except UserNotFoundException:
+            user = None
+        
+        for permission in self.permissions:
+            cls = permission(db, user)
+            await cls.verify_permission(request=request)
+
+""" The permission check for endpoints on the async session (`get_async_db`). It shares that session instead,
+so the request doesn't also hold a connection from the sync pool or block the event loop on the user's lookup. """
+class AsyncPermissionDependency(PermissionDependency):
+    async def __call__(self, request: Request, db: AsyncSession = Depends(get_async_db)):
+        await self.verify_permissions(request, db)
@@ -18,4 +18,19 @@ class StudentGradedMultipleTimesException(CustomException):
 class SubmissionMismatchException(CustomException):
     code = 400
     error_code = "GRADING__SUBMISSION_MISMATCH"
-    message = "submission is not associated with the assignment being graded"
\ No newline at end of file
+    message = "submission is not associated with the assignment being graded"
+
+class GradingJobNotFoundException(CustomException):
+    code = 404
+    error_code = "GRADING__JOB_NOT_FOUND"
+    message = "grading job not found"
+
+class GradingJobAlreadyActiveException(CustomException):
+    code = 409
+    error_code = "GRADING__JOB_ALREADY_ACTIVE"
+    message = "the assignment already has a grading job that is queued or running"
+
+class GradingJobNotCompletedException(CustomException):
+    code = 409
+    error_code = "GRADING__JOB_NOT_COMPLETED"
+    message = "grading job has not completed, so no grade report is available"
@@ -0,0 +1,104 @@
+import asyncio
+import httpx
+from enum import Enum
+from app.core.config import settings
+
+class Upstream(str, Enum):
+    GITEA = "gitea"
+    CANVAS = "canvas"
+    STUDENT_APPSTORE = "student_appstore"
+    INSTRUCTOR_APPSTORE = "instructor_appstore"
+
+"""
+Process-wide HTTP clients, one per upstream, so that services share keep-alive connections
+instead of opening (and leaking) a new connection pool every time they're constructed.
+Clients are opened on app startup and closed on shutdown. Outside of the app (e.g. scripts), they're created on first use.
+Either way, a client is also closed when the event loop it's used on shuts down (e.g. at the end of `asyncio.run`),
+since its connections can't be closed anymore once their loop is gone.
+"""
+class HTTPClientRegistry:
+    def __init__(self):
+        self._clients: dict[Upstream, httpx.AsyncClient] = {}
+        self._loops: dict[Upstream, asyncio.AbstractEventLoop | None] = {}
+        # Tasks that close each client when its loop shuts down. The loop only keeps weak references to them.
+        self._closers: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _get_upstream_config(upstream: Upstream) -> tuple[str, dict]:
+        if upstream == Upstream.GITEA:
+            return settings.GITEA_ASSIST_API_URL, { "Authorization": f"Bearer { settings.GITEA_ASSIST_AUTH_TOKEN }" }
+        elif upstream == Upstream.CANVAS:
+            base_url = settings.CANVAS_API_URL + ("/" if not settings.CANVAS_API_URL.endswith("/") else "")
+            return base_url, { "Authorization": f"Bearer { settings.CANVAS_API_KEY }" }
+        # Appstore requests are authenticated per user, so they pass their own Authorization header.
+        elif upstream == Upstream.STUDENT_APPSTORE:
+            return settings.STUDENT_APPSTORE_HOST, {}
+        elif upstream == Upstream.INSTRUCTOR_APPSTORE:
+            return settings.INSTRUCTOR_APPSTORE_HOST, {}
+
+    def _create_client(self, upstream: Upstream) -> httpx.AsyncClient:
+        base_url, headers = self._get_upstream_config(upstream)
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "User-Agent": f"eduhelx_grader_api",
+                **headers
+            },
+            timeout=httpx.Timeout(10),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            http2=settings.HTTP2_ENABLED
+        )
+
+    def get(self, upstream: Upstream) -> httpx.AsyncClient:
+        try: loop = asyncio.get_running_loop()
+        except RuntimeError: loop = None
+        client = self._clients.get(upstream)
+        client_loop = self._loops.get(upstream)
+        # Pooled connections belong to the event loop they were opened on, e.g. each `asyncio.run` in a script.
+        if client is None or client.is_closed or (loop is not None and client_loop not in (None, loop)):
+            if client is not None and not client.is_closed:
+                self._close_on_loop(client, client_loop)
+            client = self._clients[upstream] = self._create_client(upstream)
+            client_loop = self._loops[upstream] = None
+        if loop is not None and client_loop is None:
+            self._loops[upstream] = loop
+            closer = loop.create_task(self._close_on_shutdown(client))
+            self._closers.add(closer)
+            closer.add_done_callback(self._closers.discard)
+        return client
+
+    """ Runs until its loop shuts down, which cancels any remaining tasks (e.g. `asyncio.run`) while
+    the client's connections can still be closed. """
+    @staticmethod
+    async def _close_on_shutdown(client: httpx.AsyncClient):
+        try:
+            await asyncio.Future()
+        finally:
+            await client.aclose()
+
+    """ Closes a client that's being replaced. Usually it has already been closed along with its loop,
+    but if the loop is still running (i.e. on another thread), it's closed there. """
+    @staticmethod
+    def _close_on_loop(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop | None):
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def open(self):
+        for upstream in Upstream:
+            self.get(upstream)
+
+    async def close(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._loops.clear()
+        loop = asyncio.get_running_loop()
+        for closer in list(self._closers):
+            if closer.get_loop() is loop: closer.cancel()
+        for client in clients:
+            await client.aclose()
+
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Callable, Awaitable
+
+class Debouncer:
+    """
+    Collapses bursts of triggers into a single call of `func`, made once no trigger has arrived for `delay` seconds.
+    Calls are single-flight: a trigger that arrives while `func` is running schedules one more call after it finishes,
+    rather than running concurrently with it.
+    """
+    def __init__(self, func: Callable[[], Awaitable[None]], delay: float):
+        self.func = func
+        self.delay = delay
+        self._pending: asyncio.Task | None = None
+        self._running: asyncio.Task | None = None
+
+    def trigger(self) -> None:
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+        self._pending = asyncio.create_task(self._run_after_delay())
+
+    async def _run_after_delay(self) -> None:
+        await asyncio.sleep(self.delay)
+        if self._running is not None:
+            # Unlike awaiting the task, being cancelled while waiting doesn't cancel the running call.
+            await asyncio.wait({ self._running })
+        # From here on, triggers schedule another call instead of cancelling this one.
+        self._pending = None
+        self._running = asyncio.current_task()
+        try:
+            await self.func()
+        except Exception as e:
+            print(f"debounced call to { self.func.__name__ } failed: { str(e) }")
+        finally:
+            self._running = None
+
+    """ Waits until there are no scheduled or running calls left. """
+    async def join(self) -> None:
+        while (task := self._pending or self._running) is not None:
+            await asyncio.wait({ task })
@@ -0,0 +1,101 @@
+import os
+import time
+import tempfile
+from typing import BinaryIO, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+class DiskLRUCache:
+    """
+    A size-bounded cache of immutable blobs stored as files in a directory.
+    Writes go to a temporary file that is renamed into place, so the cache can be shared by
+    multiple worker processes without readers ever observing a partial entry.
+    Recency is tracked through file modification times, which are bumped on every hit.
+    Hit and miss counts are kept per process.
+    Temporary files count toward the size budget while they're being written, and are deleted once they're
+    older than `tmp_grace_seconds`, since by then their writer has crashed.
+    NOTE: Keys become file names, so they should be hex digests or similarly path-safe strings.
+    """
+    _TMP_PREFIX = ".tmp-"
+
+    def __init__(self, directory: Path | str, max_bytes: int, tmp_grace_seconds: float = 60 * 60):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.tmp_grace_seconds = tmp_grace_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key
+
+    def get(self, key: str) -> bytes | None:
+        path = self._entry_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(path)
+        return data
+
+    """ Like `get`, but returns an open file so that large entries can be read incrementally. """
+    def open(self, key: str) -> BinaryIO | None:
+        path = self._entry_path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(path)
+        return f
+
+    def set(self, key: str, data: bytes) -> None:
+        with self.writer(key) as f:
+            f.write(data)
+
+    """ Yields a file to write an entry into incrementally. The entry only becomes visible once the block exits cleanly. """
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=self._TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        tmp_bytes = 0
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Another worker evicted or renamed it in the meantime.
+                continue
+            if path.name.startswith(self._TMP_PREFIX):
+                if time.time() - stat.st_mtime > self.tmp_grace_seconds:
+                    path.unlink(missing_ok=True)
+                else:
+                    tmp_bytes += stat.st_size
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = tmp_bytes + sum([size for (_, size, _) in entries])
+        # Least recently used first
+        for (_, size, path) in sorted(entries, key=lambda entry: entry[0]):
+            if total_bytes <= self.max_bytes: break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,42 @@
+import time
+import zipfile
+from typing import AsyncIterator
+
+class _StreamBuffer:
+    """ A write-only, unseekable file that collects whatever is written until it is drained. """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+"""
+Produces a zip archive incrementally from (name, content) entries, yielding its bytes as they're written.
+Since the output is never seeked, entry sizes are written after each entry (data descriptors),
+so neither the entries nor the archive are ever held in full.
+"""
+async def stream_zip(
+    entries: AsyncIterator[tuple[str, AsyncIterator[bytes]]],
+    compression: int = zipfile.ZIP_STORED
+) -> AsyncIterator[bytes]:
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=compression) as archive:
+        async for name, content in entries:
+            entry = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            entry.compress_type = compression
+            with archive.open(entry, "w") as f:
+                async for chunk in content:
+                    f.write(chunk)
+                    if data := buffer.drain(): yield data
+            if data := buffer.drain(): yield data
+    # The central directory is written on close.
+    yield buffer.drain()
@@ -1,9 +1,42 @@
-from sqlalchemy import create_engine
+from typing import Hashable
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import ScalarResult
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
 from app.core.config import settings
 
 engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request handlers that only read can use an AsyncSession instead, so that waiting on the database doesn't block the event loop.
+# Objects aren't expired on commit since lazy loading them again isn't possible outside of an awaited query.
+async_engine = create_async_engine(settings.ASYNC_SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine)
+
+""" Executes a select against either kind of session, so that a query can be shared by sync and async callers.
+NOTE: Anything read from an AsyncSession must be eagerly loaded by the query, lazy loading raises. """
+async def scalars(session: Session | AsyncSession, statement: Select) -> ScalarResult:
+    if isinstance(session, AsyncSession):
+        return await session.scalars(statement)
+    return session.scalars(statement)
+
+""" Models that are looked up over and over within a request (e.g. the course and the current user) are cached
+on the request's session, so that every service sharing the session resolves them once.
+A cached model is dropped once it's no longer persistent, e.g. after it has been deleted. """
+def get_cached_model(session: Session | AsyncSession, key: Hashable):
+    if "cached_models" not in session.info: return None
+    model = session.info["cached_models"].get(key)
+    if model is None or not inspect(model).persistent: return None
+    return model
+
+def cache_model(session: Session | AsyncSession, key: Hashable, model) -> None:
+    if "cached_models" not in session.info: session.info["cached_models"] = {}
+    session.info["cached_models"][key] = model
+
+def uncache_model(session: Session | AsyncSession, key: Hashable) -> None:
+    if "cached_models" not in session.info: return
+    session.info["cached_models"].pop(key, None)
+
 Base = declarative_base()
\ No newline at end of file
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class GradingJobStatus(str, Enum):
+    QUEUED    = 'QUEUED'
+    RUNNING   = 'RUNNING'
+    COMPLETED = 'COMPLETED'
+    FAILED    = 'FAILED'
@@ -5,8 +5,10 @@ from sqlalchemy.orm import Session
 
 from .schemas import SyncEvents
 from app.database import SessionLocal
+from app.core.config import settings
+from app.core.utils.debounce import Debouncer
 from app.models import AssignmentModel
-from app.events import ModifyAssignmentCrudEvent
+from app.events import ModifyAssignmentCrudEvent, CreateSubmissionCrudEvent
 from app.core.dependencies import get_db_persistent
 
 """
@@ -15,24 +17,54 @@ You MUST call Session.close() once you are done with the database session.
 """
 
 
-@local_handler.register(event_name="crud:assignment:*")
-async def handle_sync_create_assignment(event: ModifyAssignmentCrudEvent):
-    from app.services import GiteaService, StudentService, CourseService
-    
-    event_name, payload = event
-    assignment = payload["assignment"]
+async def update_master_repo_prereceive_hook():
+    from app.services import GiteaService, CourseService
 
     with SessionLocal() as session:
         course_service = CourseService(session)
         gitea_service = GiteaService(session)
 
-        hook_content = await gitea_service.get_master_repo_prereceive_hook()    
+        hook_content = await gitea_service.get_master_repo_prereceive_hook()
         master_repository_name = await course_service.get_master_repository_name()
         instructor_organization_name = await course_service.get_instructor_gitea_organization_name()
 
-        await GiteaService(session).set_git_hook(
+        # Compare against Gitea rather than what this process last uploaded, since other workers upload the hook too.
+        try:
+            current_hook_content = await gitea_service.get_git_hook(
+                repository_name=master_repository_name,
+                owner=instructor_organization_name,
+                hook_id="pre-receive"
+            )
+        except Exception as e:
+            print(f"could not get the master repository's pre-receive hook, reuploading it: { str(e) }")
+            current_hook_content = None
+        if hook_content == current_hook_content: return
+
+        await gitea_service.set_git_hook(
             repository_name=master_repository_name,
             owner=instructor_organization_name,
             hook_id="pre-receive",
             hook_content=hook_content
-        )
\ No newline at end of file
+        )
+
+master_repo_prereceive_hook_updater = Debouncer(update_master_repo_prereceive_hook, settings.GIT_HOOK_UPDATE_DEBOUNCE_SECONDS)
+
+@local_handler.register(event_name="crud:assignment:*")
+async def handle_sync_create_assignment(event: ModifyAssignmentCrudEvent):
+    # Assignment changes tend to come in bursts (e.g. syncing every assignment from the LMS),
+    # which only need the hook to be rebuilt once.
+    master_repo_prereceive_hook_updater.trigger()
+
+@local_handler.register(event_name="crud:submission:create")
+async def handle_autograde_submission(event: CreateSubmissionCrudEvent):
+    from app.services import GradingService, SubmissionService
+    from app.services.grading_service import precompute_slots
+
+    event_name, payload = event
+    submission_id = payload["submission"].id
+
+    # Wait for a slot before opening the session, so queued submissions don't hold onto database connections.
+    async with precompute_slots:
+        with SessionLocal() as session:
+            submission = await SubmissionService(session).get_submission_by_id(submission_id)
+            await GradingService(session).precompute_submission_grade(submission)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from enum import Enum
 from pydantic import BaseModel
 from fastapi_events.registry.payload_schema import registry
-from app.models import CourseModel, AssignmentModel, SubmissionModel, UserModel, StudentModel, InstructorModel
+from app.models import CourseModel, AssignmentModel, SubmissionModel, UserModel, StudentModel, InstructorModel, GradingJobModel
 from app.models.user import UserType
 
 class CrudType(str, Enum):
@@ -26,6 +26,8 @@ class CrudEvents(Enum):
     MODIFY_SUBMISSION = "crud:submission:modify"
     DELETE_SUBMISSION = "crud:submission:delete"
 
+    CREATE_GRADING_JOB = "crud:grading_job:create"
+
 class CrudEvent(BaseModel):
     __event_name__: str
     modified_fields: list[str] | None = None
@@ -106,3 +108,10 @@ class ModifySubmissionCrudEvent(SubmissionCrudEvent):
 class DeleteSubmissionCrudEvent(SubmissionCrudEvent):
     __event_name__ = CrudEvents.DELETE_SUBMISSION.value
 
+
+class GradingJobCrudEvent(CrudEvent):
+    grading_job: GradingJobModel
+
+@registry.register
+class CreateGradingJobCrudEvent(GradingJobCrudEvent):
+    __event_name__ = CrudEvents.CREATE_GRADING_JOB.value
@@ -12,6 +12,10 @@ from app.core.config import settings, DevPhase
 from app.core.middleware import AuthenticationMiddleware, AuthBackend, LogMiddleware
 from eduhelx_utils.custom_logger import CustomizeLogger
 from app.core.exceptions import CustomException
+from app.core.http_clients import http_clients
+from app.core.background_tasks import background_tasks
+from app.database import async_engine
+from app.services.grading_service import background_grading_pool
 
 import logging
 from pathlib import Path
@@ -30,6 +34,27 @@ def init_listeners(app: FastAPI):
             content=content,
         )
     
+def init_http_clients(app: FastAPI):
+    @app.on_event("startup")
+    async def open_http_clients():
+        await http_clients.open()
+
+    @app.on_event("shutdown")
+    async def close_http_clients():
+        await http_clients.close()
+
+def init_database(app: FastAPI):
+    @app.on_event("shutdown")
+    async def dispose_async_engine():
+        await async_engine.dispose()
+
+def init_grading(app: FastAPI):
+    @app.on_event("shutdown")
+    async def shutdown_grading():
+        # Interrupted grading jobs are failed as they're cancelled, so the assignment can be graded again.
+        await background_tasks.cancel_all()
+        background_grading_pool.shutdown()
+    
 def init_monkeypatch():
     ### Monkey patch serializers for custom types
     from pydantic.json import ENCODERS_BY_TYPE
@@ -83,6 +108,9 @@ def create_app() -> FastAPI:
     init_monkeypatch()
     init_routers(app)
     init_listeners(app)
+    init_http_clients(app)
+    init_database(app)
+    init_grading(app)
     add_pagination(app)
     
     return app
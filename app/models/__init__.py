@@ -3,4 +3,7 @@ from .submission import SubmissionModel
 from .assignment import AssignmentModel
 from .extra_time import ExtraTimeModel
 from .course import CourseModel
-from .grade_report import GradeReportModel
\ No newline at end of file
+from .grade_report import GradeReportModel
+from .grading_job import GradingJobModel
+from .grade_result import GradeResultModel
+from .assignment_autograder import AssignmentAutograderModel
\ No newline at end of file
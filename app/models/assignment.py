@@ -25,6 +25,8 @@ class AssignmentModel(Base):
     last_modified_date = Column(DateTime(timezone=True), server_default=func.current_timestamp())
     is_published = Column(Boolean, server_default='f', nullable=False)
     manual_grading = Column(Boolean, server_default='f', nullable=False)
+    # Grade submissions against the assignment's autograder as soon as they're made.
+    autograde_on_submit = Column(Boolean, server_default='f', nullable=False)
     
     @hybrid_property
     def student_notebook_path(self) -> str:
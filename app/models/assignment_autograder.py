@@ -0,0 +1,20 @@
+from sqlalchemy import Column, ForeignKey, Integer, Text, DateTime, func
+from sqlalchemy.orm import relationship, backref
+from app.database import Base
+
+""" The autograder an assignment is currently graded with. Submissions to assignments that autograde on submit
+are graded against it as they come in, so that grading the assignment only has to assemble the stored results. """
+class AssignmentAutograderModel(Base):
+    __tablename__ = "assignment_autograder"
+
+    assignment_id = Column(Integer, ForeignKey("assignment.id", ondelete="CASCADE"), primary_key=True)
+    master_notebook_content = Column(Text, nullable=False)
+    otter_config_content = Column(Text, nullable=False)
+    requirements_txt_content = Column(Text, nullable=False)
+    last_modified_date = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp())
+
+    assignment = relationship(
+        "AssignmentModel",
+        foreign_keys="AssignmentAutograderModel.assignment_id",
+        backref=backref("autograder", uselist=False, cascade="all,delete")
+    )
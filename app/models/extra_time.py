@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Sequence, ForeignKey,
-    Integer, Interval,
+    Integer, Interval, Index
 )
 from sqlalchemy.schema import UniqueConstraint
 from sqlalchemy.orm import relationship, backref
@@ -24,5 +24,14 @@ class ExtraTimeModel(Base):
         backref=backref("extra_times", cascade="all,delete")
     )
 
-    # Ensures multiple extra_time rows can't exist with the same student_id AND assignment_id.
-    __table_args__ = (UniqueConstraint("student_id", "assignment_id"),)
\ No newline at end of file
+    __table_args__ = (
+        # Ensures multiple extra_time rows can't exist with the same student_id AND assignment_id.
+        # Its index also serves lookups by student.
+        UniqueConstraint("student_id", "assignment_id"),
+        # Lookups by assignment, e.g. the earliest deferral or latest extension of an assignment.
+        Index(
+            "ix_extra_time_assignment_student",
+            assignment_id, student_id,
+            postgresql_include=["deferred_time", "extra_time"]
+        ),
+    )
\ No newline at end of file
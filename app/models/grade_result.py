@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Sequence, Integer, String, Text, DateTime, JSON, func
+from sqlalchemy.schema import UniqueConstraint
+from app.database import Base
+
+""" Otter's results for a notebook at a commit, graded by a particular autograder.
+Since a commit pins the content of the notebook, the results never change and can be reused across grading runs. """
+class GradeResultModel(Base):
+    __tablename__ = "grade_result"
+
+    id = Column(Integer, Sequence("grade_result_id_seq"), primary_key=True, autoincrement=True, index=True)
+    commit_id = Column(String(255), nullable=False)
+    # Relative to the root of the repository
+    notebook_path = Column(Text, nullable=False)
+    # See GradingService.compute_autograder_hash
+    autograder_hash = Column(String(64), nullable=False)
+    grade_data = Column(JSON, nullable=False)
+    created_date = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp())
+
+    __table_args__ = (UniqueConstraint("commit_id", "notebook_path", "autograder_hash"),)
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Sequence, ForeignKey, Integer, Text, DateTime, Index, func
+from sqlalchemy.orm import relationship, backref
+from app.database import Base
+from app.enums.grading_job_status import GradingJobStatus
+
+class GradingJobModel(Base):
+    __tablename__ = "grading_job"
+
+    id = Column(Integer, Sequence("grading_job_id_seq"), primary_key=True, autoincrement=True, index=True)
+    status = Column(Text, server_default=GradingJobStatus.QUEUED.value, nullable=False)
+
+    master_notebook_content = Column(Text, nullable=False)
+    otter_config_content = Column(Text, nullable=False)
+
+    # Unknown until the job has computed which submissions it is grading.
+    total_submissions = Column(Integer, nullable=True)
+    graded_submissions = Column(Integer, server_default="0", nullable=False)
+    failed_submissions = Column(Integer, server_default="0", nullable=False)
+    error_message = Column(Text, nullable=True)
+
+    created_date = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp())
+    started_date = Column(DateTime(timezone=True), nullable=True)
+    finished_date = Column(DateTime(timezone=True), nullable=True)
+    # Kept fresh by whichever server is running the job, so that jobs left behind by a server that died can be told apart.
+    heartbeat_date = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp())
+
+    assignment_id = Column(Integer, ForeignKey("assignment.id"), nullable=False)
+    assignment = relationship(
+        "AssignmentModel",
+        foreign_keys="GradingJobModel.assignment_id",
+        backref=backref("grading_jobs", cascade="all,delete")
+    )
+    # Set once the job completes.
+    grade_report_id = Column(Integer, ForeignKey("grade_report.id", ondelete="SET NULL"), nullable=True)
+    grade_report = relationship("GradeReportModel", foreign_keys="GradingJobModel.grade_report_id")
+
+    __table_args__ = (
+        # An assignment can only have one active (queued or running) grading job at a time.
+        Index(
+            "ix_grading_job_active_assignment",
+            assignment_id,
+            unique=True,
+            postgresql_where=status.in_([GradingJobStatus.QUEUED.value, GradingJobStatus.RUNNING.value])
+        ),
+    )
\ No newline at end of file
@@ -1,7 +1,7 @@
 from sqlalchemy import (
     Column, Sequence, ForeignKey,
     Integer, String, DateTime,
-    Boolean, func
+    Boolean, Index, func
 )
 from sqlalchemy.orm import relationship, backref
 from app.database import Base
@@ -21,4 +21,17 @@ class SubmissionModel(Base):
         "AssignmentModel",
         foreign_keys="SubmissionModel.assignment_id",
         backref=backref("submissions", cascade="all,delete")
+    )
+
+    __table_args__ = (
+        # Submissions are looked up per student per assignment, newest first (e.g. the active submission),
+        # and per assignment grouped by student (e.g. every student's active submission).
+        # Includes the rest of the columns submissions are listed with, so those lookups can be answered from the index.
+        Index(
+            "ix_submission_assignment_student_time",
+            assignment_id, student_id, submission_time.desc(),
+            postgresql_include=["id", "commit_id", "graded"]
+        ),
+        # A student's submissions across every assignment, e.g. their attempts per assignment.
+        Index("ix_submission_student_assignment", student_id, assignment_id),
     )
\ No newline at end of file
@@ -6,4 +6,6 @@ from .course import *
 from .jwt import *
 from .commit import *
 from .settings import *
-from .grade_report import *
\ No newline at end of file
+from .grade_report import *
+from .grading_job import *
+from .assignment_autograder import *
\ No newline at end of file
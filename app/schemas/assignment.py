@@ -21,6 +21,7 @@ class AssignmentSchema(BaseModel):
     last_modified_date: datetime
     is_published: bool
     manual_grading: bool
+    autograde_on_submit: bool
 
     class Config:
         orm_mode = True
@@ -35,6 +36,7 @@ class UpdateAssignmentSchema(BaseModel):
     due_date: datetime | None
     is_published: bool = UNSET
     manual_grading: bool = UNSET
+    autograde_on_submit: bool = UNSET
 
 # Adds in fields relevant for JLP (tailored to the professor)
 class InstructorAssignmentSchema(AssignmentSchema):
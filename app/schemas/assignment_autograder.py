@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class AssignmentAutograderSchema(BaseModel):
+    assignment_id: int
+    requirements_txt_content: str
+    last_modified_date: datetime
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import datetime
+from app.enums.grading_job_status import GradingJobStatus
+
+class GradingJobSchema(BaseModel):
+    id: int
+    status: GradingJobStatus
+    total_submissions: int | None
+    graded_submissions: int
+    # Submissions that otter could not grade. These are left out of the grade report.
+    failed_submissions: int
+    error_message: str | None
+
+    created_date: datetime
+    started_date: datetime | None
+    finished_date: datetime | None
+
+    assignment_id: int
+    grade_report_id: int | None
+
+    class Config:
+        orm_mode = True
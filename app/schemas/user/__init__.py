@@ -1,5 +1,5 @@
 from .user import UserSchema
-from .student import StudentSchema
+from .student import StudentSchema, CreateStudentSchema, CreateStudentResultSchema
 from .instructor import InstructorSchema
 from .user_role import UserRoleSchema
 from .user_permission import UserPermissionSchema
\ No newline at end of file
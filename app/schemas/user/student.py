@@ -1,8 +1,19 @@
 from datetime import datetime
+from pydantic import BaseModel
 from .user import UserSchema
 
 class StudentSchema(UserSchema):
     fork_remote_url: str
     fork_cloned: bool
     join_date: datetime
-    exit_date: datetime | None
\ No newline at end of file
+    exit_date: datetime | None
+
+class CreateStudentSchema(BaseModel):
+    onyen: str
+    name: str
+    email: str
+
+class CreateStudentResultSchema(BaseModel):
+    onyen: str
+    success: bool
+    error: str | None = None
\ No newline at end of file
@@ -9,4 +9,5 @@ from .gitea_service import *
 from .appstore_service import *
 from .lms_sync_service import *
 from .cleanup_service import *
-from .grading_service import *
\ No newline at end of file
+from .grading_service import *
+from .grading_job_service import *
\ No newline at end of file
@@ -3,28 +3,23 @@ from app.services import UserService
 from app.models import UserModel
 from app.models.user import UserType
 from app.core.config import settings
+from app.core.http_clients import http_clients, Upstream
 from app.core.exceptions import AppstoreUserNotFoundException, AppstoreUserDoesNotMatchException, AppstoreUnsupportedUserTypeException, UserNotFoundException
 import httpx
 
 class AppstoreService:
-    def __init__(self, session: Session, appstore_identity_token: str, user_type: UserType):
+    def __init__(self, session: Session, appstore_identity_token: str, user_type: UserType, client: httpx.AsyncClient | None = None):
         self.session = session
         self.user_type = user_type
-        self.client = httpx.AsyncClient(
-            base_url=f"{ self.base_url }",
-            headers={
-                "User-Agent": f"eduhelx_grader_api",
-                "Authorization": f"Bearer { appstore_identity_token }"
-            },
-            timeout=httpx.Timeout(10)
-        )
+        self.appstore_identity_token = appstore_identity_token
+        self.client = client if client is not None else http_clients.get(self.upstream)
 
     @property
-    def base_url(self) -> str:
+    def upstream(self) -> Upstream:
         if self.user_type == UserType.STUDENT:
-            return settings.STUDENT_APPSTORE_HOST
+            return Upstream.STUDENT_APPSTORE
         elif self.user_type == UserType.INSTRUCTOR:
-            return settings.INSTRUCTOR_APPSTORE_HOST
+            return Upstream.INSTRUCTOR_APPSTORE
         raise AppstoreUnsupportedUserTypeException()
         
     async def _make_request(self, method: str, endpoint: str, headers={}, **kwargs):
@@ -32,6 +27,8 @@ class AppstoreService:
             method,
             endpoint,
             headers={
+                # The client is shared, so the user's identity goes on the request rather than the client.
+                "Authorization": f"Bearer { self.appstore_identity_token }",
                 **headers
             },
             **kwargs
@@ -2,13 +2,16 @@ import json
 from typing import List
 from pydantic import PositiveInt
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import scalars
 from app.core.exceptions.assignment import AssignmentCannotBeUnpublished
 from app.events import dispatch
 from app.models import AssignmentModel, InstructorModel, StudentModel, ExtraTimeModel
 from app.models.course import CourseModel
 from app.schemas import AssignmentSchema, InstructorAssignmentSchema, StudentAssignmentSchema, UpdateAssignmentSchema
+from app.schemas._unset import UNSET
 from app.events import CreateAssignmentCrudEvent, ModifyAssignmentCrudEvent, DeleteAssignmentCrudEvent
 from app.core.exceptions import (
     AssignmentNotFoundException,
@@ -22,7 +25,7 @@ from app.enums.assignment_status import AssignmentStatus
 from app.services.submission_service import SubmissionService
 
 class AssignmentService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session | AsyncSession):
         self.session = session
         
     async def create_assignment(
@@ -150,9 +153,7 @@ class AssignmentService:
         dispatch(DeleteAssignmentCrudEvent(assignment=assignment))
 
     async def get_assignment_by_id(self, id: int) -> AssignmentModel:
-        assignment = self.session.query(AssignmentModel) \
-            .filter_by(id=id) \
-            .first()
+        assignment = (await scalars(self.session, select(AssignmentModel).filter_by(id=id))).first()
         if assignment is None:
             raise AssignmentNotFoundException()
         return assignment
@@ -210,6 +211,9 @@ class AssignmentService:
         if "manual_grading" in update_fields:
             assignment.manual_grading = update_fields["manual_grading"]
 
+        if "autograde_on_submit" in update_fields:
+            assignment.autograde_on_submit = update_fields["autograde_on_submit"]
+
         if assignment.available_date is not None and assignment.due_date is not None and assignment.available_date >= assignment.due_date:
             raise AssignmentDueBeforeOpenException()
 
@@ -219,6 +223,47 @@ class AssignmentService:
 
         return assignment
     
+    """ Computes the schema of every assignment for an instructor against a single snapshot of the clock. """
+    async def get_instructor_assignment_schemas(
+        self,
+        instructor: InstructorModel,
+        assignments: List[AssignmentModel],
+        course: CourseModel
+    ) -> List[InstructorAssignmentSchema]:
+        current_timestamp = self.session.scalar(func.current_timestamp())
+        return [
+            await InstructorAssignmentService(
+                self.session, instructor, assignment, course,
+                current_timestamp=current_timestamp
+            ).get_instructor_assignment_schema()
+            for assignment in assignments
+        ]
+
+    """ Computes the schema of every assignment for a student in a fixed number of queries:
+    the student's extra time and submission counts are loaded for every assignment at once,
+    and every status is computed against a single snapshot of the clock. """
+    async def get_student_assignment_schemas(
+        self,
+        student: StudentModel,
+        assignments: List[AssignmentModel],
+        course: CourseModel
+    ) -> List[StudentAssignmentSchema]:
+        current_timestamp = self.session.scalar(func.current_timestamp())
+        extra_time_models = {
+            extra_time_model.assignment_id : extra_time_model
+            for extra_time_model in self.session.query(ExtraTimeModel).filter(ExtraTimeModel.student_id == student.id)
+        }
+        submission_counts = await SubmissionService(self.session).get_submission_counts(student)
+        return [
+            await StudentAssignmentService(
+                self.session, student, assignment, course,
+                extra_time_model=extra_time_models.get(assignment.id),
+                current_timestamp=current_timestamp,
+                current_attempts=submission_counts.get(assignment.id, 0)
+            ).get_student_assignment_schema()
+            for assignment in assignments
+        ]
+
     # Get the earliest time at which the given assignment is available
     async def get_earliest_available_date(self, assignment: AssignmentModel) -> datetime | None:
         if assignment.available_date is None: return None
@@ -288,11 +333,25 @@ __pycache__/
         ]
 
 class InstructorAssignmentService(AssignmentService):
-    def __init__(self, session: Session, instructor_model: InstructorModel, assignment_model: AssignmentModel, course_model: CourseModel):
+    def __init__(
+        self,
+        session: Session,
+        instructor_model: InstructorModel,
+        assignment_model: AssignmentModel,
+        course_model: CourseModel,
+        *,
+        # May be given when computing many assignments at once, so they share one snapshot of the clock.
+        current_timestamp: datetime | None = None
+    ):
         super().__init__(session)
         self.instructor_model = instructor_model
         self.assignment_model = assignment_model
         self.course_model = course_model 
+        self.current_timestamp = current_timestamp
+
+    def _get_current_timestamp(self) -> datetime:
+        if self.current_timestamp is not None: return self.current_timestamp
+        return self.session.scalar(func.current_timestamp())
 
     # The release date for a specific student, considering extra_time
     def get_adjusted_available_date(self) -> datetime | None:
@@ -311,7 +370,7 @@ class InstructorAssignmentService(AssignmentService):
     def get_assignment_status(self) -> AssignmentStatus:
         if not self.assignment_model.is_published: return AssignmentStatus.UNPUBLISHED
 
-        current_timestamp = self.session.scalar(func.current_timestamp())
+        current_timestamp = self._get_current_timestamp()
         adjusted_available_date = self.get_adjusted_available_date()
         adjusted_due_date = self.get_adjusted_due_date()
 
@@ -340,12 +399,30 @@ class InstructorAssignmentService(AssignmentService):
         return InstructorAssignmentSchema(**assignment)
     
 class StudentAssignmentService(AssignmentService):
-    def __init__(self, session: Session, student_model: StudentModel, assignment_model: AssignmentModel, course_model: CourseModel):
+    def __init__(
+        self,
+        session: Session,
+        student_model: StudentModel,
+        assignment_model: AssignmentModel,
+        course_model: CourseModel,
+        *,
+        # The following may be prefetched when computing many assignments at once (see `get_student_assignment_schemas`).
+        # Note that None is a valid extra time model, i.e. the student has no extra time.
+        extra_time_model: ExtraTimeModel | None = UNSET,
+        current_timestamp: datetime | None = None,
+        current_attempts: int | None = None
+    ):
         super().__init__(session)
         self.student_model = student_model
         self.assignment_model = assignment_model
         self.course_model = course_model
-        self.extra_time_model = self._get_extra_time_model()
+        self.extra_time_model = extra_time_model if extra_time_model is not UNSET else self._get_extra_time_model()
+        self.current_timestamp = current_timestamp
+        self.current_attempts = current_attempts
+
+    def _get_current_timestamp(self) -> datetime:
+        if self.current_timestamp is not None: return self.current_timestamp
+        return self.session.scalar(func.current_timestamp())
 
     def _get_extra_time_model(self) -> ExtraTimeModel | None:
         extra_time_model = self.session.query(ExtraTimeModel) \
@@ -384,20 +461,20 @@ class StudentAssignmentService(AssignmentService):
     def _get_is_available(self) -> bool:
         adjusted_available_date = self.get_adjusted_available_date()
         if adjusted_available_date is None: return True
-        current_timestamp = self.session.scalar(func.current_timestamp())
+        current_timestamp = self._get_current_timestamp()
         return current_timestamp >= adjusted_available_date
     
     def _get_is_closed(self) -> bool:
         adjusted_due_date = self.get_adjusted_due_date()
         if adjusted_due_date is None: 
             return not self._get_is_available()
-        current_timestamp = self.session.scalar(func.current_timestamp())
+        current_timestamp = self._get_current_timestamp()
         return current_timestamp > adjusted_due_date
     
     def get_assignment_status(self) -> AssignmentStatus:
         if not self.assignment_model.is_published: return AssignmentStatus.UNPUBLISHED
 
-        current_timestamp = self.session.scalar(func.current_timestamp())
+        current_timestamp = self._get_current_timestamp()
         adjusted_available_date = self.get_adjusted_available_date()
         adjusted_due_date = self.get_adjusted_due_date()
 
@@ -433,10 +510,8 @@ class StudentAssignmentService(AssignmentService):
 
         assignment["protected_files"] = await self.get_protected_files(self.assignment_model)
         assignment["overwritable_files"] = await self.get_overwritable_files(self.assignment_model)
-        assignment["current_attempts"] = await SubmissionService(self.session).get_current_submission_attempt(
-            self.student_model,
-            self.assignment_model
-        )
+        assignment["current_attempts"] = self.current_attempts if self.current_attempts is not None else \
+            await SubmissionService(self.session).get_current_submission_attempt(self.student_model, self.assignment_model)
         assignment["status"] = assignment_status.value
         assignment["adjusted_available_date"] = self.get_adjusted_available_date()
         assignment["adjusted_due_date"] = self.get_adjusted_due_date()
@@ -1,7 +1,10 @@
-import requests
+import time
+import asyncio
 import httpx
 import os.path
-from typing import BinaryIO
+from typing import BinaryIO, AsyncIterator
+from collections import deque
+from contextlib import asynccontextmanager
 from pathlib import Path
 from enum import Enum
 from urllib.parse import urlparse
@@ -9,6 +12,7 @@ from pydantic import BaseModel, PositiveInt
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.http_clients import http_clients, Upstream
 from app.enums.canvas.canvas_workflow_state_filter import CanvasWorkflowStateFilter
 from app.models import UserModel, OnyenPIDModel
 from app.services import UserService, UserType
@@ -29,21 +33,132 @@ class UpdateCanvasAssignmentBody(BaseModel):
     max_attempts: PositiveInt | None
     is_published: bool | None
 
+class CanvasGradeBody(BaseModel):
+    user_id: int
+    # between [0,1]
+    grade_proportion: float
+    comments: str | None = None
+
+""" Canvas users by PID, so that resolving a PID doesn't require fetching the roster every time.
+Rosters are kept per user type and expire after a TTL, since enrollments change outside of our control. """
+class CanvasUserIndex:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._users: dict[UserType, dict[str, dict]] = {}
+        self._refreshed_at: dict[UserType, float] = {}
+
+    def is_fresh(self, user_type: UserType) -> bool:
+        refreshed_at = self._refreshed_at.get(user_type)
+        return refreshed_at is not None and time.monotonic() - refreshed_at < self.ttl
+
+    def get(self, user_type: UserType, pid: str) -> dict | None:
+        if not self.is_fresh(user_type): return None
+        return self._users[user_type].get(pid)
+
+    def update(self, user_type: UserType, users: list[dict]):
+        self._users[user_type] = { user["sis_user_id"] : user for user in users if user.get("sis_user_id") is not None }
+        self._refreshed_at[user_type] = time.monotonic()
+
+    def clear(self):
+        self._users.clear()
+        self._refreshed_at.clear()
+
+canvas_user_index = CanvasUserIndex(settings.CANVAS_USER_INDEX_TTL_SECONDS)
+
+"""
+Paces Canvas requests against Canvas' rate limit, which is a per-token bucket of request cost.
+Concurrency is adjusted additive-increase/multiplicative-decrease: it grows while the bucket stays healthy,
+and is halved when the remaining budget runs low or Canvas throttles us, in which case requests also back off.
+"""
+class CanvasRequestScheduler:
+    # Budget below which we consider the bucket to be running dry (Canvas' bucket holds 700).
+    low_watermark = 100
+    max_retries = 5
+    max_backoff = 30
+
+    def __init__(self, max_limit: int, initial_limit: int = 4):
+        self.max_limit = max_limit
+        self.limit = float(min(initial_limit, max_limit))
+        self.in_flight = 0
+        self.rate_limit_remaining: float | None = None
+        self.last_request_cost: float | None = None
+        self.throttled_count = 0
+        self._consecutive_throttles = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @asynccontextmanager
+    async def slot(self):
+        while self.in_flight >= max(1, int(self.limit)):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters: self._waiters.remove(waiter)
+        self.in_flight += 1
+        try:
+            delay = self._paused_until - time.monotonic()
+            if delay > 0: await asyncio.sleep(delay)
+            yield
+        finally:
+            self.in_flight -= 1
+            self._wake()
+
+    def _wake(self):
+        for waiter in list(self._waiters)[:max(0, int(self.limit) - self.in_flight)]:
+            if not waiter.done(): waiter.set_result(None)
+
+    def _decrease(self):
+        # Requests already in flight report the same congestion, only back off once per round trip.
+        now = time.monotonic()
+        if now - self._last_decrease < 1: return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit / 2)
+
+    @staticmethod
+    def is_throttled(res: httpx.Response) -> bool:
+        return res.status_code == 403 and "Rate Limit Exceeded" in res.text
+
+    """ Returns how long to wait before retrying the throttled request. """
+    def on_throttled(self) -> float:
+        self.throttled_count += 1
+        self._consecutive_throttles += 1
+        self._decrease()
+        backoff = min(self.max_backoff, 2 ** (self._consecutive_throttles - 1))
+        self._paused_until = max(self._paused_until, time.monotonic() + backoff)
+        return backoff
+
+    def on_response(self, res: httpx.Response):
+        remaining, cost = res.headers.get("X-Rate-Limit-Remaining"), res.headers.get("X-Request-Cost")
+        if cost is not None: self.last_request_cost = float(cost)
+        if remaining is None: return
+
+        self.rate_limit_remaining = float(remaining)
+        self._consecutive_throttles = 0
+        if self.rate_limit_remaining < self.low_watermark:
+            self._decrease()
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._wake()
+
+    def get_metrics(self) -> dict:
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "rate_limit_remaining": self.rate_limit_remaining,
+            "last_request_cost": self.last_request_cost,
+            "throttled_count": self.throttled_count
+        }
+
+canvas_request_scheduler = CanvasRequestScheduler(settings.CANVAS_MAX_CONCURRENCY)
+
 class CanvasService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, client: httpx.AsyncClient | None = None):
         self.db = db
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"Bearer {settings.CANVAS_API_KEY}"
-        })
-        self.client = httpx.AsyncClient(
-            base_url=f"{ self.api_url }",
-            headers={
-                "User-Agent": f"eduhelx_grader_api",
-                "Authorization": f"Bearer { settings.CANVAS_API_KEY }"
-            },
-            timeout=httpx.Timeout(10)
-        )
+        self.client = client if client is not None else http_clients.get(Upstream.CANVAS)
 
     @property
     def api_url(self) -> str:
@@ -57,26 +172,69 @@ class CanvasService:
                 raise LMSBackendException(e.response.text, e.response) from e
             raise LMSBackendException(str(e)) from e
     
-    async def _make_request(self, method: str, endpoint: str, headers={}, **kwargs):
-        res = await self.client.request(
-            method,
-            endpoint,
-            headers={
-                **headers
-            },
-            **kwargs
-        )
+    async def _request(self, method: str, endpoint: str, headers={}, **kwargs) -> httpx.Response:
+        for attempt in range(canvas_request_scheduler.max_retries + 1):
+            async with canvas_request_scheduler.slot():
+                res = await self.client.request(
+                    method,
+                    endpoint,
+                    headers={
+                        **headers
+                    },
+                    **kwargs
+                )
+            if not canvas_request_scheduler.is_throttled(res): break
+            backoff = canvas_request_scheduler.on_throttled()
+            print(f"Canvas throttled { method } { endpoint }, backing off for { backoff }s")
+        canvas_request_scheduler.on_response(res)
         await self._check_response(res)
+        return res
+
+    async def get_request_metrics(self) -> dict:
+        return canvas_request_scheduler.get_metrics()
+
+    async def _make_request(self, method: str, endpoint: str, headers={}, **kwargs):
+        res = await self._request(method, endpoint, headers, **kwargs)
         return res.json()
     
     async def _get(self, endpoint: str, **kwargs):
-        if 'params' not in kwargs:
-            kwargs['params'] = {}
-        
+        return await self._make_request("GET", endpoint, **kwargs)
+
+    """
+    Yields every item of a paginated listing, following Canvas' Link headers.
+    When the last page is known up front (numbered pages), the remaining pages are fetched concurrently.
+    Otherwise (e.g. bookmarked pages), pages are followed one at a time through the next link.
+    """
+    async def _iter_paginated(self, endpoint: str, **kwargs) -> AsyncIterator[dict]:
+        params = kwargs.pop("params", {})
         # Set or override the 'per_page' parameter to 100
-        kwargs['params']['per_page'] = 100
+        res = await self._request("GET", endpoint, params={ **params, "per_page": 100 }, **kwargs)
+        for item in res.json(): yield item
 
-        return await self._make_request("GET", endpoint, **kwargs)
+        last_url = res.links.get("last", {}).get("url")
+        last_page = httpx.URL(last_url).params.get("page") if last_url is not None else None
+        if last_page is not None and last_page.isdigit():
+            semaphore = asyncio.Semaphore(settings.CANVAS_PAGINATION_CONCURRENCY)
+            async def get_page(page: int):
+                async with semaphore:
+                    return await self._make_request("GET", str(httpx.URL(last_url).copy_set_param("page", page)), **kwargs)
+
+            pages = [asyncio.create_task(get_page(page)) for page in range(2, int(last_page) + 1)]
+            try:
+                # Yield in order, though later pages may already be done.
+                for page in pages:
+                    for item in await page: yield item
+            finally:
+                for page in pages: page.cancel()
+        else:
+            next_url = res.links.get("next", {}).get("url")
+            while next_url is not None:
+                res = await self._request("GET", next_url, **kwargs)
+                for item in res.json(): yield item
+                next_url = res.links.get("next", {}).get("url")
+
+    async def _get_paginated(self, endpoint: str, **kwargs) -> list[dict]:
+        return [item async for item in self._iter_paginated(endpoint, **kwargs)]
 
     async def _post(self, endpoint: str, **kwargs):
         return await self._make_request("POST", endpoint, **kwargs)
@@ -91,14 +249,14 @@ class CanvasService:
         return await self._make_request("DELETE", endpoint, **kwargs)
 
     async def get_courses(self):
-        return await self._get("courses")
+        return await self._get_paginated("courses")
 
     async def get_course(self):
         return await self._get(f"courses/{ settings.CANVAS_COURSE_ID }")
     
     # returns a dictionary of assignments for a course
     async def get_assignments(self):
-        return await self._get(f"courses/{ settings.CANVAS_COURSE_ID }/assignments")
+        return await self._get_paginated(f"courses/{ settings.CANVAS_COURSE_ID }/assignments")
 
     async def get_assignment(self, assignment_id):
         return await self._get(f"courses/{ settings.CANVAS_COURSE_ID }/assignments/{ assignment_id }")
@@ -132,7 +290,7 @@ class CanvasService:
         }
         if workflow_state_filter is not None:
             params["workflow_state"] = workflow_state_filter.value
-        return await self._get(f"courses/{ settings.CANVAS_COURSE_ID }/students/submissions", params=params)
+        return await self._get_paginated(f"courses/{ settings.CANVAS_COURSE_ID }/students/submissions", params=params)
 
     """ NOTE: If student_id is provided, returns a single Submission object. """
     """ NOTE: Otherwise, returns a Submission for every enrolled student, even if they have not submitted (submitted_at = None). """
@@ -161,19 +319,36 @@ class CanvasService:
         return await self.get_user_by_pid(pid, UserType.INSTRUCTOR)
     
     async def get_user_by_pid(self, pid: str, user_type: UserType):
+        refreshed = False
+        if not canvas_user_index.is_fresh(user_type):
+            await self.refresh_user_index(user_type)
+            refreshed = True
+        user = canvas_user_index.get(user_type, pid)
+        if user is None and not refreshed:
+            # The user may have enrolled since the roster was indexed.
+            await self.refresh_user_index(user_type)
+            user = canvas_user_index.get(user_type, pid)
+        if user is None:
+            raise LMSUserNotFoundException()
+        return user
+
+    """ Fetches the roster of the given user type and reindexes it, returning the fetched users. """
+    async def refresh_user_index(self, user_type: UserType) -> list[dict]:
         users = await self.get_users(user_type)
-        for user in users:
-            if user["sis_user_id"] == pid: return user
-        raise LMSUserNotFoundException()
+        canvas_user_index.update(user_type, users)
+        return users
 
     async def get_users(self, user_type: UserType):
+        return [user async for user in self.iter_users(user_type)]
+
+    def iter_users(self, user_type: UserType) -> AsyncIterator[dict]:
         if user_type == UserType.STUDENT:
             enrollment_type = "student"
         elif user_type == UserType.INSTRUCTOR:
             enrollment_type = "teacher"
         else:
             raise ValueError("You can only get student and instructor users from this endpoint")
-        return await self._get(f"courses/{ settings.CANVAS_COURSE_ID }/users", params={
+        return self._iter_paginated(f"courses/{ settings.CANVAS_COURSE_ID }/users", params={
             "enrollment_type": enrollment_type
         })
     
@@ -289,8 +464,8 @@ class CanvasService:
     ):
         folder_path = Path(folder_path)
         url = f"courses/{ settings.CANVAS_COURSE_ID }/folders"
-        folders = await self._get(url)
-        for folder in folders:
+        folders = self._iter_paginated(url)
+        async for folder in folders:
             # Canvas files are always under a hidden top-level directory.
             # E.g., course files are under the "course files" directory, but you don't see that in the UI.
             # We're have to remove that from the path before comparing.
@@ -400,6 +575,42 @@ class CanvasService:
 
         await self._put(url, json=payload)
 
+    """
+    Posts many users' grades for an assignment through the bulk update_grades endpoint.
+    Canvas applies bulk updates in the background, so this waits on each batch's Progress until it finishes.
+    """
+    async def upload_assignment_grades(
+        self,
+        assignment_id: int,
+        grades: list[CanvasGradeBody],
+        batch_size: int = 100,
+        poll_interval: float = 1,
+        timeout: float | None = None
+    ):
+        url = f"courses/{ settings.CANVAS_COURSE_ID }/assignments/{ assignment_id }/submissions/update_grades"
+
+        progresses = []
+        for i in range(0, len(grades), batch_size):
+            grade_data = {}
+            for grade in grades[i : i + batch_size]:
+                grade_data[str(grade.user_id)] = { "posted_grade": f"{ grade.grade_proportion * 100 }%" }
+                if grade.comments is not None: grade_data[str(grade.user_id)]["text_comment"] = grade.comments
+            progresses.append(await self._post(url, json={ "grade_data": grade_data }))
+
+        await asyncio.gather(*[self.wait_for_progress(progress, poll_interval, timeout) for progress in progresses])
+
+    async def wait_for_progress(self, progress, poll_interval: float = 1, timeout: float | None = None):
+        if timeout is None: timeout = settings.CANVAS_PROGRESS_TIMEOUT_SECONDS
+        deadline = time.monotonic() + timeout
+        while progress["workflow_state"] in ("queued", "running"):
+            if time.monotonic() >= deadline:
+                raise LMSBackendException(f"Canvas job { progress['id'] } did not finish within { timeout } seconds, it is still { progress['workflow_state'] }")
+            await asyncio.sleep(poll_interval)
+            progress = await self._get(f"progress/{ progress['id'] }")
+        if progress["workflow_state"] != "completed":
+            raise LMSBackendException(f"Canvas job { progress['id'] } { progress['workflow_state'] }: { progress.get('message') }")
+        return progress
+
     async def update_assignment(self, assignment_id: int, body: UpdateCanvasAssignmentBody):
         url = f"courses/{ settings.CANVAS_COURSE_ID }/assignments/{ assignment_id }"
         payload = body.dict(exclude_unset=True)
@@ -427,6 +638,20 @@ class CanvasService:
         if pid_onyen is None:
             raise LMSUserNotFoundException(f'LMS user with onyen "{ onyen }" does not exist')
         return pid_onyen.pid
+
+    async def get_pids_from_onyens(self, onyens: list[str]) -> dict[str, str]:
+        pid_onyens = self.db.query(OnyenPIDModel).filter(OnyenPIDModel.onyen.in_(onyens)).all()
+        pids = { pid_onyen.onyen : pid_onyen.pid for pid_onyen in pid_onyens }
+        for onyen in onyens:
+            if onyen not in pids:
+                raise LMSUserNotFoundException(f'LMS user with onyen "{ onyen }" does not exist')
+        return pids
+    
+    """ Every user alongside the PID they're associated with, or None if they aren't, in a single query. """
+    async def get_users_with_pids(self) -> list[tuple[UserModel, str | None]]:
+        return self.db.query(UserModel, OnyenPIDModel.pid) \
+            .outerjoin(OnyenPIDModel, OnyenPIDModel.onyen == UserModel.onyen) \
+            .all()
     
     """ NOTE: Although you can modify an existing mapping directly via this method,
     I would recommend for clarity first calling unassociate_pid_from_user when modifying a mapping.
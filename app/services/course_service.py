@@ -2,6 +2,7 @@ from app.core.config import settings
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 from app.events import dispatch
+from app.database import get_cached_model, cache_model
 from app.models import CourseModel
 from app.schemas import CourseWithInstructorsSchema, CourseSchema, UpdateCourseSchema
 from app.events import CreateCourseCrudEvent, ModifyCourseCrudEvent
@@ -12,12 +13,17 @@ class CourseService:
         self.session = session
     
     async def get_course(self) -> CourseModel:
+        # Nearly every service needs the course, so it's only queried once per session.
+        course = get_cached_model(self.session, CourseModel)
+        if course is not None: return course
         try:
-            return self.session.query(CourseModel).one()
+            course = self.session.query(CourseModel).one()
         except MultipleResultsFound as e:
             raise MultipleCoursesExistException()
         except NoResultFound as e:
             raise NoCourseExistsException()
+        cache_model(self.session, CourseModel, course)
+        return course
     
     async def get_course_schema(self) -> CourseSchema:
         course = await self.get_course()
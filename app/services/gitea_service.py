@@ -1,18 +1,29 @@
-from typing import List, Optional
+import re
+import hashlib
+import tempfile
+from typing import List, Optional, AsyncIterator
+from pathlib import Path
 from enum import Enum
 from io import BytesIO
-from math import ceil
-from datetime import datetime
-from dateutil import tz
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.services import AssignmentService
 from app.schemas import CommitSchema
 from app.core.utils.header import parse_content_disposition_header
+from app.core.http_clients import http_clients, Upstream
+from app.core.utils.disk_cache import DiskLRUCache
 import httpx
 import base64
 
+repository_archive_cache = DiskLRUCache(
+    settings.GITEA_ARCHIVE_CACHE_DIR or Path(tempfile.gettempdir()) / "eduhelx-grader" / "archives",
+    settings.GITEA_ARCHIVE_CACHE_MAX_BYTES
+)
+
+# Full SHA-1 or SHA-256 object names. Anything else (branches, tags, abbreviated SHAs) can move.
+COMMIT_SHA_PATTERN = re.compile(r"^([0-9a-f]{40}|[0-9a-f]{64})$")
+
 class FileOperationType(str, Enum):
     CREATE = "create"
     UPDATE = "update"
@@ -33,16 +44,9 @@ class CollaboratorPermission(str, Enum):
     ADMIN = "admin"
 
 class GiteaService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, client: httpx.AsyncClient | None = None):
         self.session = session
-        self.client = httpx.AsyncClient(
-            base_url=f"{ self.api_url }",
-            headers={
-                "User-Agent": f"eduhelx_grader_api",
-                "Authorization": f"Bearer { settings.GITEA_ASSIST_AUTH_TOKEN }"
-            },
-            timeout=httpx.Timeout(10)
-        )
+        self.client = client if client is not None else http_clients.get(Upstream.GITEA)
 
     @property
     def api_url(self) -> str:
@@ -203,7 +207,8 @@ class GiteaService:
         new_remote_url = res.text
         return new_remote_url
     
-    """ Returns a zipped archive of the branch/commit as a byte stream """
+    """ Returns a zipped archive of the branch/commit as a byte stream.
+    Archives of a full commit SHA are immutable, so they're served from the local archive cache when possible. """
     async def download_repository(
         self,
         name: str,
@@ -211,6 +216,15 @@ class GiteaService:
         treeish_id: str,
         path: str | None = None
     ) -> BytesIO:
+        cache_key = self._compute_archive_cache_key(name, owner, treeish_id, path)
+        if cache_key is not None:
+            cached = repository_archive_cache.get(cache_key)
+            if cached is not None:
+                file_name, content = cached.split(b"\n", 1)
+                file_stream = BytesIO(content)
+                file_stream.name = file_name.decode()
+                return file_stream
+
         res = await self._get("/repos/download", params={
             "name": name,
             "owner": owner,
@@ -219,9 +233,75 @@ class GiteaService:
         })
         content_disposition = res.headers.get("Content-Disposition")
         file_name = parse_content_disposition_header(content_disposition)[1].get("filename")
+        if cache_key is not None and file_name is not None:
+            # The file name is stored as a header line in front of the archive.
+            repository_archive_cache.set(cache_key, file_name.encode() + b"\n" + res.content)
         file_stream = BytesIO(res.content)
         file_stream.name = file_name
         return file_stream
+
+    """
+    Like `download_repository`, but streams the archive rather than buffering it in memory.
+    Returns the archive's file name along with an iterator over its content, which must be consumed or closed.
+    Archives of a full commit SHA are written through to the local archive cache as they stream.
+    """
+    async def stream_repository(
+        self,
+        name: str,
+        owner: str,
+        treeish_id: str,
+        path: str | None = None,
+        chunk_size: int = 64 * 1024
+    ) -> tuple[str | None, AsyncIterator[bytes]]:
+        cache_key = self._compute_archive_cache_key(name, owner, treeish_id, path)
+        cached = repository_archive_cache.open(cache_key) if cache_key is not None else None
+        if cached is not None:
+            file_name = cached.readline()[:-1].decode()
+            async def iter_cached_archive():
+                with cached:
+                    while chunk := cached.read(chunk_size): yield chunk
+            return file_name, iter_cached_archive()
+
+        request = self.client.build_request("GET", "/repos/download", params={
+            "name": name,
+            "owner": owner,
+            "treeish_id": treeish_id,
+            "path": path
+        })
+        res = await self.client.send(request, stream=True)
+        try:
+            # Raise before any of the body is sent, while the error can still become a proper response.
+            res.raise_for_status()
+        except:
+            await res.aclose()
+            raise
+        content_disposition = res.headers.get("Content-Disposition")
+        file_name = parse_content_disposition_header(content_disposition)[1].get("filename")
+
+        async def iter_archive():
+            try:
+                if cache_key is None or file_name is None:
+                    async for chunk in res.aiter_bytes(chunk_size): yield chunk
+                    return
+                # If the stream is cut off, the partially written entry is discarded.
+                with repository_archive_cache.writer(cache_key) as f:
+                    f.write(file_name.encode() + b"\n")
+                    async for chunk in res.aiter_bytes(chunk_size):
+                        f.write(chunk)
+                        yield chunk
+            finally:
+                await res.aclose()
+        return file_name, iter_archive()
+
+    @staticmethod
+    def _compute_archive_cache_key(name: str, owner: str, treeish_id: str, path: str | None) -> str | None:
+        if not COMMIT_SHA_PATTERN.match(treeish_id): return None
+        digest = hashlib.sha256()
+        for part in (owner, name, treeish_id, path or ""):
+            part = part.encode()
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
     
     async def get_commits(
         self,
@@ -284,6 +364,24 @@ class GiteaService:
             "username": username
         })
 
+    """ Returns the content of the repository's hook, or None if it isn't set. """
+    async def get_git_hook(
+        self,
+        repository_name: str,
+        owner: str,
+        hook_id: str
+    ) -> str | None:
+        try:
+            res = await self._get("/repos/hooks", params={
+                "name": repository_name,
+                "owner": owner,
+                "hook_id": hook_id
+            })
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404: return None
+            raise e
+        return res.json().get("content") or None
+
     async def set_git_hook(
         self,
         repository_name: str,
@@ -314,21 +412,105 @@ class GiteaService:
         assignment_service = AssignmentService(self.session)
         
         assignments = await assignment_service.get_assignments()
-        protected_file_paths = []
+        protected_files = {
+            assignment.directory_path: await assignment_service.get_protected_files(assignment)
+            for assignment in assignments
+        }
+        return self._render_reject_protected_files_hook(protected_files)
+
+    """
+    This hook enforces our merge control policy on assignments.
+    It is only used within the class master repository.
+    """
+    async def get_merge_control_hook(self) -> str:
+        assignment_service = AssignmentService(self.session)
+
+        assignments = await assignment_service.get_assignments()
+        
+        overwritable_files = {
+            assignment.directory_path: await assignment_service.get_overwritable_files(assignment)
+            for assignment in assignments
+        }
+
+        open_timestamps = {}
         for assignment in assignments:
-            protected_file_paths += [
-                f"{ assignment.directory_path }/{ file }"
-                for file in await assignment_service.get_protected_files(assignment)
-            ]
+            if assignment.available_date is not None and assignment.due_date is not None:
+                # Until HLXK-265, merge control policy is ALWAYS active, i.e. the assignment has been open since the epoch.
+                # The hook compares against the time of each push, so nothing here depends on when the hook is rendered.
+                # earliest_datetime = await assignment_service.get_earliest_available_date(assignment)
+                # open_timestamps[assignment.directory_path] = ceil(earliest_datetime.timestamp())
+                open_timestamps[assignment.directory_path] = 0
 
-        init_protected_file_paths = "\n".join([
-            f'protected_file_paths+=("{ path }")' for path in protected_file_paths
-        ])
+        return self._render_merge_control_hook(overwritable_files, open_timestamps)
+
+    """ Quotes a string for bash so that it's taken literally, including inside of `case` patterns. """
+    @staticmethod
+    def _quote_bash_literal(value: str) -> str:
+        return "'" + value.replace("'", "'\\''") + "'"
+
+    """
+    Converts a glob into a bash `case` pattern, where only the glob's wildcards (*, ? and [...]) are left unquoted.
+    Like `[[ $file == $glob ]]`, `*` also matches across directories.
+    """
+    @classmethod
+    def _compile_case_pattern(cls, glob: str) -> str:
+        compiled, literal = [], ""
+        i = 0
+        while i < len(glob):
+            char = glob[i]
+            wildcard = None
+            if char in "*?":
+                wildcard = char
+            elif char == "[":
+                end = glob.find("]", i + 2)
+                # Bracket expressions are kept as is, unless they contain anything that would need quoting.
+                if end != -1 and not any(c in glob[i + 1 : end] for c in "'\"\\ \t\n$`"):
+                    wildcard = glob[i : end + 1]
+            if wildcard is None:
+                literal += char
+                i += 1
+                continue
+            if literal: compiled.append(cls._quote_bash_literal(literal))
+            literal = ""
+            compiled.append(wildcard)
+            i += len(wildcard)
+        if literal: compiled.append(cls._quote_bash_literal(literal))
+        return "".join(compiled) or "''"
+
+    """
+    Compiles globs, grouped by assignment directory, into a bash function that returns 0 if its argument matches any of them.
+    Files are first dispatched on their assignment directory, so each file is only tested against its own assignment's globs.
+    """
+    @classmethod
+    def _compile_glob_matcher(cls, function_name: str, globs: dict[str, list[str]]) -> str:
+        branches = []
+        for directory_path, directory_globs in globs.items():
+            if len(directory_globs) == 0: continue
+            directory_prefix = cls._quote_bash_literal(f"{ directory_path }/")
+            patterns = "|".join([directory_prefix + cls._compile_case_pattern(glob) for glob in directory_globs])
+            # ;;& keeps testing later directories too, since assignment directories can be nested.
+            branches.append(f"""        { directory_prefix }*)
+            case "$1" in
+                { patterns }) return 0 ;;
+            esac
+            ;;&""")
+        branches = "\n".join(branches)
+        return f"""function { function_name }() {{
+    case "$1" in
+{ branches }
+    esac
+    return 1
+}}"""
+
+    @classmethod
+    def _render_reject_protected_files_hook(cls, protected_files: dict[str, list[str]]) -> str:
+        is_protected = cls._compile_glob_matcher("is_protected", protected_files)
         return f"""#!/bin/bash
 z40=0000000000000000000000000000000000000000
 declare -a violations
-declare -a protected_file_paths
-{ init_protected_file_paths }
+
+{ is_protected }
+
 while read oldrev newrev refname; do
     if [ $oldrev == $z40 ]; then
         # Commit being pushed is for a new branch, use empty tree SHA
@@ -337,11 +519,9 @@ while read oldrev newrev refname; do
     # Iterate over files that have been modified between the old and new revisions
     created_files=$(git diff --name-only --diff-filter=A $oldrev $newrev)
     while IFS= read -r file; do
-        for protected_file in "${{protected_file_paths[@]}}"; do
-            if [[ $file == $protected_file ]]; then
-                violations+=("$file")
-            fi
-        done
+        if is_protected "$file"; then
+            violations+=("$file")
+        fi
     done <<< "$created_files"
 done
 
@@ -354,53 +534,28 @@ if [ ${{#violations[@]}} -gt 0 ]; then
 fi
 """
 
-    """
-    This hook enforces our merge control policy on assignments.
-    It is only used within the class master repository.
-    """
-    async def get_merge_control_hook(self) -> str:
-        assignment_service = AssignmentService(self.session)
-
-        assignments = await assignment_service.get_assignments()
-        
-        init_overwritable_patterns = []
-        for assignment in assignments:
-            overwritable_patterns = await assignment_service.get_overwritable_files(assignment)
-            for pattern in overwritable_patterns:
-                declaration = f'overwritable_patterns+=("{ assignment.directory_path }/{ pattern }")'
-                init_overwritable_patterns.append(declaration)
-        init_overwritable_patterns = "\n".join(init_overwritable_patterns)
-
-        init_assignments_assoc = []
-        for assignment in assignments:
-            if assignment.available_date is not None and assignment.due_date is not None:
-                # Until HLXK-265, merge control policy is ALWAYS active.
-                earliest_datetime = datetime.now(tz.UTC)
-                # earliest_datetime = await assignment_service.get_earliest_available_date(assignment)
-                declaration = f'assignments["{ assignment.directory_path }"]'
-                value=ceil(earliest_datetime.timestamp())
-                init_assignments_assoc.append(f"{ declaration }={ value }")
-        init_assignments_assoc = "\n".join(init_assignments_assoc)
-        
+    @classmethod
+    def _render_merge_control_hook(cls, overwritable_files: dict[str, list[str]], open_timestamps: dict[str, int]) -> str:
+        is_overwritable = cls._compile_glob_matcher("is_overwritable", overwritable_files)
+        # Matches files under any assignment that has already opened (by plain prefix, like the directory itself).
+        opened_branches = "\n".join([
+            f"""        { cls._quote_bash_literal(directory_path) }*)
+            if [ "${{current_timestamp}}" -gt { timestamp } ]; then return 0; fi
+            ;;&"""
+            for directory_path, timestamp in open_timestamps.items()
+        ])
         return f"""#!/bin/bash
 z40=0000000000000000000000000000000000000000
 # Epoch time
 current_timestamp=$(date -u +%s)
 declare -a violations
-declare -a overwritable_patterns
-declare -A assignments
-{ init_overwritable_patterns }
-{ init_assignments_assoc }
 
-function is_overwritable() {{
-    local file="$1"
-
-    for glob in "${{overwritable_patterns[@]}}"; do
-        if [[ "$file" == $glob ]]; then
-            return 0
-        fi
-    done
+{ is_overwritable }
 
+function is_in_opened_assignment() {{
+    case "$1" in
+{ opened_branches }
+    esac
     return 1
 }}
 
@@ -412,16 +567,10 @@ while read oldrev newrev refname; do
     # Iterate over files that have been modified between the old and new revisions
     modified_files=$(git diff --name-only --diff-filter=MD $oldrev $newrev)
     while IFS= read -r file; do
-        for directory_path in "${{!assignments[@]}}"; do
-            if [[ "${{file}}" == "${{directory_path}}"* ]]; then
-                # Assignment has already opened to some students, so can't modify this file, unless overwritable.
-                if [ "${{current_timestamp}}" -gt "${{assignments[$directory_path]}}" ]; then
-                    if ! is_overwritable "$file"; then
-                        violations+=("$file")
-                    fi
-                fi
-            fi
-        done
+        # Assignment has already opened to some students, so can't modify this file, unless overwritable.
+        if is_in_opened_assignment "$file" && ! is_overwritable "$file"; then
+            violations+=("$file")
+        fi
     done <<< "$modified_files"
 done
 
@@ -437,7 +586,8 @@ fi
     """ Utility for combining multiple scripts for a single hook type into a
     single, unified script (gitea only allows 1 script per hook type).
     """
-    def _create_combined_hook_script(self, scripts: dict[str, str]) -> str:
+    @staticmethod
+    def _create_combined_hook_script(scripts: dict[str, str]) -> str:
         template = "$(cat <<'EOF'\n{}\nEOF\n)"
         init_hook_scripts = "\n".join([
             f'hook_scripts["{ name }"]={ template.format(hook) }'
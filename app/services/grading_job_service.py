@@ -0,0 +1,164 @@
+import asyncio
+from typing import List
+from datetime import timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.events import dispatch
+from app.models import AssignmentModel, GradingJobModel, GradeReportModel
+from app.events import CreateGradingJobCrudEvent
+from app.enums.grading_job_status import GradingJobStatus
+from app.core.exceptions import (
+    GradingJobNotFoundException, GradingJobAlreadyActiveException, GradingJobNotCompletedException,
+    AutogradingDisabledException
+)
+from app.core.config import settings
+from app.core.background_tasks import background_tasks
+from app.core.utils.datetime import get_now_with_tzinfo
+
+""" Runs a grading job in the background of the server, on a session of its own. """
+async def _run_grading_job_in_background(grading_job_id: int) -> None:
+    with SessionLocal() as session:
+        grading_job_service = GradingJobService(session)
+        grading_job = await grading_job_service.get_grading_job_by_id(grading_job_id)
+        await grading_job_service.run_grading_job(grading_job)
+
+class GradingJobService:
+    def __init__(self, session: Session):
+        self.session = session
+
+    """ Persists a grading job for the assignment and starts running it in the background of the server. """
+    async def create_grading_job(
+        self,
+        assignment: AssignmentModel,
+        master_notebook_content: str,
+        otter_config_content: str
+    ) -> GradingJobModel:
+        if assignment.manual_grading:
+            raise AutogradingDisabledException()
+
+        # A job left behind by a server that died would otherwise block the assignment until the next restart.
+        await self.fail_interrupted_grading_jobs(assignment)
+
+        active_job = self.session.query(GradingJobModel) \
+            .filter_by(assignment_id=assignment.id) \
+            .filter(GradingJobModel.status.in_([GradingJobStatus.QUEUED.value, GradingJobStatus.RUNNING.value])) \
+            .first()
+        if active_job is not None:
+            raise GradingJobAlreadyActiveException()
+
+        grading_job = GradingJobModel(
+            assignment_id=assignment.id,
+            master_notebook_content=master_notebook_content,
+            otter_config_content=otter_config_content,
+            status=GradingJobStatus.QUEUED.value
+        )
+        self.session.add(grading_job)
+        try:
+            self.session.commit()
+        except IntegrityError:
+            # Another job was created for the assignment since we checked.
+            self.session.rollback()
+            raise GradingJobAlreadyActiveException()
+        # Event handlers only ever see a detached copy of the job, so load it fully now.
+        self.session.refresh(grading_job)
+
+        dispatch(CreateGradingJobCrudEvent(grading_job=grading_job))
+        background_tasks.start(_run_grading_job_in_background(grading_job.id), name=f"grading-job-{ grading_job.id }")
+
+        return grading_job
+
+    """ Jobs run in the background of whichever server created them, which keeps their heartbeat fresh.
+    Any job still queued or running with a stale heartbeat was interrupted (e.g. its server was restarted)
+    and will never finish. Fails them, optionally only the assignment's, so that it can be graded again.
+    Jobs that other servers are still running are left alone. """
+    async def fail_interrupted_grading_jobs(self, assignment: AssignmentModel | None = None) -> int:
+        interrupted_jobs = self.session.query(GradingJobModel) \
+            .filter(GradingJobModel.status.in_([GradingJobStatus.QUEUED.value, GradingJobStatus.RUNNING.value])) \
+            .filter(GradingJobModel.heartbeat_date < func.current_timestamp() - timedelta(seconds=settings.GRADING_JOB_HEARTBEAT_TIMEOUT_SECONDS))
+        if assignment is not None:
+            interrupted_jobs = interrupted_jobs.filter(GradingJobModel.assignment_id == assignment.id)
+        interrupted_count = interrupted_jobs.update({
+            GradingJobModel.status: GradingJobStatus.FAILED.value,
+            GradingJobModel.error_message: "the grading job was interrupted, its server stopped running it",
+            GradingJobModel.finished_date: get_now_with_tzinfo()
+        }, synchronize_session=False)
+        self.session.commit()
+        return interrupted_count
+
+    """ Keeps the job's heartbeat fresh until cancelled. Uses sessions of its own, since the job's is busy grading. """
+    @staticmethod
+    async def _beat_heartbeat(grading_job_id: int) -> None:
+        while True:
+            await asyncio.sleep(settings.GRADING_JOB_HEARTBEAT_INTERVAL_SECONDS)
+            try:
+                with SessionLocal() as session:
+                    session.query(GradingJobModel) \
+                        .filter_by(id=grading_job_id) \
+                        .update({ GradingJobModel.heartbeat_date: func.current_timestamp() }, synchronize_session=False)
+                    session.commit()
+            except Exception as e:
+                print(f"could not record heartbeat of grading job { grading_job_id }: { str(e) }")
+
+    async def get_grading_job_by_id(self, id: int) -> GradingJobModel:
+        grading_job = self.session.query(GradingJobModel) \
+            .filter_by(id=id) \
+            .first()
+        if grading_job is None:
+            raise GradingJobNotFoundException()
+        return grading_job
+
+    async def get_grading_jobs(self, assignment: AssignmentModel) -> List[GradingJobModel]:
+        return self.session.query(GradingJobModel) \
+            .filter_by(assignment_id=assignment.id) \
+            .order_by(GradingJobModel.created_date.desc()) \
+            .all()
+
+    async def get_grade_report(self, grading_job: GradingJobModel) -> GradeReportModel:
+        if grading_job.status != GradingJobStatus.COMPLETED.value or grading_job.grade_report is None:
+            raise GradingJobNotCompletedException()
+        return grading_job.grade_report
+
+    async def run_grading_job(self, grading_job: GradingJobModel) -> None:
+        from app.services import GradingService
+
+        grading_job.status = GradingJobStatus.RUNNING.value
+        grading_job.started_date = get_now_with_tzinfo()
+        grading_job.heartbeat_date = func.current_timestamp()
+        self.session.commit()
+        heartbeat = asyncio.create_task(self._beat_heartbeat(grading_job.id))
+
+        async def on_progress(total: int, graded: int, failed: int):
+            grading_job.total_submissions = total
+            grading_job.graded_submissions = graded
+            grading_job.failed_submissions = failed
+            self.session.commit()
+
+        try:
+            grade_report = await GradingService(self.session).grade_assignment(
+                grading_job.assignment,
+                grading_job.master_notebook_content,
+                grading_job.otter_config_content,
+                progress_callback=on_progress
+            )
+            grading_job.grade_report_id = grade_report.id
+            grading_job.status = GradingJobStatus.COMPLETED.value
+        except asyncio.CancelledError:
+            # The server is shutting down.
+            self.session.rollback()
+            grading_job.status = GradingJobStatus.FAILED.value
+            grading_job.error_message = "the grading job was interrupted, its server stopped running it"
+            grading_job.finished_date = get_now_with_tzinfo()
+            self.session.commit()
+            raise
+        except Exception as e:
+            self.session.rollback()
+            print(f"grading job { grading_job.id } failed: { str(e) }")
+            grading_job.status = GradingJobStatus.FAILED.value
+            grading_job.error_message = getattr(e, "message", None) or str(e)
+        finally:
+            heartbeat.cancel()
+
+        grading_job.finished_date = get_now_with_tzinfo()
+        self.session.commit()
@@ -1,9 +1,15 @@
+import os
+import asyncio
+import hashlib
 import tempfile
 import zipfile
 import glob
 import json
-from typing import BinaryIO, Optional
+import otter
+from typing import BinaryIO, Optional, Callable, Awaitable
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from otter.assign import main as otter_assign
 from otter.run import main as otter_run
 from otter.export import export_notebook
@@ -13,16 +19,116 @@ from zoneinfo import ZoneInfo
 from io import BytesIO
 from pathlib import Path
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
 from app.core.config import settings, DevPhase
 from app.core.exceptions import (
     SubmissionNotFoundException, OtterConfigViolationException, AutogradingDisabledException,
     StudentGradedMultipleTimesException, SubmissionMismatchException
 )
 from app.core.utils.datetime import get_now_with_tzinfo
+from app.core.utils.disk_cache import DiskLRUCache
 from app.services import StudentService, SubmissionService, CourseService, GiteaService
-from app.models import AssignmentModel, SubmissionModel, GradeReportModel
+from app.models import AssignmentModel, SubmissionModel, GradeReportModel, GradeResultModel, AssignmentAutograderModel
 from app.schemas import GradeReportSchema, SubmissionGradeSchema, IdentifiableSubmissionGradeSchema
 
+otter_assign_cache = DiskLRUCache(
+    settings.OTTER_ASSIGN_CACHE_DIR or Path(tempfile.gettempdir()) / "eduhelx-grader" / "otter-assign",
+    settings.OTTER_ASSIGN_CACHE_MAX_BYTES
+)
+
+""" Runs otter against a single submission. This executes inside of a grading worker process,
+so it needs to be a module-level function (picklable) and can't touch the database session. """
+def _run_otter_grader(
+    submission_notebook_path: str,
+    otter_config_path: str,
+    output_path: str,
+    debug: bool
+) -> dict:
+    otter_run(
+        submission=submission_notebook_path,
+        autograder=otter_config_path,
+        output_dir=output_path,
+        no_logo=True,
+        debug=debug
+    )
+    with open(output_path, "r") as f:
+        return json.load(f)
+
+""" Runs otter assign, returning the final graded notebook and autograder zip. Otter changes the working directory
+while it runs, which would affect the whole server, so this also executes inside of a grading worker process. """
+def _run_otter_assign(
+    master_notebook_content: str,
+    otter_config_content: str,
+    requirements_txt_content: str
+) -> tuple[str, bytes]:
+    # The master notebook isn't actually the final revision used for grading
+    # We also need to generate a zip config.
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        master_notebook_path = temp_dir / "master.ipynb"
+        requirements_txt_path = temp_dir / "requirements.txt"
+        config_dir = temp_dir / "otter"
+        autograder_path = config_dir / "autograder"
+
+        with open(master_notebook_path, "w+") as f:
+            f.write(master_notebook_content)
+
+        with open(requirements_txt_path, "w+") as f:
+            f.write(requirements_txt_content)
+
+        otter_assign(master_notebook_path, str(config_dir), no_pdfs=True)
+        
+        zip_config_glob = glob.glob(str(autograder_path / f"{ master_notebook_path.stem }*.zip"))
+        if len(zip_config_glob) == 0:
+            raise OtterConfigViolationException("could not generate/find otterconfig zip for assignment")
+        
+        autograder_notebook_path = autograder_path / master_notebook_path.name
+        zip_config_path = zip_config_glob[0]
+
+        with open(autograder_notebook_path, "r") as f:
+            final_graded_notebook_content = f.read()
+
+        config_zip = BytesIO()
+        # Overwrite the otter_config.json generated inside the zip with the user-supplied config. 
+        with zipfile.ZipFile(zip_config_path, "r") as old_zip:
+            with zipfile.ZipFile(config_zip, "w") as new_zip:
+                for item in old_zip.infolist():
+                    if item.filename != "otter_config.json":
+                        new_zip.writestr(item, old_zip.read(item.filename))
+                new_zip.writestr("otter_config.json", otter_config_content)
+
+
+    return final_graded_notebook_content, config_zip.getvalue()
+
+""" A pool of grading worker processes. If a worker dies (e.g. it's killed for running out of memory),
+the whole executor is broken, so it's replaced the next time something is submitted. """
+class GradingWorkerPool:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def run(self, fn: Callable, *args):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            if self._executor is executor:
+                self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Shared by everything that grades outside of a grading job, so that grading doesn't fork new workers per submission.
+background_grading_pool = GradingWorkerPool(settings.GRADING_BACKGROUND_MAX_WORKERS)
+# Caps how many submissions are precomputed at once, the rest wait their turn.
+precompute_slots = asyncio.Semaphore(settings.GRADING_BACKGROUND_MAX_WORKERS)
+
 class GradingService:
     def __init__(self, session: Session):
         self.session = session
@@ -31,20 +137,7 @@ class GradingService:
     async def compute_submissions_at_moment(self, assignment: AssignmentModel, moment: datetime | None = None) -> list[SubmissionModel]:
         if moment is None: moment = get_now_with_tzinfo()
 
-        student_service = StudentService(self.session)
-        submission_service = SubmissionService(self.session)
-
-        students = await student_service.list_students()
-        submissions = []
-        for student in students:
-            try:
-                active_submission = await submission_service.get_active_submission(student, assignment, moment)
-                submissions.append(active_submission)
-            except SubmissionNotFoundException:
-                # The student hasn't made a submission
-                pass
-            
-        return submissions
+        return await SubmissionService(self.session).get_active_submissions(assignment, moment)
 
     async def get_student_notebook_upload(self, submission: SubmissionModel, student_notebook_content: bytes) -> BinaryIO:
         attempt = await SubmissionService(self.session).get_current_submission_attempt(submission.student, submission.assignment)
@@ -66,50 +159,61 @@ class GradingService:
             student_notebook.name = f"{ submission.student.onyen }-submission-{ attempt }.ipynb"
         return student_notebook
     
+    """ Identifies an autograder by everything that goes into generating it. """
+    @staticmethod
+    def compute_autograder_hash(
+        master_notebook_content: str,
+        otter_config_content: str,
+        requirements_txt_content: str
+    ) -> str:
+        digest = hashlib.sha256()
+        for part in (otter.__version__, master_notebook_content, otter_config_content, requirements_txt_content):
+            part = part.encode()
+            # Length-prefix each part so that content can't shift between them and collide.
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    """ Returns the final graded notebook and autograder zip, reusing cached otter assign output where possible. """
     async def generate_config(
         self,
         master_notebook_content: str,
         otter_config_content: str,
         requirements_txt_content: str
     ) -> tuple[str, bytes]:
-        # The master notebook isn't actually the final revision used for grading
-        # We also need to generate a zip config.
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir = Path(temp_dir)
-            master_notebook_path = temp_dir / "master.ipynb"
-            requirements_txt_path = temp_dir / "requirements.txt"
-            config_dir = temp_dir / "otter"
-            autograder_path = config_dir / "autograder"
-
-            with open(master_notebook_path, "w+") as f:
-                f.write(master_notebook_content)
-
-            with open(requirements_txt_path, "w+") as f:
-                f.write(requirements_txt_content)
+        autograder_hash = self.compute_autograder_hash(master_notebook_content, otter_config_content, requirements_txt_content)
 
-            otter_assign(master_notebook_path, str(config_dir), no_pdfs=True)
-            
-            zip_config_glob = glob.glob(str(autograder_path / f"{ master_notebook_path.stem }*.zip"))
-            if len(zip_config_glob) == 0:
-                raise OtterConfigViolationException("could not generate/find otterconfig zip for assignment")
-            
-            autograder_notebook_path = autograder_path / master_notebook_path.name
-            zip_config_path = zip_config_glob[0]
+        cached_config = otter_assign_cache.get(autograder_hash)
+        if cached_config is not None:
+            with zipfile.ZipFile(BytesIO(cached_config), "r") as cached_zip:
+                return cached_zip.read("graded.ipynb").decode(), cached_zip.read("autograder.zip")
 
-            with open(autograder_notebook_path, "r") as f:
-                final_graded_notebook_content = f.read()
+        final_graded_notebook_content, zip_config_bytes = await self._run_otter_assign(
+            master_notebook_content,
+            otter_config_content,
+            requirements_txt_content
+        )
 
-            config_zip = BytesIO()
-            # Overwrite the otter_config.json generated inside the zip with the user-supplied config. 
-            with zipfile.ZipFile(zip_config_path, "r") as old_zip:
-                with zipfile.ZipFile(config_zip, "w") as new_zip:
-                    for item in old_zip.infolist():
-                        if item.filename != "otter_config.json":
-                            new_zip.writestr(item, old_zip.read(item.filename))
-                    new_zip.writestr("otter_config.json", otter_config_content)
+        cached_config = BytesIO()
+        with zipfile.ZipFile(cached_config, "w", compression=zipfile.ZIP_STORED) as cached_zip:
+            cached_zip.writestr("graded.ipynb", final_graded_notebook_content)
+            cached_zip.writestr("autograder.zip", zip_config_bytes)
+        otter_assign_cache.set(autograder_hash, cached_config.getvalue())
 
+        return final_graded_notebook_content, zip_config_bytes
 
-        return final_graded_notebook_content, config_zip.getvalue()
+    async def _run_otter_assign(
+        self,
+        master_notebook_content: str,
+        otter_config_content: str,
+        requirements_txt_content: str
+    ) -> tuple[str, bytes]:
+        return await background_grading_pool.run(
+            _run_otter_assign,
+            master_notebook_content,
+            otter_config_content,
+            requirements_txt_content
+        )
     
     """ Returns path to the loaded submission notebook """
     async def load_submission_archive(
@@ -136,6 +240,229 @@ class GradingService:
 
         return (submission_notebook_path, submission_notebook_content)
 
+    """
+    Grades submissions in a pool of worker processes, returning otter's results by submission.
+    Archives are downloaded by a bounded set of fetchers ahead of the graders and handed over through a queue,
+    so network latency is hidden behind grading. Submissions that fail to download or grade are logged and omitted,
+    they don't fail the rest of the batch.
+    """
+    async def grade_submissions(
+        self,
+        submissions: list[SubmissionModel],
+        otter_config_path: Path | str,
+        output_dir: Path | str,
+        # Called as (graded, failed) each time a submission finishes grading.
+        progress_callback: Callable[[int, int], Awaitable[None]] | None = None,
+        # Grade in an existing pool rather than one of the batch's own, which is shut down afterwards.
+        pool: GradingWorkerPool | None = None
+    ) -> dict[SubmissionModel, dict]:
+        output_dir = Path(output_dir)
+        owns_pool = pool is None
+        if owns_pool:
+            pool = GradingWorkerPool(settings.GRADING_MAX_WORKERS or os.cpu_count() or 1)
+        num_graders = min(pool.max_workers, len(submissions)) or 1
+        num_fetchers = min(settings.GRADING_PREFETCH_CONCURRENCY, len(submissions)) or 1
+
+        pending_submissions = iter(submissions)
+        # Bounded so that fetchers only stay a little ahead of the graders, rather than extracting the whole class.
+        loaded_submissions = asyncio.Queue(maxsize=num_graders * 2)
+        grade_data = {}
+        failed = 0
+
+        # Progress is only informational, a failure to report it shouldn't take a grader (or the batch) down with it.
+        async def report_progress():
+            if progress_callback is None: return
+            try:
+                await progress_callback(len(grade_data), failed)
+            except Exception as e:
+                print(f"could not report grading progress: { str(e) }")
+
+        async def on_failure(submission: SubmissionModel, e: Exception):
+            nonlocal failed
+            print(f"could not grade submission for { submission.student.onyen }: { str(e) }")
+            failed += 1
+            await report_progress()
+
+        async def fetch():
+            for submission in pending_submissions:
+                try:
+                    (submission_notebook_path, _) = await self.load_submission_archive(submission, output_dir)
+                except Exception as e:
+                    await on_failure(submission, e)
+                    continue
+                await loaded_submissions.put((submission, submission_notebook_path))
+
+        async def grade():
+            while True:
+                item = await loaded_submissions.get()
+                if item is None: return
+                submission, submission_notebook_path = item
+                try:
+                    grade_data[submission] = await pool.run(
+                        _run_otter_grader,
+                        str(submission_notebook_path),
+                        str(otter_config_path),
+                        str(output_dir / f"{ submission.id }-graded.json"),
+                        settings.DEV_PHASE == DevPhase.DEV
+                    )
+                except Exception as e:
+                    await on_failure(submission, e)
+                    continue
+                await report_progress()
+
+        async def fetch_all():
+            await asyncio.gather(*[fetch() for _ in range(num_fetchers)])
+            # Let each grader know there's nothing left once it drains the queue.
+            for _ in range(num_graders):
+                await loaded_submissions.put(None)
+
+        fetching = asyncio.create_task(fetch_all())
+        graders = [asyncio.create_task(grade()) for _ in range(num_graders)]
+        tasks = [fetching, *graders]
+        try:
+            # If a grader dies unexpectedly, the fetchers would otherwise block forever on the full queue.
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None: raise task.exception()
+        finally:
+            for task in tasks: task.cancel()
+            if owns_pool: pool.shutdown()
+
+        return grade_data
+
+    @staticmethod
+    def _get_submission_notebook_path(submission: SubmissionModel) -> str:
+        return f"{ submission.assignment.directory_path }/{ submission.assignment.student_notebook_path }"
+
+    """ Returns previously computed otter results for whichever submissions have them under the autograder. """
+    async def get_cached_grade_data(
+        self,
+        submissions: list[SubmissionModel],
+        autograder_hash: str
+    ) -> dict[SubmissionModel, dict]:
+        if len(submissions) == 0: return {}
+        grade_results = self.session.query(GradeResultModel) \
+            .filter(GradeResultModel.autograder_hash == autograder_hash) \
+            .filter(GradeResultModel.commit_id.in_({ submission.commit_id for submission in submissions })) \
+            .all()
+        grade_results = {
+            (grade_result.commit_id, grade_result.notebook_path): grade_result.grade_data
+            for grade_result in grade_results
+        }
+
+        cached_grade_data = {}
+        for submission in submissions:
+            key = (submission.commit_id, self._get_submission_notebook_path(submission))
+            if key in grade_results:
+                cached_grade_data[submission] = grade_results[key]
+        return cached_grade_data
+
+    async def cache_grade_data(
+        self,
+        grade_data: dict[SubmissionModel, dict],
+        autograder_hash: str
+    ) -> None:
+        if len(grade_data) == 0: return
+        # Another grading run may have stored the same results concurrently, they're identical anyways.
+        self.session.execute(
+            insert(GradeResultModel)
+                .values([
+                    {
+                        "commit_id": submission.commit_id,
+                        "notebook_path": self._get_submission_notebook_path(submission),
+                        "autograder_hash": autograder_hash,
+                        "grade_data": submission_grade_data
+                    }
+                    for submission, submission_grade_data in grade_data.items()
+                ])
+                .on_conflict_do_nothing(index_elements=["commit_id", "notebook_path", "autograder_hash"])
+        )
+        self.session.commit()
+
+    """ Writes out the graded notebook and autograder zip into `directory`, returning the path to the autograder zip. """
+    async def _write_autograder(
+        self,
+        directory: Path,
+        master_notebook_content: str,
+        otter_config_content: str,
+        requirements_txt_content: str
+    ) -> Path:
+        final_graded_notebook_content, zip_config_bytes = await self.generate_config(
+            master_notebook_content,
+            otter_config_content,
+            requirements_txt_content
+        )
+        graded_notebook_path = directory / "graded.ipynb"
+        otter_config_path = directory / "config.zip"
+        with open(graded_notebook_path, "w+") as f:
+            f.write(final_graded_notebook_content)
+        with open(otter_config_path, "wb+") as f:
+            f.write(zip_config_bytes)
+        return otter_config_path
+
+    async def set_autograder(
+        self,
+        assignment: AssignmentModel,
+        master_notebook_content: str,
+        otter_config_content: str,
+        requirements_txt_content: str = "otter-grader==5.5.0"
+    ) -> AssignmentAutograderModel:
+        autograder = assignment.autograder
+        if autograder is None:
+            autograder = AssignmentAutograderModel(assignment_id=assignment.id)
+            self.session.add(autograder)
+        autograder.master_notebook_content = master_notebook_content
+        autograder.otter_config_content = otter_config_content
+        autograder.requirements_txt_content = requirements_txt_content
+        autograder.last_modified_date = get_now_with_tzinfo()
+        self.session.commit()
+
+        return autograder
+
+    """ Grades a new submission against its assignment's autograder ahead of time, if the assignment autogrades on submit.
+    The result is cached like any other, so grading the assignment later on only needs to assemble it.
+    Callers should hold one of the `precompute_slots` while this runs. """
+    async def precompute_submission_grade(self, submission: SubmissionModel) -> None:
+        assignment = submission.assignment
+        autograder = assignment.autograder
+        if assignment.manual_grading or not assignment.autograde_on_submit or autograder is None:
+            return
+
+        autograder_hash = self.compute_autograder_hash(
+            autograder.master_notebook_content,
+            autograder.otter_config_content,
+            autograder.requirements_txt_content
+        )
+        if len(await self.get_cached_grade_data([submission], autograder_hash)) > 0:
+            return
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            otter_config_path = await self._write_autograder(
+                temp_dir,
+                autograder.master_notebook_content,
+                autograder.otter_config_content,
+                autograder.requirements_txt_content
+            )
+            grade_data = await self.grade_submissions([submission], otter_config_path, temp_dir, pool=background_grading_pool)
+            await self.cache_grade_data(grade_data, autograder_hash)
+
+    @staticmethod
+    def _compute_submission_grade(submission: SubmissionModel, grade_data: dict) -> SubmissionGradeSchema:
+        tests = [test for test in grade_data["tests"] if "score" in test]
+        public_tests = [test for test in grade_data["tests"] if "score" not in test]
+        public_test_comments = "\n".join([test["output"] for test in public_tests])
+
+        score = sum([question["score"] for question in tests])
+        max_score = sum([question["max_score"] for question in tests])
+
+        return SubmissionGradeSchema(
+            score=score,
+            total_points=max_score,
+            comments=public_test_comments,
+            submission_already_graded=submission.graded
+        )
+
     async def grade_assignment(
         self,
         assignment: AssignmentModel,
@@ -143,7 +470,9 @@ class GradingService:
         otter_config_content: str,
         requirements_txt_content: str = "otter-grader==5.5.0",
         *,
-        dry_run=False
+        dry_run=False,
+        # Called as (total, graded, failed) once submissions are computed and as each one is graded.
+        progress_callback: Callable[[int, int, int], Awaitable[None]] | None = None
     ) -> GradeReportModel:
         from app.services import LmsSyncService, CleanupService
 
@@ -151,61 +480,48 @@ class GradingService:
             raise AutogradingDisabledException()
 
         submissions = await self.compute_submissions_at_moment(assignment)
-        final_graded_notebook_content, zip_config_bytes = await self.generate_config(
-            master_notebook_content,
-            otter_config_content,
-            requirements_txt_content
-        )
 
-        final_scores = {}
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir = Path(temp_dir)
-            graded_notebook_path = temp_dir / "graded.ipynb"
-            otter_config_path = temp_dir / "config.zip"
-            with open(graded_notebook_path, "w+") as f:
-                f.write(final_graded_notebook_content)
-            with open(otter_config_path, "wb+") as f:
-                f.write(zip_config_bytes)
-            for submission in submissions:
-                (submission_notebook_path, student_notebook_content) = await self.load_submission_archive(submission, temp_dir)
-                submission_graded_path = temp_dir / f"{ submission.id }-graded.json"
+        # Submissions whose commit was already graded by this exact autograder don't need to run again.
+        autograder_hash = self.compute_autograder_hash(master_notebook_content, otter_config_content, requirements_txt_content)
+        cached_grade_data = await self.get_cached_grade_data(submissions, autograder_hash)
+        ungraded_submissions = [submission for submission in submissions if submission not in cached_grade_data]
+        print(f"Reusing cached grades for { len(cached_grade_data) } of { len(submissions) } submissions")
 
-                try:
-                    otter_run(
-                        submission=str(submission_notebook_path),
-                        autograder=str(otter_config_path),
-                        output_dir=str(submission_graded_path),
-                        no_logo=True,
-                        debug=settings.DEV_PHASE == DevPhase.DEV
-                    )
+        if progress_callback is not None:
+            await progress_callback(len(submissions), len(cached_grade_data), 0)
 
-                    with open(submission_graded_path, "r") as f:
-                        grade_data = json.load(f)
-                
-                except Exception as e:
-                    print(f"could not grade submission for { submission.student.onyen }: { str(e) }")
-                    continue
-
-                tests = [test for test in grade_data["tests"] if "score" in test]
-                public_tests = [test for test in grade_data["tests"] if "score" not in test]
-                public_test_comments = "\n".join([test["output"] for test in public_tests])
-
-                score = sum([question["score"] for question in tests])
-                max_score = sum([question["max_score"] for question in tests])
+        async def on_submission_graded(graded: int, failed: int):
+            if progress_callback is not None:
+                await progress_callback(len(submissions), len(cached_grade_data) + graded, failed)
 
-                final_scores[submission] = (
-                    SubmissionGradeSchema(
-                        score=score,
-                        total_points=max_score,
-                        comments=public_test_comments,
-                        submission_already_graded=submission.graded
-                    ),
-                    student_notebook_content
+        final_scores = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            new_grade_data = {}
+            if len(ungraded_submissions) > 0:
+                otter_config_path = await self._write_autograder(
+                    temp_dir,
+                    master_notebook_content,
+                    otter_config_content,
+                    requirements_txt_content
+                )
+                new_grade_data = await self.grade_submissions(
+                    ungraded_submissions,
+                    otter_config_path,
+                    temp_dir,
+                    progress_callback=on_submission_graded
                 )
+                await self.cache_grade_data(new_grade_data, autograder_hash)
+
+            grade_data = { **cached_grade_data, **new_grade_data }
+            # Preserve submission order, workers finish in whatever order they finish in.
+            for submission in submissions:
+                if submission not in grade_data: continue
+                final_scores[submission] = self._compute_submission_grade(submission, grade_data[submission])
 
             grade_report = GradeReportModel.from_submission_grades(
                 assignment=assignment,
-                submission_grades=[submission_grade for (submission_grade, _) in final_scores.values()],
+                submission_grades=list(final_scores.values()),
                 master_notebook_content=master_notebook_content,
                 otter_config_content=otter_config_content
             )
@@ -214,25 +530,25 @@ class GradingService:
             # If it's a dry run, stop right here and return the grade report.
             if dry_run: return grade_report
 
+            # Submissions made from here on (e.g. regrades) are precomputed against the autograder that was actually used.
+            await self.set_autograder(assignment, master_notebook_content, otter_config_content, requirements_txt_content)
+
             self.session.add(grade_report)
             self.session.commit()
 
             cleanup_service = CleanupService.Grading(self.session, grade_report)
 
             try:
-                for submission, (
-                    submission_grade,
-                    student_notebook_content
-                ) in final_scores.items():
-                    if submission.graded:
-                        # This submission is already graded. No point in reuploading it to Canvas.
-                        continue
-                    
-                    await LmsSyncService(self.session).upsync_grade(
-                        submission=submission,
-                        grade_proportion=submission_grade.score / grade_report.total_points,
-                        comments=submission_grade.comments if assignment.grader_question_feedback else None,
+                # Submissions that are already graded don't need to be reuploaded to Canvas.
+                submission_grades = {
+                    submission: (
+                        submission_grade.score / grade_report.total_points,
+                        submission_grade.comments if assignment.grader_question_feedback else None
                     )
+                    for submission, submission_grade in final_scores.items() if not submission.graded
+                }
+                await LmsSyncService(self.session).upsync_grades(assignment, submission_grades)
+                for submission in submission_grades:
                     submission.graded = True
             except Exception as e:
                 await cleanup_service.undo_grade_assignment(delete_database_grade_report=True)
@@ -1,5 +1,6 @@
 import ldap3
 from ldap3.core.exceptions import LDAPSocketOpenError
+from ldap3.utils.conv import escape_filter_chars
 from pydantic import BaseModel
 from app.core.config import settings
 from app.core.exceptions import LDAPConnectionTimeoutException, UserNotFoundException
@@ -11,43 +12,65 @@ class LDAPUserInfoSchema(BaseModel):
     email: str
 
 class LDAPService:
-    def get_user_info(self, pid: str) -> LDAPUserInfoSchema:
-        base_dn = "dc=unc,dc=edu"
+    base_dn = "dc=unc,dc=edu"
+    attributes = [
+        "pid",
+        "uid", # onyen
+        "givenName", # first name
+        "sn", # surname
+        "mail" # email
+    ]
+
+    def _connect(self) -> ldap3.Connection:
         server = ldap3.Server(
             host=settings.LDAP_HOST,
             port=settings.LDAP_PORT,
-            get_info=ldap3.ALL,
+            # We only ever search for known attributes, so there's no need to download the server's schema.
+            get_info=ldap3.NONE,
             use_ssl=settings.LDAP_PORT == 636,
             connect_timeout=settings.LDAP_TIMEOUT_SECONDS
         )
+        return ldap3.Connection(
+            server,
+            user=settings.LDAP_SERVICE_ACCOUNT_BIND_DN,
+            password=settings.LDAP_SERVICE_ACCOUNT_PASSWORD,
+            auto_bind=True,
+            receive_timeout=settings.LDAP_TIMEOUT_SECONDS
+        )
+    
+    @staticmethod
+    def _build_search_filter(pids: list[str]) -> str:
+        pid_filters = "".join(f"(pid={ escape_filter_chars(pid) })" for pid in pids)
+        return f"(&(objectClass=uncperson)(|{ pid_filters }))"
+
+    def get_user_info(self, pid: str) -> LDAPUserInfoSchema:
+        users_info = self.get_users_info([pid])
+        if pid not in users_info:
+            raise UserNotFoundException()
+        return users_info[pid]
+
+    """ Resolves many PIDs over a single bound connection, searching for a batch of PIDs at a time.
+    PIDs that aren't in the directory are omitted from the result. """
+    def get_users_info(self, pids: list[str], batch_size: int = settings.LDAP_SEARCH_BATCH_SIZE) -> dict[str, LDAPUserInfoSchema]:
+        pids = list(dict.fromkeys(pids))
+        users_info = {}
+        if len(pids) == 0: return users_info
         try:
-            with ldap3.Connection(
-                server,
-                user=settings.LDAP_SERVICE_ACCOUNT_BIND_DN,
-                password=settings.LDAP_SERVICE_ACCOUNT_PASSWORD,
-                auto_bind=True,
-                receive_timeout=settings.LDAP_TIMEOUT_SECONDS
-            ) as conn:
-                search_filter = f"(&(objectClass=uncperson)(pid={pid}))"
-                conn.search(
-                    search_base=base_dn,
-                    search_filter=search_filter,
-                    search_scope=ldap3.SUBTREE,
-                    attributes=[
-                        "uid", # onyen
-                        "givenName", # first name
-                        "sn", # surname
-                        "mail" # email
-                    ]
-                )
-                if len(conn.entries) == 0:
-                    raise UserNotFoundException()
-                student = conn.entries[0]
-                return LDAPUserInfoSchema(
-                    onyen=student.uid.value,
-                    first_name=student.givenName.value,
-                    last_name=student.sn.value,
-                    email=student.mail.value
-                )
+            with self._connect() as conn:
+                for i in range(0, len(pids), batch_size):
+                    conn.search(
+                        search_base=self.base_dn,
+                        search_filter=self._build_search_filter(pids[i : i + batch_size]),
+                        search_scope=ldap3.SUBTREE,
+                        attributes=self.attributes
+                    )
+                    for entry in conn.entries:
+                        users_info[str(entry.pid.value)] = LDAPUserInfoSchema(
+                            onyen=entry.uid.value,
+                            first_name=entry.givenName.value,
+                            last_name=entry.sn.value,
+                            email=entry.mail.value
+                        )
         except LDAPSocketOpenError as e:
-            raise LDAPConnectionTimeoutException()
\ No newline at end of file
+            raise LDAPConnectionTimeoutException()
+        return users_info
@@ -3,21 +3,56 @@ import os.path
 from typing import BinaryIO
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.services.canvas_service import CanvasService, UpdateCanvasAssignmentBody, DuplicateFileAction
+from app.services.canvas_service import CanvasService, CanvasGradeBody, UpdateCanvasAssignmentBody, DuplicateFileAction
 from app.services.course_service import CourseService
 from app.services.ldap_service import LDAPService
 from app.services.assignment_service import AssignmentService
 from app.services.grading_service import GradingService
 from app.services.user.student_service import StudentService
 from app.services.user.instructor_service import InstructorService
-from app.models import AssignmentModel, SubmissionModel
+from app.models import AssignmentModel, SubmissionModel, UserModel
+from app.models.user import UserType
 from app.schemas.course import UpdateCourseSchema
 from app.schemas.assignment import UpdateAssignmentSchema
+from app.schemas.user import CreateStudentSchema
 from app.core.exceptions import (
     AssignmentNotFoundException, NoCourseExistsException, 
     UserNotFoundException, LMSUserNotFoundException
 )
 
+""" The changes needed to bring the database's users of one type in line with an LMS roster.
+Both sides are keyed by PID, so the diff is linear in the size of the rosters. """
+class RosterDiff:
+    def __init__(self, create: list[dict], delete: list[UserModel], unchanged: list[UserModel], onyens: set[str]):
+        # LMS users who aren't associated with any user in the database yet.
+        self.create = create
+        # Users who are associated with a PID that is no longer on the roster.
+        self.delete = delete
+        self.unchanged = unchanged
+        # The onyen of every user in the database, regardless of type.
+        self.onyens = onyens
+
+    @classmethod
+    def compute(
+        cls,
+        db_users: list[tuple[UserModel, str | None]],
+        lms_users: list[dict],
+        user_type: UserType
+    ) -> "RosterDiff":
+        lms_pids = { user["sis_user_id"] for user in lms_users if user.get("sis_user_id") is not None }
+        # A PID that already belongs to a user of any type shouldn't be created again.
+        associated_pids = { pid for _, pid in db_users if pid is not None }
+
+        delete, unchanged = [], []
+        for user, pid in db_users:
+            # Users without a PID weren't created from the LMS, so there's nothing to compare them against.
+            if user.user_type != user_type or pid is None: continue
+            if pid in lms_pids: unchanged.append(user)
+            else: delete.append(user)
+
+        create = [user for user in lms_users if user.get("sis_user_id") not in associated_pids]
+        return cls(create, delete, unchanged, { user.onyen for user, _ in db_users })
+
 class LmsSyncService:
     def __init__(self, session: Session):
         self.canvas_service = CanvasService(session)
@@ -90,8 +125,8 @@ class LmsSyncService:
         return canvas_assignments
 
     async def sync_students(self):
-        db_students = await self.student_service.list_students()
-        canvas_students = await self.canvas_service.get_students()
+        # Copied, the index holds onto the users as Canvas returns them.
+        canvas_students = [{ **student } for student in await self.canvas_service.refresh_user_index(UserType.STUDENT)]
 
         # If this course runs on a 2U Digital Campus instance, remove ":UNC" from the PID
         for student in canvas_students:
@@ -99,51 +134,52 @@ class LmsSyncService:
             if sis_user_id and ':' in sis_user_id:
                 student["sis_user_id"] = sis_user_id.split(':')[0]
 
-        canvas_student_pids = [s["sis_user_id"] for s in canvas_students]
+        diff = RosterDiff.compute(await self.canvas_service.get_users_with_pids(), canvas_students, UserType.STUDENT)
         
         # Delete students that are in the database but not in Canvas
-        for student in db_students:
-            print("getting student pid", student.onyen)
-            student_pid = await self.canvas_service.get_pid_from_onyen(student.onyen)
-            print("student pid is", student_pid)
-            if student_pid not in canvas_student_pids:
-                await self.student_service.delete_user(student.onyen)
-                try: await self.canvas_service.unassociate_pid_from_user(student.onyen)
-                except LMSUserNotFoundException: pass
+        for student in diff.delete:
+            await self.student_service.delete_user(student.onyen)
+            try: await self.canvas_service.unassociate_pid_from_user(student.onyen)
+            except LMSUserNotFoundException: pass
        
-        for student in canvas_students:
-            pid, email, name = student.get("sis_user_id"), student.get("email"), student.get("name")
-            if pid is None or email is None or name is None:
-                print("Skipping over pending student", name or "<unknown>")
+        new_canvas_students = []
+        for student in diff.create:
+            if student.get("sis_user_id") is None or student.get("email") is None or student.get("name") is None:
+                print("Skipping over pending student", student.get("name") or "<unknown>")
                 continue
+            new_canvas_students.append(student)
 
-            try:
-                print("getting user info for ", pid)
-                user_info = self.ldap_service.get_user_info(pid)
-                print(pid, "->", user_info.onyen)
-            except:
-                print("Skipping over student not in LDAP: ", pid or "<unknown>")
-                continue
+        # Only PIDs that aren't associated with anyone yet need to be resolved to an onyen.
+        users_info = await asyncio.to_thread(self.ldap_service.get_users_info, [s["sis_user_id"] for s in new_canvas_students])
 
-            try:
-                await self.student_service.get_user_by_onyen(user_info.onyen)
+        new_students = []
+        new_student_pids = {}
+        for student in new_canvas_students:
+            pid, email, name = student["sis_user_id"], student["email"], student["name"]
+            user_info = users_info.get(pid)
+            if user_info is None:
+                print("Skipping over student not in LDAP: ", pid)
+                continue
+            print(pid, "->", user_info.onyen)
 
-            except UserNotFoundException:
+            if user_info.onyen not in diff.onyens:
                 #create a new student
                 print("student doesn't exist", user_info.onyen)
-                await self.student_service.create_student(
-                    onyen=user_info.onyen,
-                    name=name,
-                    email=email
-                )
-                print("associate pid", pid, "to onyen", user_info.onyen)
-                await self.canvas_service.associate_pid_to_user(user_info.onyen, pid)
+                new_students.append(CreateStudentSchema(onyen=user_info.onyen, name=name, email=email))
+                new_student_pids[user_info.onyen] = pid
+
+        # Provisioning is slow (many remote calls per student), so new students are created as a batch.
+        for result in await self.student_service.create_students(new_students):
+            if not result.success:
+                print("Failed to create student", result.onyen, ":", result.error)
+                continue
+            print("associate pid", new_student_pids[result.onyen], "to onyen", result.onyen)
+            await self.canvas_service.associate_pid_to_user(result.onyen, new_student_pids[result.onyen])
 
         return canvas_students
     
     async def sync_instructors(self):
-        db_instructors = await self.instructor_service.list_instructors()
-        canvas_instructors = await self.canvas_service.get_instructors()
+        canvas_instructors = [{ **instructor } for instructor in await self.canvas_service.refresh_user_index(UserType.INSTRUCTOR)]
 
         # If this course runs on a 2U Digital Campus instance, remove ":UNC" from the PID
         for instructor in canvas_instructors:
@@ -151,32 +187,31 @@ class LmsSyncService:
             if sis_user_id and ':' in sis_user_id:
                 instructor["sis_user_id"] = sis_user_id.split(':')[0]
 
-        canvas_instructor_pids = [i["sis_user_id"] for i in canvas_instructors]
+        diff = RosterDiff.compute(await self.canvas_service.get_users_with_pids(), canvas_instructors, UserType.INSTRUCTOR)
        
         # Delete instructors that are in the database but not in Canvas
-        for instructor in db_instructors:
-            print("getting instructor pid", instructor.onyen)
-            instructor_pid = await self.canvas_service.get_pid_from_onyen(instructor.onyen)
-            print("instructor pid is", instructor_pid)
-            if instructor_pid not in canvas_instructor_pids:
-                await self.instructor_service.delete_user(instructor.onyen)
-                try: await self.canvas_service.unassociate_pid_from_user(instructor.onyen)
-                except LMSUserNotFoundException: pass
+        for instructor in diff.delete:
+            await self.instructor_service.delete_user(instructor.onyen)
+            try: await self.canvas_service.unassociate_pid_from_user(instructor.onyen)
+            except LMSUserNotFoundException: pass
         
-        for instructor in canvas_instructors:
-            pid, email, name = instructor.get("sis_user_id"), instructor.get("email"), instructor.get("name")
-            if pid is None or email is None or name is None:
-                print("Skipping over pending instructor", name or "<unknown>")
+        new_canvas_instructors = []
+        for instructor in diff.create:
+            if instructor.get("sis_user_id") is None or instructor.get("email") is None or instructor.get("name") is None:
+                print("Skipping over pending instructor", instructor.get("name") or "<unknown>")
                 continue
+            new_canvas_instructors.append(instructor)
 
-            print("getting user info for ", pid)
-            user_info = self.ldap_service.get_user_info(pid)
-            print(pid, "->", user_info.onyen)
+        users_info = await asyncio.to_thread(self.ldap_service.get_users_info, [i["sis_user_id"] for i in new_canvas_instructors])
 
-            try:
-                await self.instructor_service.get_user_by_onyen(user_info.onyen)
+        for instructor in new_canvas_instructors:
+            pid, email, name = instructor["sis_user_id"], instructor["email"], instructor["name"]
+            if pid not in users_info:
+                raise UserNotFoundException(f'LDAP user with pid "{ pid }" does not exist')
+            user_info = users_info[pid]
+            print(pid, "->", user_info.onyen)
 
-            except UserNotFoundException:
+            if user_info.onyen not in diff.onyens:
                 #create a new instructor
                 print("instructor doesn't exit", user_info.onyen)
                 await self.instructor_service.create_instructor(
@@ -229,6 +264,31 @@ class LmsSyncService:
             grade_proportion=grade_proportion,
             comments=comments
         )
+
+    """ Upsyncs the grades of many submissions to a single assignment at once.
+    Grades are keyed by submission and given as (grade_proportion, comments). """
+    async def upsync_grades(
+        self,
+        assignment: AssignmentModel,
+        submission_grades: dict[SubmissionModel, tuple[float, str | None]]
+    ):
+        if len(submission_grades) == 0: return
+
+        user_pids = await self.canvas_service.get_pids_from_onyens([submission.student.onyen for submission in submission_grades])
+        # If this course runs on a 2U Digital Campus instance, append ":UNC" to the PID
+        if "digitalcampus" in settings.CANVAS_API_URL:
+            user_pids = { onyen : pid + ":UNC" for onyen, pid in user_pids.items() }
+
+        grades = []
+        for submission, (grade_proportion, comments) in submission_grades.items():
+            student = await self.canvas_service.get_student_by_pid(user_pids[submission.student.onyen])
+            grades.append(CanvasGradeBody(
+                user_id=student["id"],
+                grade_proportion=grade_proportion,
+                comments=comments
+            ))
+
+        await self.canvas_service.upload_assignment_grades(assignment.id, grades)
             
     async def upsync_assignment(
         self,
@@ -3,8 +3,10 @@ import tempfile
 from typing import List
 from pathlib import Path
 from datetime import datetime
-from sqlalchemy import desc, func
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc, func, select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import scalars
 from app.events import dispatch
 from app.models import StudentModel, AssignmentModel, SubmissionModel
 from app.schemas import SubmissionSchema, DatabaseSubmissionSchema
@@ -13,7 +15,7 @@ from app.core.exceptions import SubmissionNotFoundException
 from app.core.utils.datetime import get_now_with_tzinfo
 
 class SubmissionService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session | AsyncSession):
         self.session = session
 
     async def create_submission(
@@ -63,10 +65,10 @@ class SubmissionService:
         student: StudentModel,
         assignment: AssignmentModel
     ) -> List[SubmissionModel]:
-        submissions = self.session.query(SubmissionModel) \
-            .filter_by(student_id=student.id, assignment_id=assignment.id) \
-            .order_by(desc(SubmissionModel.submission_time)) \
-            .all()
+        submissions = (await scalars(self.session, select(SubmissionModel)
+            .filter_by(student_id=student.id, assignment_id=assignment.id)
+            .order_by(desc(SubmissionModel.submission_time))
+        )).all()
 
         return submissions
 
@@ -77,15 +79,78 @@ class SubmissionService:
         moment: datetime | None = None
     ) -> SubmissionModel:
         if moment is None: moment = get_now_with_tzinfo()
-        submission = self.session.query(SubmissionModel) \
-            .filter_by(student_id=student.id, assignment_id=assignment.id) \
-            .filter(SubmissionModel.submission_time <= moment) \
-            .order_by(desc(SubmissionModel.submission_time)) \
-            .limit(1) \
-            .first()
+        submission = (await scalars(self.session, select(SubmissionModel)
+            .filter_by(student_id=student.id, assignment_id=assignment.id)
+            .filter(SubmissionModel.submission_time <= moment)
+            .order_by(desc(SubmissionModel.submission_time))
+            .limit(1)
+        )).first()
         if submission is None:
             raise SubmissionNotFoundException()
         return submission
+
+    """ Resolves the active submission of every student who has submitted to the assignment as of `moment`,
+    in a single query. Students without a submission at that moment are omitted. """
+    async def get_active_submissions(
+        self,
+        assignment: AssignmentModel,
+        moment: datetime | None = None
+    ) -> List[SubmissionModel]:
+        if moment is None: moment = get_now_with_tzinfo()
+        # DISTINCT ON keeps the first row per student under the ordering, i.e. their latest submission.
+        submissions = self.session.query(SubmissionModel) \
+            .options(joinedload(SubmissionModel.student), joinedload(SubmissionModel.assignment)) \
+            .filter(SubmissionModel.assignment_id == assignment.id) \
+            .filter(SubmissionModel.submission_time <= moment) \
+            .distinct(SubmissionModel.student_id) \
+            .order_by(SubmissionModel.student_id, desc(SubmissionModel.submission_time)) \
+            .all()
+
+        return submissions
+        
+    """ Lists every student's submissions to the assignment, newest first, keyed by onyen, in a single query.
+    A student's active submission is their latest one as of `moment`, per ROW_NUMBER() over their submissions.
+    Students are ordered by onyen and paged by keyset: pass the last onyen of a page as `after_onyen` to get the next.
+    Students without any submissions are included, with no submissions. """
+    async def get_submission_schemas_by_student(
+        self,
+        assignment: AssignmentModel,
+        after_onyen: str | None = None,
+        limit: int | None = None,
+        moment: datetime | None = None
+    ) -> dict[str, List[SubmissionSchema]]:
+        if moment is None: moment = get_now_with_tzinfo()
+
+        students = self.session.query(StudentModel.id, StudentModel.onyen).order_by(StudentModel.onyen)
+        if after_onyen is not None: students = students.filter(StudentModel.onyen > after_onyen)
+        if limit is not None: students = students.limit(limit)
+        students = students.subquery()
+
+        # Active is the latest submission as of `moment`, exactly as in `get_active_submission`.
+        # Submissions made after it are ranked behind the rest so that they're never first.
+        submitted = SubmissionModel.submission_time <= moment
+        active = and_(
+            func.row_number().over(
+                partition_by=SubmissionModel.student_id,
+                order_by=(desc(submitted), desc(SubmissionModel.submission_time))
+            ) == 1,
+            submitted
+        ).label("active")
+        rows = self.session.query(students.c.onyen, SubmissionModel, active) \
+            .select_from(students) \
+            .outerjoin(SubmissionModel, and_(
+                SubmissionModel.student_id == students.c.id,
+                SubmissionModel.assignment_id == assignment.id
+            )) \
+            .order_by(students.c.onyen, desc(SubmissionModel.submission_time)) \
+            .all()
+
+        submissions = {}
+        for onyen, submission, active in rows:
+            student_submissions = submissions.setdefault(onyen, [])
+            if submission is not None:
+                student_submissions.append(await self.get_submission_schema(submission, active=active))
+        return submissions
         
     """ NOTE: Marked for refactor. Not a fan of this workflow... """
     async def get_current_submission_attempt(
@@ -98,8 +163,23 @@ class SubmissionService:
             .filter(SubmissionModel.student_id == student.id)
         return student_submissions.count()
         
-    async def get_submission_schema(self, submission: SubmissionModel) -> SubmissionSchema:
+    """ The number of submissions the student has made to each assignment, keyed by assignment id.
+    Assignments without any submissions are omitted. """
+    async def get_submission_counts(
+        self,
+        student: StudentModel
+    ) -> dict[int, int]:
+        submission_counts = self.session.query(SubmissionModel.assignment_id, func.count(SubmissionModel.id)) \
+            .filter(SubmissionModel.student_id == student.id) \
+            .group_by(SubmissionModel.assignment_id) \
+            .all()
+        return { assignment_id : count for assignment_id, count in submission_counts }
+        
+    """ `active` may be passed when the caller has already resolved active submissions in bulk. """
+    async def get_submission_schema(self, submission: SubmissionModel, active: bool | None = None) -> SubmissionSchema:
         submission_schema = DatabaseSubmissionSchema.from_orm(submission).dict()
-        submission_schema["active"] = await self.get_active_submission(submission.student, submission.assignment) == submission
+        if active is None:
+            active = await self.get_active_submission(submission.student, submission.assignment) == submission
+        submission_schema["active"] = active
         
         return SubmissionSchema(**submission_schema)
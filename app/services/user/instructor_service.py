@@ -1,4 +1,6 @@
 from typing import List
+from sqlalchemy import select
+from app.database import scalars
 from app.events import dispatch
 from app.models import InstructorModel
 from app.events import CreateUserCrudEvent
@@ -8,7 +10,7 @@ from .user_service import UserService
 
 class InstructorService(UserService):
     async def list_instructors(self) -> List[InstructorModel]:
-        return self.session.query(InstructorModel).all()
+        return (await scalars(self.session, select(InstructorModel))).all()
 
     async def create_instructor(
         self,
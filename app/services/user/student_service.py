@@ -1,22 +1,29 @@
+import asyncio
 from typing import List
+from sqlalchemy import select
+from app.database import SessionLocal, scalars
 from app.events import dispatch
 from app.models import StudentModel
 from app.events import CreateUserCrudEvent
+from app.schemas import CreateStudentSchema, CreateStudentResultSchema
+from app.core.config import settings
 from app.core.role_permissions import student_role
 from app.core.exceptions import NotAStudentException, UserAlreadyExistsException, UserNotFoundException
-from .user_service import UserService
+from .user_service import UserService, ProvisioningLimits
 
 class StudentService(UserService):
     async def list_students(
         self,
     ) -> List[StudentModel]:
-        return self.session.query(StudentModel).all()
+        return (await scalars(self.session, select(StudentModel))).all()
 
     async def create_student(
         self,
         onyen: str,
         name: str,
-        email: str
+        email: str,
+        *,
+        limits: ProvisioningLimits | None = None
     ) -> StudentModel:
         from app.services import GiteaService, CourseService, CleanupService, CollaboratorPermission
 
@@ -44,7 +51,7 @@ class StudentService(UserService):
         cleanup_service = CleanupService.User(self.session, student)
 
         try:
-            password = await super().create_user_auto_password_auth(onyen)
+            password = await super().create_user_auto_password_auth(onyen, limits=limits)
         except Exception as e:
             await cleanup_service.undo_create_user(delete_database_user=True)
             raise e
@@ -57,29 +64,33 @@ class StudentService(UserService):
         instructor_organization = await course_service.get_instructor_gitea_organization_name()
         
         try:
-            await gitea_service.create_user(onyen, email, password)
+            async with ProvisioningLimits.gitea_slot(limits):
+                await gitea_service.create_user(onyen, email, password)
         except Exception as e:
             await cleanup_service.undo_create_user(delete_database_user=True, delete_password_secret=True)
             raise e
         
         try:
-            await gitea_service.add_collaborator_to_repo(
-                name=master_repo_name,
-                owner=instructor_organization,
-                collaborator_name=onyen,
-                permission=CollaboratorPermission.READ
-            )
-            await gitea_service.fork_repository(
-                name=master_repo_name,
-                owner=instructor_organization,
-                new_owner=onyen
-            )
-            # The remote is subject to change when renamed, so we don't use the remote returned by fork_repository.
-            student.fork_remote_url = await gitea_service.modify_repository(
-                name=master_repo_name,
-                owner=onyen,
-                new_name=student_repo_name
-            )
+            async with ProvisioningLimits.gitea_slot(limits):
+                await gitea_service.add_collaborator_to_repo(
+                    name=master_repo_name,
+                    owner=instructor_organization,
+                    collaborator_name=onyen,
+                    permission=CollaboratorPermission.READ
+                )
+            async with ProvisioningLimits.gitea_slot(limits):
+                await gitea_service.fork_repository(
+                    name=master_repo_name,
+                    owner=instructor_organization,
+                    new_owner=onyen
+                )
+            async with ProvisioningLimits.gitea_slot(limits):
+                # The remote is subject to change when renamed, so we don't use the remote returned by fork_repository.
+                student.fork_remote_url = await gitea_service.modify_repository(
+                    name=master_repo_name,
+                    owner=onyen,
+                    new_name=student_repo_name
+                )
             self.session.commit()
 
         except Exception as e:
@@ -88,6 +99,34 @@ class StudentService(UserService):
 
         dispatch(CreateUserCrudEvent(user=student))
 
+        return student
+
+    """
+    Provisions many students concurrently, with concurrent calls to each upstream capped across the whole batch.
+    Each student is created, and rolled back on failure, exactly as by `create_student`, in a session of its own
+    so that one student's failed transaction can't leave the others' in need of a rollback.
+    Failures don't affect the rest of the batch, they're reported per student instead of raised.
+    NOTE: Database work stays on the event loop, only the blocking password hashing and Kubernetes calls run in threads.
+    """
+    async def create_students(self, students: list[CreateStudentSchema]) -> list[CreateStudentResultSchema]:
+        limits = ProvisioningLimits(
+            gitea=settings.GITEA_PROVISIONING_CONCURRENCY,
+            kubernetes=settings.KUBERNETES_PROVISIONING_CONCURRENCY
+        )
+        # Every student in flight holds a database connection.
+        student_slots = asyncio.Semaphore(settings.USER_PROVISIONING_CONCURRENCY)
+
+        async def create(student: CreateStudentSchema) -> CreateStudentResultSchema:
+            async with student_slots:
+                with SessionLocal() as session:
+                    try:
+                        await StudentService(session).create_student(student.onyen, student.name, student.email, limits=limits)
+                    except Exception as e:
+                        return CreateStudentResultSchema(onyen=student.onyen, success=False, error=str(e) or type(e).__name__)
+            return CreateStudentResultSchema(onyen=student.onyen, success=True)
+
+        return await asyncio.gather(*[create(student) for student in students])
+
     async def get_user_by_onyen(self, onyen: str) -> StudentModel:
         user = await super().get_user_by_onyen(onyen)
         if not isinstance(user, StudentModel):
@@ -1,4 +1,9 @@
-from sqlalchemy.orm import Session
+import asyncio
+from contextlib import nullcontext
+from sqlalchemy import select
+from sqlalchemy.orm import Session, with_polymorphic
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import scalars, get_cached_model, cache_model, uncache_model
 from app.events import dispatch
 from app.models import UserModel, AutoPasswordAuthModel
 from app.events import DeleteUserCrudEvent
@@ -13,8 +18,22 @@ from app.core.exceptions import (
     PasswordDoesNotMatchException
 )
 
+class ProvisioningLimits:
+    """ Caps on concurrent calls to each upstream, shared by every user being provisioned in a batch. """
+    def __init__(self, gitea: int, kubernetes: int):
+        self.gitea = asyncio.Semaphore(gitea)
+        self.kubernetes = asyncio.Semaphore(kubernetes)
+
+    @staticmethod
+    def gitea_slot(limits: "ProvisioningLimits | None"):
+        return limits.gitea if limits is not None else nullcontext()
+
+    @staticmethod
+    def kubernetes_slot(limits: "ProvisioningLimits | None"):
+        return limits.kubernetes if limits is not None else nullcontext()
+
 class UserService:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session | AsyncSession):
         self.session = session
 
     async def get_user_by_id(self, id: int) -> UserModel:
@@ -24,9 +43,15 @@ class UserService:
         return user
 
     async def get_user_by_onyen(self, onyen: str) -> UserModel:
-        user = self.session.query(UserModel).filter_by(onyen=onyen).first()
+        # The current user is resolved by the permission check and then again by most endpoints, sharing the session.
+        user = get_cached_model(self.session, (UserModel, onyen))
+        if user is not None: return user
+        # Load the columns of every user type up front, so the user is complete under an AsyncSession too.
+        users = with_polymorphic(UserModel, "*")
+        user = (await scalars(self.session, select(users).where(users.onyen == onyen))).first()
         if user is None:
             raise UserNotFoundException()
+        cache_model(self.session, (UserModel, onyen), user)
         return user
 
     async def get_user_by_email(self, email: str) -> UserModel:
@@ -54,11 +79,12 @@ class UserService:
 
         return await self._create_user_token(user)
     
-    async def create_user_auto_password_auth(self, onyen: str) -> str:
+    async def create_user_auto_password_auth(self, onyen: str, limits: ProvisioningLimits | None = None) -> str:
         from app.services import CourseService, KubernetesService
         
         autogen_password = PasswordHelper.generate_password(64)
-        autogen_password_hash = PasswordHelper.hash_password(autogen_password)
+        # Hashing is deliberately slow, keep it off of the event loop.
+        autogen_password_hash = await asyncio.to_thread(PasswordHelper.hash_password, autogen_password)
 
         user_auth = AutoPasswordAuthModel(
             onyen=onyen,
@@ -69,12 +95,14 @@ class UserService:
 
         course = await CourseService(self.session).get_course()
         user = await self.get_user_by_onyen(onyen)
-        KubernetesService().create_credential_secret(
-            course_name=course.name,
-            onyen=onyen,
-            password=autogen_password,
-            user_type=user.user_type
-        )
+        async with ProvisioningLimits.kubernetes_slot(limits):
+            await asyncio.to_thread(
+                KubernetesService().create_credential_secret,
+                course_name=course.name,
+                onyen=onyen,
+                password=autogen_password,
+                user_type=user.user_type
+            )
 
         return autogen_password
 
@@ -99,5 +127,6 @@ class UserService:
 
         self.session.delete(user)
         self.session.commit()
+        uncache_model(self.session, (UserModel, onyen))
 
         dispatch(DeleteUserCrudEvent(user=user))
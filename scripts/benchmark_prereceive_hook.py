@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+from app.models import AssignmentModel
+from app.services import AssignmentService, GiteaService
+
+""" Times pushes to a local bare repository guarded by the master repo's generated pre-receive hook. """
+
+def git(*args: str, cwd: Path, check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, check=check, capture_output=True, text=True)
+
+async def render_hook(num_assignments: int) -> str:
+    assignment_service = AssignmentService(None)
+    assignments = [
+        AssignmentModel(name=f"hw{ i }", directory_path=f"hw{ i }", master_notebook_path=f"hw{ i }.ipynb", manual_grading=False)
+        for i in range(num_assignments)
+    ]
+    protected_files = { a.directory_path: await assignment_service.get_protected_files(a) for a in assignments }
+    overwritable_files = { a.directory_path: await assignment_service.get_overwritable_files(a) for a in assignments }
+    # Every assignment has already opened, so every modified file is checked.
+    open_timestamps = { a.directory_path: 0 for a in assignments }
+    return GiteaService._create_combined_hook_script({
+        "reject_protected": GiteaService._render_reject_protected_files_hook(protected_files),
+        "merge_control": GiteaService._render_merge_control_hook(overwritable_files, open_timestamps)
+    })
+
+def time_push(work_dir: Path) -> tuple[float, bool]:
+    start = time.perf_counter()
+    res = git("push", "origin", "HEAD:main", cwd=work_dir, check=False)
+    return time.perf_counter() - start, res.returncode == 0
+
+def commit_files(work_dir: Path, num_assignments: int, num_files: int, content: str, message: str):
+    for i in range(num_files):
+        path = work_dir / f"hw{ i % num_assignments }" / f"file{ i }.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    git("add", "-A", cwd=work_dir)
+    git("commit", "-q", "-m", message, cwd=work_dir)
+
+def benchmark(hook_content: str | None, num_assignments: int, num_files: int) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        remote_dir, work_dir = temp_dir / "origin.git", temp_dir / "work"
+        git("init", "-q", "--bare", "-b", "main", str(remote_dir), cwd=temp_dir)
+        git("init", "-q", "-b", "main", str(work_dir), cwd=temp_dir)
+        git("config", "user.email", "benchmark@example.com", cwd=work_dir)
+        git("config", "user.name", "benchmark", cwd=work_dir)
+        git("remote", "add", "origin", str(remote_dir), cwd=work_dir)
+        git("commit", "-q", "--allow-empty", "-m", "init", cwd=work_dir)
+        git("push", "-q", "origin", "main", cwd=work_dir)
+
+        if hook_content is not None:
+            hook_path = remote_dir / "hooks" / "pre-receive"
+            hook_path.write_text(hook_content)
+            os.chmod(hook_path, 0o755)
+
+        # Creating files exercises the protected files check, modifying them the merge control check.
+        commit_files(work_dir, num_assignments, num_files, "created", "create files")
+        create_time, _ = time_push(work_dir)
+        commit_files(work_dir, num_assignments, num_files, "modified", "modify files")
+        modify_time, _ = time_push(work_dir)
+        return create_time, modify_time
+
+async def run(num_assignments: int, num_files: int, compare_hook_path: str | None):
+    hooks = {
+        "no hook": None,
+        "generated hook": await render_hook(num_assignments)
+    }
+    if compare_hook_path is not None:
+        hooks[f"hook at { compare_hook_path }"] = Path(compare_hook_path).read_text()
+
+    print(f"Pushing { num_files } files across { num_assignments } assignments")
+    for name, hook_content in hooks.items():
+        create_time, modify_time = benchmark(hook_content, num_assignments, num_files)
+        print(f"{ name }: create push { create_time:.2f}s, modify push { modify_time:.2f}s")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser("Benchmark the master repository's pre-receive hook against a local bare repository")
+    parser.add_argument(
+        "--assignments",
+        type=int,
+        default=50,
+        help="Number of assignments with protected/overwritable files"
+    )
+    parser.add_argument(
+        "--files",
+        type=int,
+        default=5000,
+        help="Number of files created, then modified, per push"
+    )
+    parser.add_argument(
+        "--compare-hook",
+        type=str,
+        default=None,
+        help="Path to another pre-receive hook (e.g. one rendered by an older version) to time alongside"
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(run(args.assignments, args.files, args.compare_hook))
@@ -0,0 +1,164 @@
+import random
+import statistics
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from app.core.config import settings
+from app.database import Base
+import app.models
+
+""" Seeds a synthetic course into a scratch schema and reports the plans and latencies of the hot
+submission and extra_time queries, first without and then with the indexes on those tables. """
+
+SCHEMA = "submission_query_benchmark"
+TABLES = ["user_account", "student", "assignment", "submission", "extra_time"]
+INDEXES = ["ix_submission_assignment_student_time", "ix_submission_student_assignment", "ix_extra_time_assignment_student"]
+
+# Mirrors the queries made by SubmissionService, AssignmentService and StudentAssignmentService.
+QUERIES = {
+    "active submission": """
+        SELECT * FROM submission
+        WHERE student_id = :student_id AND assignment_id = :assignment_id AND submission_time <= now()
+        ORDER BY submission_time DESC LIMIT 1
+    """,
+    "student submissions": """
+        SELECT * FROM submission
+        WHERE student_id = :student_id AND assignment_id = :assignment_id
+        ORDER BY submission_time DESC
+    """,
+    "current submission attempt": """
+        SELECT count(*) FROM submission
+        WHERE assignment_id = :assignment_id AND student_id = :student_id
+    """,
+    "submission counts": """
+        SELECT assignment_id, count(id) FROM submission
+        WHERE student_id = :student_id
+        GROUP BY assignment_id
+    """,
+    "active submissions": """
+        SELECT DISTINCT ON (student_id) * FROM submission
+        WHERE assignment_id = :assignment_id AND submission_time <= now()
+        ORDER BY student_id, submission_time DESC
+    """,
+    "submissions by student": """
+        SELECT students.onyen, submission.*, row_number() OVER (PARTITION BY submission.student_id ORDER BY submission.submission_time DESC)
+        FROM (SELECT student.id, user_account.onyen FROM student JOIN user_account ON user_account.id = student.id ORDER BY user_account.onyen LIMIT 100) AS students
+        LEFT OUTER JOIN submission ON submission.student_id = students.id AND submission.assignment_id = :assignment_id
+        ORDER BY students.onyen, submission.submission_time DESC
+    """,
+    "student extra time": """
+        SELECT * FROM extra_time
+        WHERE assignment_id = :assignment_id AND student_id = :student_id
+    """,
+    "earliest deferral": """
+        SELECT deferred_time FROM extra_time
+        WHERE assignment_id = :assignment_id
+        ORDER BY deferred_time LIMIT 1
+    """
+}
+
+def seed(conn: Connection, num_students: int, num_assignments: int, num_attempts: int):
+    conn.execute(text(f"DROP SCHEMA IF EXISTS { SCHEMA } CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA { SCHEMA }"))
+    conn.execute(text(f"SET search_path TO { SCHEMA }"))
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in TABLES])
+
+    params = { "students": num_students, "assignments": num_assignments, "attempts": num_attempts }
+    conn.execute(text("""
+        INSERT INTO user_account (id, user_type, onyen, name, email, role)
+        SELECT s, 'STUDENT', 'student' || s, 'Student ' || s, 'student' || s || '@example.com', 'student'
+        FROM generate_series(1, :students) s
+    """), params)
+    conn.execute(text("INSERT INTO student (id) SELECT s FROM generate_series(1, :students) s"), params)
+    conn.execute(text("""
+        INSERT INTO assignment (id, name, directory_path, master_notebook_path)
+        SELECT a, 'hw' || a, 'hw' || a, 'hw' || a || '.ipynb'
+        FROM generate_series(1, :assignments) a
+    """), params)
+    # Attempts are spread out over time, with each assignment's submissions in a different window.
+    conn.execute(text("""
+        INSERT INTO submission (id, student_id, assignment_id, commit_id, submission_time)
+        SELECT
+            ((s - 1) * :assignments + (a - 1)) * :attempts + n, s, a,
+            md5(s || '-' || a || '-' || n),
+            now() - make_interval(days => :assignments - a, mins => n * 7 + s % 60)
+        FROM generate_series(1, :students) s, generate_series(1, :assignments) a, generate_series(1, :attempts) n
+    """), params)
+    # Roughly one in ten students has extra time on any given assignment.
+    conn.execute(text("""
+        INSERT INTO extra_time (id, student_id, assignment_id, deferred_time, extra_time)
+        SELECT row_number() OVER (), s, a, interval '1 hour', interval '1 day'
+        FROM generate_series(1, :students) s, generate_series(1, :assignments) a
+        WHERE (s + a) % 10 = 0
+    """), params)
+
+def set_indexes(conn: Connection, enabled: bool):
+    for table_name in ("submission", "extra_time"):
+        for index in Base.metadata.tables[table_name].indexes:
+            if index.name not in INDEXES: continue
+            if enabled: index.create(conn, checkfirst=True)
+            else: conn.execute(text(f"DROP INDEX IF EXISTS { index.name }"))
+    conn.execute(text("ANALYZE"))
+
+def measure(conn: Connection, query: str, num_students: int, num_assignments: int, repetitions: int) -> tuple[list[str], float]:
+    rng = random.Random(0)
+    def random_params():
+        return { "student_id": rng.randint(1, num_students), "assignment_id": rng.randint(1, num_assignments) }
+
+    plan = [row[0] for row in conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) { query }"), random_params())]
+    latencies = []
+    for _ in range(repetitions):
+        params = random_params()
+        start = time.perf_counter()
+        conn.execute(text(query), params).all()
+        latencies.append(time.perf_counter() - start)
+    return plan, statistics.median(latencies)
+
+def run(database_url: str, num_students: int, num_assignments: int, num_attempts: int, repetitions: int, show_plans: bool):
+    engine = create_engine(database_url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        try:
+            print(f"Seeding { num_students } students x { num_assignments } assignments x { num_attempts } attempts")
+            seed(conn, num_students, num_assignments, num_attempts)
+
+            results = {}
+            for enabled in (False, True):
+                set_indexes(conn, enabled)
+                results[enabled] = {
+                    name : measure(conn, query, num_students, num_assignments, repetitions)
+                    for name, query in QUERIES.items()
+                }
+
+            for name in QUERIES:
+                (plan_before, latency_before), (plan_after, latency_after) = results[False][name], results[True][name]
+                print(f"{ name }: { latency_before * 1000:.2f}ms without indexes, { latency_after * 1000:.2f}ms with indexes")
+                if show_plans:
+                    for label, plan in (("without indexes", plan_before), ("with indexes", plan_after)):
+                        print(f"  { label }:")
+                        for line in plan: print(f"    { line }")
+                else:
+                    # The top of the plan, i.e. how the rows are ultimately produced.
+                    print(f"  without indexes: { plan_before[0].strip() }")
+                    print(f"  with indexes: { plan_after[0].strip() }")
+        finally:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS { SCHEMA } CASCADE"))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser("Benchmark the submission and extra_time queries against a synthetic course")
+    parser.add_argument(
+        "--database-url",
+        type=str,
+        default=str(settings.SQLALCHEMY_DATABASE_URI),
+        help=f"Database to benchmark against. Everything is created in (and then removed with) the { SCHEMA } schema"
+    )
+    parser.add_argument("--students", type=int, default=500, help="Number of students")
+    parser.add_argument("--assignments", type=int, default=30, help="Number of assignments")
+    parser.add_argument("--attempts", type=int, default=20, help="Number of submissions per student per assignment")
+    parser.add_argument("--repetitions", type=int, default=50, help="Number of times each query is timed")
+    parser.add_argument("--plans", action="store_true", help="Print each query's full plan, rather than just its top")
+
+    args = parser.parse_args()
+
+    run(args.database_url, args.students, args.assignments, args.attempts, args.repetitions, args.plans)
@@ -5,7 +5,7 @@ import asyncio
 from dotenv import load_dotenv
 from alembic.config import Config
 from alembic import command
-from app.services import LmsSyncService
+from app.services import LmsSyncService, GradingJobService
 from app.database import SessionLocal
 
 def positive_int(value):
@@ -48,6 +48,10 @@ def main(host: str, port: int, reload: bool, workers: int | None=None):
     alembic_cfg = Config("alembic.ini")
     command.upgrade(alembic_cfg, "head")
 
+    # Fail grading jobs left behind by a server that died. Jobs other replicas are still running keep a fresh heartbeat.
+    with SessionLocal() as session:
+        interrupted_count = asyncio.run(GradingJobService(session).fail_interrupted_grading_jobs())
+        if interrupted_count > 0: print(f"Failed { interrupted_count } interrupted grading job(s)")
 
     # Run setup wizard, if required.
     try:
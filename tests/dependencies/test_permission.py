@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+from fastapi.dependencies.utils import get_dependant
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dependencies import (
+    get_db, get_async_db, PermissionDependency, AsyncPermissionDependency,
+    UserIsStudentPermission, UserIsInstructorPermission
+)
+from app.core.exceptions import NotAnInstructorException
+from app.models import StudentModel
+from app.services import UserService
+
+def dependency_calls(dependant):
+    yield dependant.call
+    for dependency in dependant.dependencies:
+        yield from dependency_calls(dependency)
+
+class TestPermissionDependency(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.request = MagicMock()
+        self.request.user.onyen = "student"
+        self.student = StudentModel(id=1, onyen="student", name="Student", email="student@example.com", role=MagicMock())
+
+    def test_dependencies_match_endpoint_session(self):
+        sync_calls = set(dependency_calls(get_dependant(path="/", call=PermissionDependency(UserIsStudentPermission))))
+        async_calls = set(dependency_calls(get_dependant(path="/", call=AsyncPermissionDependency(UserIsStudentPermission))))
+
+        self.assertIn(get_db, sync_calls)
+        self.assertNotIn(get_async_db, sync_calls)
+        self.assertIn(get_async_db, async_calls)
+        self.assertNotIn(get_db, async_calls)
+
+    @patch("app.core.dependencies.permission.settings.DISABLE_AUTHENTICATION", False)
+    async def test_async_permission_dependency_uses_async_session(self):
+        session = MagicMock(spec=AsyncSession)
+        query = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=self.student)))
+
+        with patch("app.services.user.user_service.scalars", query):
+            await AsyncPermissionDependency(UserIsStudentPermission)(self.request, db=session)
+            with self.assertRaises(NotAnInstructorException):
+                await AsyncPermissionDependency(UserIsInstructorPermission)(self.request, db=session)
+
+        self.assertIs(query.await_args_list[0].args[0], session)
+
+    @patch("app.core.dependencies.permission.settings.DISABLE_AUTHENTICATION", False)
+    async def test_async_endpoint_reuses_user_from_permission_check(self):
+        # An unbound session, the student is made persistent in it without a database.
+        session = AsyncSession()
+        make_transient_to_detached(self.student)
+        session.add(self.student)
+        query = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=self.student)))
+
+        with patch("app.services.user.user_service.scalars", query):
+            await AsyncPermissionDependency(UserIsStudentPermission)(self.request, db=session)
+            # As loaded by the endpoint, e.g. GET /users/self.
+            self.assertIs(await UserService(session).get_user_by_onyen("student"), self.student)
+
+        self.assertEqual(query.await_count, 1)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestPermissionDependency)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,59 @@
+import io
+import zipfile
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+from app.api.api_v1.endpoints.submission_router import download_submissions_stream
+from app.models import AssignmentModel, SubmissionModel, StudentModel
+
+class TestSubmissionRouter(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.assignment = AssignmentModel(id=1, directory_path="hw1")
+        self.submissions = []
+        for id, onyen in enumerate(["alice", "bob", "carol", "dave", "erin"], start=1):
+            submission = SubmissionModel(id=id, commit_id=f"commit{ id }", assignment_id=1)
+            submission.student = StudentModel(onyen=onyen)
+            self.submissions.append(submission)
+
+    @patch("app.api.api_v1.endpoints.submission_router.settings.GITEA_DOWNLOAD_CONCURRENCY", 2)
+    @patch("app.api.api_v1.endpoints.submission_router.CourseService")
+    @patch("app.api.api_v1.endpoints.submission_router.GiteaService")
+    async def test_download_submissions_stream_pipes_archives(self, mock_gitea_service, mock_course_service):
+        mock_course_service.return_value.get_student_repository_name = AsyncMock(side_effect=lambda onyen: f"{ onyen }-repo")
+        open_streams = set()
+        max_open_streams = 0
+
+        async def stream_repository(name, owner, treeish_id, path):
+            nonlocal max_open_streams
+            if owner == "bob": raise RuntimeError("repository not found")
+            async def iter_archive():
+                try:
+                    for i in range(3):
+                        if owner == "dave" and i == 1: raise RuntimeError("connection reset")
+                        yield f"{ owner }-{ i };".encode()
+                finally:
+                    open_streams.discard(owner)
+            open_streams.add(owner)
+            max_open_streams = max(max_open_streams, len(open_streams))
+            return "archive.zip", iter_archive()
+        mock_gitea_service.return_value.stream_repository = stream_repository
+
+        response = await download_submissions_stream(MagicMock(), self.assignment, self.submissions)
+        content = b"".join([chunk async for chunk in response.body_iterator])
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(archive.read("assn1-alice-subm1.zip"), b"alice-0;alice-1;alice-2;")
+            self.assertEqual(archive.read("assn1-erin-subm5.zip"), b"erin-0;erin-1;erin-2;")
+            # Cut off partway, so only what was downloaded is there.
+            self.assertEqual(archive.read("assn1-dave-subm4.zip"), b"dave-0;")
+            errors = archive.read("errors.txt").decode().splitlines()
+        self.assertNotIn("assn1-bob-subm2.zip", archive.namelist())
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith("bob (submission 2)"))
+        self.assertTrue(errors[1].startswith("dave (submission 4): download was cut off"))
+        # Archives are streamed, only a bounded number of them are open at once and all of them are closed.
+        self.assertLessEqual(max_open_streams, 2)
+        self.assertEqual(open_streams, set())
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSubmissionRouter)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,10 +1,12 @@
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, timezone, date
 import json
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, AsyncMock, patch
 from sqlalchemy.orm import Session
-from app.services import AssignmentService
-from app.models import AssignmentModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services import AssignmentService, SubmissionService
+from app.models import AssignmentModel, StudentModel, ExtraTimeModel
+from app.models.course import CourseModel
 from app.schemas import UpdateAssignmentSchema
 from app.core.exceptions import AssignmentNotFoundException
 
@@ -39,10 +41,10 @@ class TestAssignmentService(unittest.IsolatedAsyncioTestCase):
         mock_assignment = self.assignment_data["unavialable"]
         mock_assignment_2 = self.assignment_data["available"]
 
-        self.mock_session.query().filter_by().first.return_value = mock_assignment
+        self.mock_session.scalars().first.return_value = mock_assignment
         result_1 = await self.assignment_service.get_assignment_by_id(id=1)
 
-        self.mock_session.query().filter_by().first.return_value = mock_assignment_2
+        self.mock_session.scalars().first.return_value = mock_assignment_2
         result_2 = await self.assignment_service.get_assignment_by_id(id=2)
         
         self.assertEqual(result_1, mock_assignment)
@@ -50,11 +52,50 @@ class TestAssignmentService(unittest.IsolatedAsyncioTestCase):
 
 
     async def test_get_assignment_by_id_not_found(self):
-        self.mock_session.query().filter_by().first.return_value = None
+        self.mock_session.scalars().first.return_value = None
 
         with self.assertRaises(AssignmentNotFoundException):
             await self.assignment_service.get_assignment_by_id(id=1)
 
+    async def test_get_assignment_by_id_async_session(self):
+        mock_assignment = self.assignment_data["available"]
+        mock_session = MagicMock(spec=AsyncSession)
+        mock_session.scalars = AsyncMock(return_value=MagicMock(first=MagicMock(return_value=mock_assignment)))
+
+        result = await AssignmentService(session=mock_session).get_assignment_by_id(id=1)
+
+        mock_session.scalars.assert_awaited_once()
+        self.assertEqual(result, mock_assignment)
+
+    async def test_get_student_assignment_schemas_batches_queries(self):
+        now = datetime.now(timezone.utc)
+        course = CourseModel(start_at=now - timedelta(days=30), end_at=now + timedelta(days=30))
+        student = StudentModel(id=1, onyen="student", base_extra_time=timedelta(0))
+        assignments = [
+            AssignmentModel(
+                id=i, name=f"hw{ i }", directory_path=f"hw{ i }", master_notebook_path=f"hw{ i }.ipynb",
+                grader_question_feedback=True, created_date=now, last_modified_date=now, is_published=True,
+                manual_grading=False, autograde_on_submit=False,
+                available_date=now - timedelta(days=2), due_date=now - timedelta(hours=1)
+            )
+            for i in range(3)
+        ]
+        self.mock_session.scalar.return_value = now
+        self.mock_session.query().filter.return_value = [
+            ExtraTimeModel(assignment_id=1, deferred_time=timedelta(0), extra_time=timedelta(days=1))
+        ]
+        self.mock_session.query.reset_mock()
+
+        with patch.object(SubmissionService, "get_submission_counts", AsyncMock(return_value={ 0: 2 })):
+            schemas = await self.assignment_service.get_student_assignment_schemas(student, assignments, course)
+
+        # One clock snapshot and one extra time query, regardless of the number of assignments.
+        self.assertEqual(self.mock_session.scalar.call_count, 1)
+        self.assertEqual(self.mock_session.query.call_count, 1)
+        self.assertEqual([s.current_attempts for s in schemas], [2, 0, 0])
+        self.assertEqual([s.is_closed for s in schemas], [True, False, True])
+        self.assertTrue(schemas[1].is_extended)
+
     async def test_get_assignments_success(self):
         mock_assignments = [
             self.assignment_data["available"],
@@ -0,0 +1,132 @@
+import httpx
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+from app.services.canvas_service import CanvasService, CanvasGradeBody, CanvasRequestScheduler, canvas_user_index
+from app.models.user import UserType
+from app.core.exceptions import LMSBackendException, LMSUserNotFoundException
+
+class TestCanvasService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mock_session = MagicMock()
+        self.canvas_service = CanvasService(self.mock_session)
+        canvas_user_index.clear()
+        self.scheduler = CanvasRequestScheduler(max_limit=16)
+        scheduler_patch = patch("app.services.canvas_service.canvas_request_scheduler", self.scheduler)
+        scheduler_patch.start()
+        self.addCleanup(scheduler_patch.stop)
+
+    @patch("app.services.canvas_service.asyncio.sleep", AsyncMock())
+    async def test_upload_assignment_grades_batches_and_waits(self):
+        self.canvas_service._post = AsyncMock(side_effect=[
+            { "id": 1, "workflow_state": "queued" },
+            { "id": 2, "workflow_state": "completed" }
+        ])
+        self.canvas_service._get = AsyncMock(side_effect=[
+            { "id": 1, "workflow_state": "running" },
+            { "id": 1, "workflow_state": "completed" }
+        ])
+        grades = [CanvasGradeBody(user_id=i, grade_proportion=0.5, comments="ok" if i == 0 else None) for i in range(3)]
+
+        await self.canvas_service.upload_assignment_grades(7, grades, batch_size=2)
+
+        self.assertEqual(self.canvas_service._post.await_count, 2)
+        first_batch = self.canvas_service._post.await_args_list[0].kwargs["json"]["grade_data"]
+        self.assertEqual(first_batch["0"], { "posted_grade": "50.0%", "text_comment": "ok" })
+        self.assertEqual(first_batch["1"], { "posted_grade": "50.0%" })
+        self.assertEqual(self.canvas_service._get.await_count, 2)
+
+    async def test_get_user_by_pid_uses_index(self):
+        self.canvas_service.get_users = AsyncMock(return_value=[
+            { "id": 1, "sis_user_id": "111" },
+            { "id": 2, "sis_user_id": "222" }
+        ])
+
+        self.assertEqual((await self.canvas_service.get_student_by_pid("111"))["id"], 1)
+        self.assertEqual((await self.canvas_service.get_student_by_pid("222"))["id"], 2)
+        self.canvas_service.get_users.assert_awaited_once_with(UserType.STUDENT)
+
+    async def test_get_user_by_pid_refreshes_on_miss(self):
+        self.canvas_service.get_users = AsyncMock(side_effect=[
+            [{ "id": 1, "sis_user_id": "111" }],
+            [{ "id": 1, "sis_user_id": "111" }, { "id": 3, "sis_user_id": "333" }],
+            [{ "id": 1, "sis_user_id": "111" }, { "id": 3, "sis_user_id": "333" }]
+        ])
+        await self.canvas_service.get_student_by_pid("111")
+
+        self.assertEqual((await self.canvas_service.get_student_by_pid("333"))["id"], 3)
+        with self.assertRaises(LMSUserNotFoundException):
+            await self.canvas_service.get_student_by_pid("444")
+        self.assertEqual(self.canvas_service.get_users.await_count, 3)
+
+    async def test_get_paginated_fetches_numbered_pages(self):
+        base = "https://canvas.test/api/v1/courses/1/users"
+        async def request(method, url, headers={}, **kwargs):
+            page = int(httpx.URL(url).params.get("page", 1))
+            return httpx.Response(
+                200,
+                json=[{ "id": page }],
+                headers={ "Link": f'<{ base }?page=2&per_page=100>; rel="next", <{ base }?page=3&per_page=100>; rel="last"' },
+                request=httpx.Request(method, url)
+            )
+        self.canvas_service.client.request = AsyncMock(side_effect=request)
+
+        users = await self.canvas_service._get_paginated("courses/1/users")
+
+        self.assertEqual(users, [{ "id": 1 }, { "id": 2 }, { "id": 3 }])
+        self.assertEqual(self.canvas_service.client.request.await_count, 3)
+
+    async def test_get_paginated_follows_bookmarks(self):
+        base = "https://canvas.test/api/v1/courses/1/students/submissions"
+        responses = {
+            "first": (f'<{ base }?page=bookmark:abc>; rel="next"', [{ "id": 1 }]),
+            "bookmark:abc": (f'<{ base }?page=bookmark:def>; rel="next"', [{ "id": 2 }]),
+            "bookmark:def": ("", [{ "id": 3 }])
+        }
+        async def request(method, url, headers={}, **kwargs):
+            link, items = responses[httpx.URL(url).params.get("page", "first")]
+            return httpx.Response(200, json=items, headers={ "Link": link }, request=httpx.Request(method, url))
+        self.canvas_service.client.request = AsyncMock(side_effect=request)
+
+        submissions = await self.canvas_service._get_paginated("courses/1/students/submissions")
+
+        self.assertEqual(submissions, [{ "id": 1 }, { "id": 2 }, { "id": 3 }])
+
+    @patch("app.services.canvas_service.asyncio.sleep", AsyncMock())
+    async def test_request_retries_when_throttled(self):
+        request = httpx.Request("GET", "https://canvas.test/api/v1/courses/1")
+        self.canvas_service.client.request = AsyncMock(side_effect=[
+            httpx.Response(403, text="403 Forbidden (Rate Limit Exceeded)", request=request),
+            httpx.Response(200, json={ "id": 1 }, headers={ "X-Rate-Limit-Remaining": "650.0", "X-Request-Cost": "1.5" }, request=request)
+        ])
+
+        self.assertEqual(await self.canvas_service._get("courses/1"), { "id": 1 })
+        metrics = await self.canvas_service.get_request_metrics()
+        self.assertEqual(metrics["throttled_count"], 1)
+        self.assertEqual(metrics["rate_limit_remaining"], 650.0)
+        self.assertEqual(metrics["last_request_cost"], 1.5)
+        self.assertEqual(metrics["in_flight"], 0)
+
+    def test_scheduler_adapts_to_remaining_budget(self):
+        request = httpx.Request("GET", "https://canvas.test/api/v1/courses/1")
+        healthy = httpx.Response(200, headers={ "X-Rate-Limit-Remaining": "600" }, request=request)
+        running_dry = httpx.Response(200, headers={ "X-Rate-Limit-Remaining": "50" }, request=request)
+
+        for _ in range(20): self.scheduler.on_response(healthy)
+        grown_limit = self.scheduler.limit
+        self.assertGreater(grown_limit, 4)
+        self.scheduler.on_response(running_dry)
+        self.assertEqual(self.scheduler.limit, grown_limit / 2)
+
+    async def test_wait_for_progress_failed(self):
+        with self.assertRaises(LMSBackendException):
+            await self.canvas_service.wait_for_progress({ "id": 1, "workflow_state": "failed", "message": "bad grade" })
+
+    async def test_wait_for_progress_timeout(self):
+        self.canvas_service._get = AsyncMock(return_value={ "id": 1, "workflow_state": "running" })
+        with self.assertRaises(LMSBackendException):
+            await self.canvas_service.wait_for_progress({ "id": 1, "workflow_state": "queued" }, poll_interval=0.01, timeout=0.05)
+        self.assertGreater(self.canvas_service._get.await_count, 0)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestCanvasService)
+unittest.TextTestRunner(verbosity=2).run(suite)
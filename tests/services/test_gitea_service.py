@@ -0,0 +1,140 @@
+import json
+import httpx
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+from app.core.utils.disk_cache import DiskLRUCache
+from datetime import datetime, timezone
+from app.services import GiteaService, AssignmentService, CourseService
+from app.models import AssignmentModel
+from app.events.handlers import update_master_repo_prereceive_hook
+
+COMMIT_ID = "3f786850e387550fdab836ed7e6dc881de23001b"
+
+class TestGiteaService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = DiskLRUCache(self.temp_dir.name, max_bytes=1024 * 1024)
+        cache_patch = patch("app.services.gitea_service.repository_archive_cache", self.cache)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        self.client = MagicMock()
+        self.client.request = AsyncMock(side_effect=lambda method, url, **kwargs: httpx.Response(
+            200,
+            content=b"archive",
+            headers={ "Content-Disposition": 'attachment; filename="repo.zip"' },
+            request=httpx.Request(method, "http://gitea-assist/repos/download")
+        ))
+        self.gitea_service = GiteaService(MagicMock(), client=self.client)
+
+    async def asyncTearDown(self):
+        self.temp_dir.cleanup()
+
+    async def test_download_repository_caches_commit_archives(self):
+        for _ in range(2):
+            archive = await self.gitea_service.download_repository("repo", "student", COMMIT_ID, "hw1")
+            self.assertEqual(archive.read(), b"archive")
+            self.assertEqual(archive.name, "repo.zip")
+
+        self.assertEqual(self.client.request.await_count, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    async def test_download_repository_does_not_cache_branches(self):
+        for _ in range(2):
+            await self.gitea_service.download_repository("repo", "student", "main", "hw1")
+
+        self.assertEqual(self.client.request.await_count, 2)
+
+
+    async def test_stream_repository_writes_through_to_cache(self):
+        requests = []
+        def handler(request: httpx.Request):
+            requests.append(request)
+            return httpx.Response(
+                200,
+                content=b"archive" * 1000,
+                headers={ "Content-Disposition": 'attachment; filename="repo.zip"' }
+            )
+        async with httpx.AsyncClient(base_url="http://gitea-assist", transport=httpx.MockTransport(handler)) as client:
+            gitea_service = GiteaService(MagicMock(), client=client)
+            for _ in range(2):
+                file_name, archive_stream = await gitea_service.stream_repository("repo", "student", COMMIT_ID, "hw1", chunk_size=512)
+                self.assertEqual(file_name, "repo.zip")
+                self.assertEqual(b"".join([chunk async for chunk in archive_stream]), b"archive" * 1000)
+
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    async def test_stream_repository_raises_before_streaming(self):
+        async with httpx.AsyncClient(
+            base_url="http://gitea-assist",
+            transport=httpx.MockTransport(lambda request: httpx.Response(404))
+        ) as client:
+            with self.assertRaises(httpx.HTTPStatusError):
+                await GiteaService(MagicMock(), client=client).stream_repository("repo", "student", COMMIT_ID)
+
+        self.assertEqual(list(self.cache.directory.iterdir()), [])
+
+    @patch.object(CourseService, "get_instructor_gitea_organization_name", AsyncMock(return_value="instructors"))
+    @patch.object(CourseService, "get_master_repository_name", AsyncMock(return_value="course"))
+    @patch.object(AssignmentService, "get_overwritable_files", AsyncMock(return_value=["data.csv"]))
+    @patch.object(AssignmentService, "get_protected_files", AsyncMock(return_value=["grades.csv"]))
+    @patch.object(AssignmentService, "get_assignments")
+    @patch("app.events.handlers.SessionLocal", MagicMock())
+    async def test_update_master_repo_prereceive_hook_skips_unchanged_hook(self, mock_get_assignments):
+        mock_get_assignments.return_value = [AssignmentModel(
+            directory_path="hw1",
+            available_date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            due_date=datetime(2026, 2, 1, tzinfo=timezone.utc)
+        )]
+        # Stands in for Gitea, which is shared with the other workers.
+        hooks = {}
+        uploads = []
+        def handler(request: httpx.Request) -> httpx.Response:
+            key = (request.url.params.get("owner"), request.url.params.get("name"), request.url.params.get("hook_id"))
+            if request.method == "GET":
+                if key not in hooks: return httpx.Response(404)
+                return httpx.Response(200, json={ "content": hooks[key] })
+            body = json.loads(request.content)
+            hooks[(body["owner"], body["name"], body["hook_id"])] = body["content"]
+            uploads.append(body["content"])
+            return httpx.Response(200)
+
+        async with httpx.AsyncClient(base_url="http://gitea-assist", transport=httpx.MockTransport(handler)) as client:
+            with patch("app.services.gitea_service.http_clients.get", return_value=client):
+                await update_master_repo_prereceive_hook()
+                await update_master_repo_prereceive_hook()
+                self.assertEqual(len(uploads), 1)
+
+                mock_get_assignments.return_value[0].directory_path = "homework1"
+                await update_master_repo_prereceive_hook()
+
+        self.assertEqual(len(uploads), 2)
+        self.assertIn("homework1", uploads[1])
+
+    def test_compile_glob_matcher(self):
+        matcher = GiteaService._compile_glob_matcher("is_protected", {
+            "hw1": ["*grades.csv", "**/.ssh", "hw1.ipynb"],
+            "hw1/it's nested": ["data[0-9].csv"]
+        })
+        files = [
+            "hw1/final_grades.csv",
+            "hw1/a/b/.ssh",
+            "hw1/hw1.ipynb",
+            "hw1/it's nested/data3.csv",
+            "hw1/hw1.ipynb.bak",
+            "hw2/final_grades.csv",
+            "hw1/it's nested/dataX.csv"
+        ]
+        script = matcher + "\n" + "\n".join([
+            f"is_protected { GiteaService._quote_bash_literal(file) } && echo 1 || echo 0" for file in files
+        ])
+
+        output = subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.split(), ["1", "1", "1", "1", "0", "0", "0"])
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestGiteaService)
+unittest.TextTestRunner(verbosity=2).run(suite)
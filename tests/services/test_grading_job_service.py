@@ -0,0 +1,112 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql
+from app.services import GradingJobService
+from app.models import AssignmentModel, GradingJobModel
+from app.enums.grading_job_status import GradingJobStatus
+from app.core.exceptions import GradingJobAlreadyActiveException, GradingJobNotCompletedException
+
+class TestGradingJobService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mock_session = MagicMock()
+        self.grading_job_service = GradingJobService(session=self.mock_session)
+        self.assignment = AssignmentModel(id=1, name="assignment", manual_grading=False)
+
+    async def test_create_grading_job_already_active(self):
+        self.mock_session.query().filter_by().filter().first.return_value = GradingJobModel(
+            assignment_id=1,
+            status=GradingJobStatus.RUNNING.value
+        )
+
+        with self.assertRaises(GradingJobAlreadyActiveException):
+            await self.grading_job_service.create_grading_job(self.assignment, "{}", "{}")
+
+    async def test_create_grading_job_concurrently_active(self):
+        # Another request created a job between the check and the insert.
+        self.mock_session.query().filter_by().filter().first.return_value = None
+        # Interrupted jobs are failed first, then inserting the new job conflicts.
+        self.mock_session.commit.side_effect = [None, IntegrityError("INSERT", {}, Exception("duplicate key"))]
+
+        with self.assertRaises(GradingJobAlreadyActiveException):
+            await self.grading_job_service.create_grading_job(self.assignment, "{}", "{}")
+        self.mock_session.rollback.assert_called_once()
+
+    @patch("app.services.grading_job_service.dispatch")
+    @patch("app.services.grading_job_service.background_tasks")
+    async def test_create_grading_job_runs_in_background(self, mock_background_tasks, mock_dispatch):
+        self.mock_session.query().filter_by().filter().first.return_value = None
+
+        grading_job = await self.grading_job_service.create_grading_job(self.assignment, "{}", "{}")
+
+        # The job is handed off to the app rather than run as part of the request.
+        self.assertEqual(grading_job.status, GradingJobStatus.QUEUED.value)
+        mock_background_tasks.start.assert_called_once()
+        mock_background_tasks.start.call_args.args[0].close()
+
+    async def test_fail_interrupted_grading_jobs_only_fails_stale_jobs(self):
+        self.mock_session.query().filter().filter().filter().update.return_value = 1
+
+        self.assertEqual(await self.grading_job_service.fail_interrupted_grading_jobs(self.assignment), 1)
+
+        criteria = [
+            str(call.args[0].compile(dialect=postgresql.dialect()))
+            for call in self.mock_session.query().filter.call_args_list
+            + self.mock_session.query().filter().filter.call_args_list
+            + self.mock_session.query().filter().filter().filter.call_args_list
+            if len(call.args) > 0
+        ]
+        # Jobs that other servers are still running keep their heartbeat fresh.
+        self.assertIn("grading_job.heartbeat_date < CURRENT_TIMESTAMP - %(current_timestamp_1)s", criteria)
+        self.assertIn("grading_job.assignment_id = %(assignment_id_1)s", criteria)
+        self.mock_session.commit.assert_called_once()
+
+    async def test_get_grade_report_not_completed(self):
+        grading_job = GradingJobModel(assignment_id=1, status=GradingJobStatus.RUNNING.value)
+
+        with self.assertRaises(GradingJobNotCompletedException):
+            await self.grading_job_service.get_grade_report(grading_job)
+
+    @patch("app.services.GradingService")
+    async def test_run_grading_job_records_progress(self, mock_grading_service):
+        async def grade_assignment(*args, progress_callback, **kwargs):
+            await progress_callback(3, 2, 1)
+            return MagicMock(id=7)
+        mock_grading_service.return_value.grade_assignment = grade_assignment
+        grading_job = GradingJobModel(id=1, assignment=self.assignment, master_notebook_content="{}", otter_config_content="{}")
+
+        await self.grading_job_service.run_grading_job(grading_job)
+
+        self.assertEqual(grading_job.status, GradingJobStatus.COMPLETED.value)
+        self.assertEqual(grading_job.total_submissions, 3)
+        self.assertEqual(grading_job.graded_submissions, 2)
+        self.assertEqual(grading_job.failed_submissions, 1)
+        self.assertEqual(grading_job.grade_report_id, 7)
+
+    @patch("app.services.GradingService")
+    async def test_run_grading_job_failure(self, mock_grading_service):
+        mock_grading_service.return_value.grade_assignment = AsyncMock(side_effect=RuntimeError("gitea is down"))
+        grading_job = GradingJobModel(id=1, assignment=self.assignment, master_notebook_content="{}", otter_config_content="{}")
+
+        await self.grading_job_service.run_grading_job(grading_job)
+
+        self.assertEqual(grading_job.status, GradingJobStatus.FAILED.value)
+        self.assertEqual(grading_job.error_message, "gitea is down")
+        self.assertIsNotNone(grading_job.finished_date)
+
+    @patch("app.services.GradingService")
+    async def test_run_grading_job_cancelled(self, mock_grading_service):
+        mock_grading_service.return_value.grade_assignment = AsyncMock(side_effect=asyncio.CancelledError())
+        grading_job = GradingJobModel(id=1, assignment=self.assignment, master_notebook_content="{}", otter_config_content="{}")
+
+        with self.assertRaises(asyncio.CancelledError):
+            await self.grading_job_service.run_grading_job(grading_job)
+
+        # The server is shutting down, the job won't be finished.
+        self.assertEqual(grading_job.status, GradingJobStatus.FAILED.value)
+        self.assertIsNotNone(grading_job.finished_date)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestGradingJobService)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,171 @@
+import asyncio
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, AsyncMock, patch
+from app.core.utils.disk_cache import DiskLRUCache
+from app.services import GradingService
+from app.services.grading_service import GradingWorkerPool, background_grading_pool
+from app.models import SubmissionModel, StudentModel, AssignmentModel, GradeResultModel, AssignmentAutograderModel
+
+def make_submission(id: int, onyen: str) -> SubmissionModel:
+    submission = SubmissionModel(id=id, commit_id=f"commit{ id }", graded=False)
+    submission.student = StudentModel(onyen=onyen)
+    submission.assignment = AssignmentModel(directory_path="hw1", master_notebook_path="hw1.ipynb", manual_grading=False)
+    return submission
+
+def fake_otter_grader(submission_notebook_path: str, otter_config_path: str, output_path: str, debug: bool) -> dict:
+    if "broken" in submission_notebook_path:
+        raise RuntimeError("kernel died")
+    return {
+        "tests": [
+            { "name": "q1", "score": 1, "max_score": 2 },
+            { "name": "q2", "score": 2, "max_score": 2 },
+            { "name": "public", "output": "q1 - 1 passed" }
+        ]
+    }
+
+class TestGradingService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mock_session = MagicMock()
+        self.grading_service = GradingService(session=self.mock_session)
+
+    def test_compute_submission_grade(self):
+        submission = make_submission(1, "student")
+        grade_data = fake_otter_grader("submission.ipynb", "config.zip", "out.json", False)
+
+        result = GradingService._compute_submission_grade(submission, grade_data)
+
+        self.assertEqual(result.score, 3)
+        self.assertEqual(result.total_points, 4)
+        self.assertEqual(result.comments, "q1 - 1 passed")
+        self.assertEqual(result.submission_already_graded, False)
+
+    @patch("app.services.grading_service._run_otter_grader", fake_otter_grader)
+    @patch("app.services.grading_service.ProcessPoolExecutor", ThreadPoolExecutor)
+    async def test_grade_submissions_isolates_failures(self):
+        good_submission = make_submission(1, "good")
+        broken_submission = make_submission(2, "broken")
+        missing_submission = make_submission(3, "missing")
+
+        async def load_submission_archive(submission, parent_dir):
+            if submission is missing_submission:
+                raise RuntimeError("archive not found")
+            return f"/tmp/{ submission.student.onyen }/submission.ipynb", b""
+        self.grading_service.load_submission_archive = load_submission_archive
+        progress_callback = AsyncMock()
+
+        result = await self.grading_service.grade_submissions(
+            [good_submission, broken_submission, missing_submission],
+            "/tmp/config.zip",
+            "/tmp",
+            progress_callback=progress_callback
+        )
+
+        self.assertEqual(list(result.keys()), [good_submission])
+        self.assertEqual(len(result[good_submission]["tests"]), 3)
+        self.assertEqual(progress_callback.await_count, 3)
+        progress_callback.assert_awaited_with(1, 2)
+
+    @patch("app.services.grading_service._run_otter_grader", fake_otter_grader)
+    @patch("app.services.grading_service.ProcessPoolExecutor", ThreadPoolExecutor)
+    @patch("app.services.grading_service.settings.GRADING_MAX_WORKERS", 1)
+    async def test_grade_submissions_survives_progress_callback_failures(self):
+        submissions = [make_submission(id, f"student{ id }") for id in range(1, 6)]
+
+        async def load_submission_archive(submission, parent_dir):
+            return f"/tmp/{ submission.student.onyen }/submission.ipynb", b""
+        self.grading_service.load_submission_archive = load_submission_archive
+        progress_callback = AsyncMock(side_effect=RuntimeError("job was deleted"))
+
+        result = await asyncio.wait_for(
+            self.grading_service.grade_submissions(submissions, "/tmp/config.zip", "/tmp", progress_callback=progress_callback),
+            timeout=10
+        )
+
+        self.assertEqual(list(result.keys()), submissions)
+        self.assertEqual(progress_callback.await_count, 5)
+
+    async def test_grading_worker_pool_replaces_broken_executor(self):
+        class BrokenExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                raise BrokenProcessPool("a worker died")
+
+        pool = GradingWorkerPool(max_workers=1)
+        with patch("app.services.grading_service.ProcessPoolExecutor", BrokenExecutor):
+            with self.assertRaises(BrokenProcessPool):
+                await pool.run(fake_otter_grader, "submission.ipynb", "config.zip", "out.json", False)
+        with patch("app.services.grading_service.ProcessPoolExecutor", ThreadPoolExecutor):
+            result = await pool.run(fake_otter_grader, "submission.ipynb", "config.zip", "out.json", False)
+        pool.shutdown()
+
+        self.assertEqual(len(result["tests"]), 3)
+
+    async def test_precompute_submission_grade_requires_opt_in(self):
+        submission = make_submission(1, "student")
+        submission.assignment.autograde_on_submit = False
+        self.grading_service.grade_submissions = AsyncMock()
+
+        await self.grading_service.precompute_submission_grade(submission)
+
+        self.grading_service.grade_submissions.assert_not_awaited()
+
+    async def test_precompute_submission_grade_caches_result(self):
+        submission = make_submission(1, "student")
+        submission.assignment.autograde_on_submit = True
+        submission.assignment.autograder = AssignmentAutograderModel(
+            master_notebook_content="{}",
+            otter_config_content="{}",
+            requirements_txt_content="otter-grader==5.5.0"
+        )
+        self.mock_session.query().filter().filter().all.return_value = []
+        self.grading_service.generate_config = AsyncMock(return_value=("{}", b"zip"))
+        self.grading_service.grade_submissions = AsyncMock(return_value={ submission: { "tests": [] } })
+        self.grading_service.cache_grade_data = AsyncMock()
+
+        await self.grading_service.precompute_submission_grade(submission)
+
+        self.grading_service.grade_submissions.assert_awaited_once()
+        # Precomputes share one bounded pool, rather than forking a pool's worth of processes per submission.
+        self.assertIs(self.grading_service.grade_submissions.await_args.kwargs["pool"], background_grading_pool)
+        self.grading_service.cache_grade_data.assert_awaited_once_with(
+            { submission: { "tests": [] } },
+            self.grading_service.compute_autograder_hash("{}", "{}", "otter-grader==5.5.0")
+        )
+
+    async def test_generate_config_reuses_cached_output(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_otter_assign = AsyncMock(return_value=("graded notebook", b"autograder zip"))
+            with patch("app.services.grading_service.otter_assign_cache", DiskLRUCache(temp_dir, 1024 * 1024)), \
+                    patch.object(self.grading_service, "_run_otter_assign", mock_otter_assign):
+                first = await self.grading_service.generate_config("notebook", "config", "requirements")
+                second = await self.grading_service.generate_config("notebook", "config", "requirements")
+                await self.grading_service.generate_config("changed notebook", "config", "requirements")
+
+        self.assertEqual(first, ("graded notebook", b"autograder zip"))
+        self.assertEqual(second, first)
+        self.assertEqual(mock_otter_assign.await_count, 2)
+
+    async def test_get_cached_grade_data(self):
+        changed_submission = make_submission(1, "changed")
+        unchanged_submission = make_submission(2, "unchanged")
+        self.mock_session.query().filter().filter().all.return_value = [
+            GradeResultModel(commit_id="commit2", notebook_path="hw1/hw1-student.ipynb", grade_data={ "tests": [] }),
+            # Same commit, but a different notebook was graded.
+            GradeResultModel(commit_id="commit1", notebook_path="hw1/other.ipynb", grade_data={ "tests": [] })
+        ]
+
+        result = await self.grading_service.get_cached_grade_data([changed_submission, unchanged_submission], "hash")
+
+        self.assertEqual(result, { unchanged_submission: { "tests": [] } })
+
+    def test_compute_autograder_hash_separates_inputs(self):
+        self.assertNotEqual(
+            GradingService.compute_autograder_hash("ab", "c", ""),
+            GradingService.compute_autograder_hash("a", "bc", "")
+        )
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestGradingService)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import MagicMock
+from app.services.ldap_service import LDAPService
+from app.core.exceptions import UserNotFoundException
+
+def mock_entry(pid: str, onyen: str):
+    entry = MagicMock()
+    entry.pid.value = pid
+    entry.uid.value = onyen
+    entry.givenName.value = onyen.capitalize()
+    entry.sn.value = "Student"
+    entry.mail.value = f"{ onyen }@unc.edu"
+    return entry
+
+class TestLDAPService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.ldap_service = LDAPService()
+        self.conn = MagicMock()
+        self.conn.__enter__.return_value = self.conn
+        self.ldap_service._connect = MagicMock(return_value=self.conn)
+
+    def test_get_users_info_batches_over_one_connection(self):
+        entries = [[mock_entry("111", "alice"), mock_entry("222", "bob")], [mock_entry("333", "carol")]]
+        def search(**kwargs):
+            self.conn.entries = entries.pop(0)
+        self.conn.search.side_effect = search
+
+        users_info = self.ldap_service.get_users_info(["111", "222", "333", "444"], batch_size=2)
+
+        self.ldap_service._connect.assert_called_once()
+        self.assertEqual(self.conn.search.call_count, 2)
+        self.assertEqual(
+            self.conn.search.call_args_list[0].kwargs["search_filter"],
+            "(&(objectClass=uncperson)(|(pid=111)(pid=222)))"
+        )
+        self.assertEqual({ pid : info.onyen for pid, info in users_info.items() }, { "111": "alice", "222": "bob", "333": "carol" })
+
+    def test_get_users_info_escapes_pids(self):
+        self.assertEqual(
+            LDAPService._build_search_filter(["*)(uid=*"]),
+            "(&(objectClass=uncperson)(|(pid=\\2a\\29\\28uid=\\2a)))"
+        )
+
+    def test_get_user_info_not_found(self):
+        self.conn.entries = []
+        with self.assertRaises(UserNotFoundException):
+            self.ldap_service.get_user_info("111")
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestLDAPService)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+from app.services.lms_sync_service import LmsSyncService, RosterDiff
+from app.services.ldap_service import LDAPUserInfoSchema
+from app.schemas import CreateStudentResultSchema
+from app.models import StudentModel, InstructorModel
+from app.models.user import UserType
+
+class TestLmsSyncService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mock_session = MagicMock()
+        self.lms_sync_service = LmsSyncService(self.mock_session)
+
+    def test_roster_diff(self):
+        kept = StudentModel(onyen="kept", user_type=UserType.STUDENT)
+        dropped = StudentModel(onyen="dropped", user_type=UserType.STUDENT)
+        unmapped = StudentModel(onyen="unmapped", user_type=UserType.STUDENT)
+        instructor = InstructorModel(onyen="instructor", user_type=UserType.INSTRUCTOR)
+        db_users = [(kept, "111"), (dropped, "222"), (unmapped, None), (instructor, "999")]
+        lms_users = [{ "sis_user_id": "111" }, { "sis_user_id": "333" }, { "sis_user_id": "999" }, { "sis_user_id": None }]
+
+        diff = RosterDiff.compute(db_users, lms_users, UserType.STUDENT)
+
+        self.assertEqual(diff.unchanged, [kept])
+        self.assertEqual(diff.delete, [dropped])
+        # Users already associated with the PID (even as a different user type) aren't created again.
+        self.assertEqual([u["sis_user_id"] for u in diff.create], ["333", None])
+        self.assertEqual(diff.onyens, { "kept", "dropped", "unmapped", "instructor" })
+
+    async def test_sync_students_only_provisions_deltas(self):
+        canvas_service = self.lms_sync_service.canvas_service = MagicMock()
+        student_service = self.lms_sync_service.student_service = MagicMock()
+        ldap_service = self.lms_sync_service.ldap_service = MagicMock()
+
+        canvas_service.refresh_user_index = AsyncMock(return_value=[
+            { "sis_user_id": "111:UNC", "email": "kept@unc.edu", "name": "Kept" },
+            { "sis_user_id": "333:UNC", "email": "new@unc.edu", "name": "New" }
+        ])
+        canvas_service.get_users_with_pids = AsyncMock(return_value=[
+            (StudentModel(onyen="kept", user_type=UserType.STUDENT), "111"),
+            (StudentModel(onyen="dropped", user_type=UserType.STUDENT), "222")
+        ])
+        canvas_service.unassociate_pid_from_user = AsyncMock()
+        canvas_service.associate_pid_to_user = AsyncMock()
+        student_service.delete_user = AsyncMock()
+        student_service.create_students = AsyncMock(return_value=[CreateStudentResultSchema(onyen="new", success=True)])
+        ldap_service.get_users_info.return_value = {
+            "333": LDAPUserInfoSchema(onyen="new", first_name="New", last_name="Student", email="new@unc.edu")
+        }
+
+        await self.lms_sync_service.sync_students()
+
+        student_service.delete_user.assert_awaited_once_with("dropped")
+        # Students who are already associated with their PID aren't looked up again.
+        ldap_service.get_users_info.assert_called_once_with(["333"])
+        self.assertEqual([s.onyen for s in student_service.create_students.await_args.args[0]], ["new"])
+        canvas_service.associate_pid_to_user.assert_awaited_once_with("new", "333")
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestLmsSyncService)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,9 +1,10 @@
 import unittest
 from unittest import mock
 from unittest.mock import patch, MagicMock
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from app.services.user.student_service import StudentService  # Adjust the import based on your actual structure
 from app.models import StudentModel
+from app.schemas import CreateStudentSchema
 from app.core.exceptions import NotAStudentException, UserAlreadyExistsException, UserNotFoundException
 
 class TestStudentService(unittest.IsolatedAsyncioTestCase):
@@ -45,6 +46,49 @@ class TestStudentService(unittest.IsolatedAsyncioTestCase):
                     last_name='Student',
                     email='test@student.com'
                 )
+    async def test_create_students_reports_each_student(self):
+        async def create_student(onyen, name, email, *, limits):
+            if onyen == "broken":
+                raise RuntimeError("gitea is down")
+            return StudentModel(onyen=onyen, name=name, email=email)
+        mock_create_student = unittest.mock.AsyncMock(side_effect=create_student)
+        mock_session_local = MagicMock()
+
+        with patch.object(StudentService, "create_student", mock_create_student), \
+                patch("app.services.user.student_service.SessionLocal", mock_session_local):
+            results = await self.student_service.create_students([
+                CreateStudentSchema(onyen="first", name="First", email="first@student.com"),
+                CreateStudentSchema(onyen="broken", name="Broken", email="broken@student.com"),
+                CreateStudentSchema(onyen="second", name="Second", email="second@student.com")
+            ])
+
+        self.assertEqual([(r.onyen, r.success) for r in results], [("first", True), ("broken", False), ("second", True)])
+        self.assertEqual(results[1].error, "gitea is down")
+        # The whole batch shares the same upstream limits.
+        limits = [call.kwargs["limits"] for call in mock_create_student.await_args_list]
+        self.assertTrue(all(l is limits[0] for l in limits))
+        # Each student gets a session of its own, which is closed afterwards, rather than sharing the service's.
+        self.assertEqual(mock_session_local.call_count, 3)
+        self.assertEqual(mock_session_local.return_value.__exit__.call_count, 3)
+
+    async def test_get_user_by_onyen_is_cached_per_session(self):
+        # An unbound session, the student is made persistent in it without a database.
+        session = Session()
+        student = StudentModel(id=1, onyen="test", name="Test", email="test@student.com")
+        make_transient_to_detached(student)
+        session.add(student)
+        query = unittest.mock.AsyncMock(return_value=MagicMock(first=MagicMock(return_value=student)))
+
+        with patch("app.services.user.user_service.scalars", query):
+            self.assertIs(await StudentService(session).get_user_by_onyen("test"), student)
+            self.assertIs(await StudentService(session).get_user_by_onyen("test"), student)
+            self.assertEqual(query.await_count, 1)
+
+            # Once the student is no longer in the session (e.g. deleted), it's looked up again.
+            session.expunge(student)
+            await StudentService(session).get_user_by_onyen("test")
+            self.assertEqual(query.await_count, 2)
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestStudentService)
 unittest.TextTestRunner(verbosity=2).run(suite)
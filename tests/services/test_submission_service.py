@@ -0,0 +1,59 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from sqlalchemy.orm import Session, Query
+from sqlalchemy.dialects import postgresql
+from app.services import SubmissionService
+from app.models import AssignmentModel, SubmissionModel
+
+class TestSubmissionService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # An unbound session, so that queries can be compiled without a database.
+        self.session = Session()
+        self.submission_service = SubmissionService(session=self.session)
+        self.assignment = AssignmentModel(id=1, name="assignment")
+
+    async def test_get_active_submissions_single_query(self):
+        statements = []
+        def all(query):
+            statements.append(str(query.statement.compile(dialect=postgresql.dialect())))
+            return []
+
+        with patch.object(Query, "all", all):
+            await self.submission_service.get_active_submissions(self.assignment)
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn("DISTINCT ON (submission.student_id)", statements[0])
+        self.assertIn("ORDER BY submission.student_id, submission.submission_time DESC", statements[0])
+
+    async def test_get_submission_schemas_by_student_single_query(self):
+        now = datetime.now(timezone.utc)
+        submissions = [
+            SubmissionModel(id=i, commit_id=f"commit{ i }", graded=False, submission_time=now - timedelta(hours=i))
+            for i in range(3)
+        ]
+        statements = []
+        def all(query):
+            statements.append(str(query.statement.compile(dialect=postgresql.dialect())))
+            return [("alice", submissions[0], True), ("alice", submissions[1], False), ("bob", submissions[2], True), ("carol", None, None)]
+
+        with patch.object(Query, "all", all):
+            schemas = await self.submission_service.get_submission_schemas_by_student(self.assignment, after_onyen="aaron", limit=3)
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn(
+            "row_number() OVER (PARTITION BY submission.student_id ORDER BY submission.submission_time <= %(submission_time_1)s DESC, submission.submission_time DESC) = %(param_1)s "
+            "AND submission.submission_time <= %(submission_time_1)s AS active",
+            statements[0]
+        )
+        self.assertIn("LEFT OUTER JOIN submission", statements[0])
+        self.assertIn("user_account.onyen > %(onyen_1)s", statements[0])
+        self.assertEqual({ onyen : [(s.id, s.active) for s in s_list] for onyen, s_list in schemas.items() }, {
+            "alice": [(0, True), (1, False)],
+            "bob": [(2, True)],
+            "carol": []
+        })
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSubmissionService)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,38 @@
+import asyncio
+import contextvars
+import unittest
+from app.core.background_tasks import BackgroundTaskRegistry
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+class TestBackgroundTaskRegistry(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.registry = BackgroundTaskRegistry()
+
+    async def test_task_outlives_starting_context(self):
+        async def job():
+            await asyncio.sleep(0)
+            return request_id.get()
+
+        request_id.set(1)
+        task = self.registry.start(job())
+
+        # Request-scoped state isn't carried into the task.
+        self.assertIsNone(await task)
+
+    async def test_cancel_all(self):
+        started = asyncio.Event()
+        async def job():
+            started.set()
+            await asyncio.sleep(60)
+
+        task = self.registry.start(job())
+        await started.wait()
+        await self.registry.cancel_all()
+
+        self.assertTrue(task.cancelled())
+        self.assertEqual(len(self.registry._tasks), 0)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestBackgroundTaskRegistry)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+from app.core.utils.debounce import Debouncer
+
+class TestDebouncer(unittest.IsolatedAsyncioTestCase):
+    async def test_collapses_bursts(self):
+        calls = []
+        async def func(): calls.append(1)
+        debouncer = Debouncer(func, delay=0.01)
+
+        for _ in range(10): debouncer.trigger()
+        await debouncer.join()
+
+        self.assertEqual(len(calls), 1)
+
+    async def test_single_flight(self):
+        running, max_running, calls = 0, 0, 0
+        started = asyncio.Event()
+        async def func():
+            nonlocal running, max_running, calls
+            running += 1
+            max_running = max(max_running, running)
+            started.set()
+            await asyncio.sleep(0.05)
+            running -= 1
+            calls += 1
+        debouncer = Debouncer(func, delay=0)
+
+        debouncer.trigger()
+        await started.wait()
+        # Arrives mid-call, so it runs once more afterwards.
+        debouncer.trigger()
+        debouncer.trigger()
+        await debouncer.join()
+
+        self.assertEqual(calls, 2)
+        self.assertEqual(max_running, 1)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestDebouncer)
+unittest.TextTestRunner(verbosity=2).run(suite)
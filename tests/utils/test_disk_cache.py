@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from app.core.utils.disk_cache import DiskLRUCache
+
+class TestDiskLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = DiskLRUCache(self.temp_dir.name, max_bytes=10)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def set_with_age(self, key: str, data: bytes, age: int):
+        self.cache.set(key, data)
+        path = Path(self.temp_dir.name) / key
+        os.utime(path, (path.stat().st_atime - age, path.stat().st_mtime - age))
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get("missing"))
+
+    def test_set_and_get(self):
+        self.cache.set("key", b"value")
+        self.assertEqual(self.cache.get("key"), b"value")
+
+    def test_counts_hits_and_misses(self):
+        self.cache.set("key", b"value")
+        self.cache.get("key")
+        self.cache.get("key")
+        self.cache.get("missing")
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_evicts_least_recently_used(self):
+        self.set_with_age("old", b"1234", age=30)
+        self.set_with_age("used", b"1234", age=20)
+        # Reading bumps the entry to most recently used.
+        self.cache.get("used")
+        self.cache.set("new", b"1234")
+
+        self.assertIsNone(self.cache.get("old"))
+        self.assertEqual(self.cache.get("used"), b"1234")
+        self.assertEqual(self.cache.get("new"), b"1234")
+
+    def test_no_temporary_files_left_behind(self):
+        self.cache.set("key", b"value")
+        self.assertEqual(os.listdir(self.temp_dir.name), ["key"])
+
+    def test_evict_deletes_stale_temporary_files(self):
+        stale_path = Path(self.temp_dir.name) / ".tmp-stale"
+        stale_path.write_bytes(b"partial")
+        os.utime(stale_path, (stale_path.stat().st_atime - 2 * 60 * 60, stale_path.stat().st_mtime - 2 * 60 * 60))
+        self.cache.set("key", b"value")
+
+        self.assertEqual(os.listdir(self.temp_dir.name), ["key"])
+
+    def test_evict_counts_live_temporary_files(self):
+        self.set_with_age("old", b"1234", age=30)
+        # Another writer is still filling this one in.
+        (Path(self.temp_dir.name) / ".tmp-live").write_bytes(b"1234")
+        self.cache.set("new", b"1234")
+
+        self.assertIsNone(self.cache.get("old"))
+        self.assertEqual(self.cache.get("new"), b"1234")
+        self.assertTrue((Path(self.temp_dir.name) / ".tmp-live").exists())
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestDiskLRUCache)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import unittest
+from app.core.http_clients import HTTPClientRegistry, Upstream
+
+class TestHTTPClientRegistry(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.registry = HTTPClientRegistry()
+
+    async def asyncTearDown(self):
+        await self.registry.close()
+
+    async def test_get_reuses_client_per_upstream(self):
+        canvas_client = self.registry.get(Upstream.CANVAS)
+
+        self.assertIs(self.registry.get(Upstream.CANVAS), canvas_client)
+        self.assertIsNot(self.registry.get(Upstream.GITEA), canvas_client)
+
+    async def test_get_replaces_closed_client(self):
+        canvas_client = self.registry.get(Upstream.CANVAS)
+        await self.registry.close()
+
+        self.assertTrue(canvas_client.is_closed)
+        self.assertIsNot(self.registry.get(Upstream.CANVAS), canvas_client)
+
+    def test_client_is_closed_with_its_loop(self):
+        registry = HTTPClientRegistry()
+        async def get_client():
+            return registry.get(Upstream.CANVAS)
+
+        first_client = asyncio.run(get_client())
+        second_client = asyncio.run(get_client())
+
+        self.assertIsNot(second_client, first_client)
+        self.assertTrue(first_client.is_closed)
+        self.assertTrue(second_client.is_closed)
+
+    def test_get_closes_replaced_client_on_its_running_loop(self):
+        registry = HTTPClientRegistry()
+        other_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=other_loop.run_forever)
+        thread.start()
+        try:
+            async def get_client():
+                return registry.get(Upstream.CANVAS)
+            # Still in use by the other thread's loop when this one replaces it.
+            first_client = asyncio.run_coroutine_threadsafe(get_client(), other_loop).result()
+            second_client = asyncio.run(get_client())
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), other_loop).result()
+
+            self.assertIsNot(second_client, first_client)
+            self.assertTrue(first_client.is_closed)
+        finally:
+            async def cancel_tasks():
+                for task in asyncio.all_tasks() - {asyncio.current_task()}: task.cancel()
+            asyncio.run_coroutine_threadsafe(cancel_tasks(), other_loop).result()
+            other_loop.call_soon_threadsafe(other_loop.stop)
+            thread.join()
+            other_loop.close()
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestHTTPClientRegistry)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,27 @@
+import io
+import zipfile
+import unittest
+from app.core.utils.zip_stream import stream_zip
+
+async def iter_chunks(data: bytes, chunk_size: int = 4):
+    for i in range(0, len(data), chunk_size):
+        yield data[i : i + chunk_size]
+
+class TestStreamZip(unittest.IsolatedAsyncioTestCase):
+    async def test_stream_zip_is_readable(self):
+        async def entries():
+            yield "a.zip", iter_chunks(b"first entry")
+            yield "b/c.txt", iter_chunks(b"second entry")
+
+        chunks = [chunk async for chunk in stream_zip(entries())]
+
+        self.assertGreater(len(chunks), 2)
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            self.assertEqual(archive.namelist(), ["a.zip", "b/c.txt"])
+            self.assertEqual(archive.read("a.zip"), b"first entry")
+            self.assertEqual(archive.read("b/c.txt"), b"second entry")
+            self.assertIsNone(archive.testzip())
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestStreamZip)
+unittest.TextTestRunner(verbosity=2).run(suite)